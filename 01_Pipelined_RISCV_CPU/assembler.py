@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""
+Two-pass RV32I Assembler
+Turns .s source into program.hex plus the annotated instruction listing
+that generate_test3.py writes to instructions.txt, so a test is written once
+as text instead of as (description, encode_*(...)) pairs.
+
+Pass 1 assigns addresses to labels and expands pseudo-instructions into
+base instructions; pass 2 evaluates operands and encodes. Assembled images
+are cached by source hash under the simulation cache directory.
+
+Syntax:
+    ## Title              listing section heading (like "### Test Group 1")
+    label:  addi x1, x0, 3    # comments start with '#', '//' or ';'
+    li      t0, '#'           # ...outside character literals
+    lw      a0, 8(sp)         # x0..x31 or ABI register names
+    beq     x1, x2, loop      # label target; a plain number is a byte offset
+    .equ    N, 10             # also .set, .word, .org, .align, .space
+
+Pseudo-instructions: nop, li, la, mv, not, neg, seqz, snez, sltz, sgtz,
+j, jr, ret, call, tail, beqz, bnez, blez, bgez, bltz, bgtz, bgt, ble,
+bgtu, bleu, and jal/jalr with the link register omitted. `la` and `call`
+use absolute lui/addi and jal because execute.v computes AUIPC from rs1.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+from riscv_iss import (IMEM_WORDS, NOP, MASK32, BRANCH_NAMES, LOAD_NAMES, STORE_NAMES,
+                       IMM_NAMES, REG_NAMES, OP_LUI, OP_AUIPC, OP_JAL, OP_JALR, OP_BRANCH,
+                       OP_LOAD, OP_STORE, OP_IMM, OP_REG, sext, to_signed, disassemble,
+                       encode_rtype, encode_itype, encode_stype, encode_btype,
+                       encode_utype, encode_jtype)
+
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools')
+
+ABI_NAMES = ['zero', 'ra', 'sp', 'gp', 'tp', 't0', 't1', 't2', 's0', 's1',
+             'a0', 'a1', 'a2', 'a3', 'a4', 'a5', 'a6', 'a7',
+             's2', 's3', 's4', 's5', 's6', 's7', 's8', 's9', 's10', 's11',
+             't3', 't4', 't5', 't6']
+REGISTERS = {f'x{i}': i for i in range(32)}
+REGISTERS.update({name: i for i, name in enumerate(ABI_NAMES)})
+REGISTERS['fp'] = 8
+
+# Base instructions: mnemonic -> (format, opcode, funct3, funct7)
+BASE = {}
+for (f3, alt), name in REG_NAMES.items():
+    BASE[name] = ('R', OP_REG, f3, 0x20 if alt else 0)
+for f3, name in IMM_NAMES.items():
+    BASE[name] = ('SHIFT' if f3 in (1, 5) else 'I', OP_IMM, f3, 0)
+BASE['srai'] = ('SHIFT', OP_IMM, 5, 0x20)
+for f3, name in LOAD_NAMES.items():
+    BASE[name] = ('LOAD', OP_LOAD, f3, 0)
+for f3, name in STORE_NAMES.items():
+    BASE[name] = ('S', OP_STORE, f3, 0)
+for f3, name in BRANCH_NAMES.items():
+    BASE[name] = ('B', OP_BRANCH, f3, 0)
+BASE['lui'] = ('U', OP_LUI, 0, 0)
+BASE['auipc'] = ('U', OP_AUIPC, 0, 0)
+BASE['jal'] = ('J', OP_JAL, 0, 0)
+BASE['jalr'] = ('JALR', OP_JALR, 0, 0)
+
+OPERAND_COUNT = {'R': 3, 'I': 3, 'SHIFT': 3, 'LOAD': 2, 'S': 2, 'B': 3, 'U': 2, 'J': 2}
+
+# Pseudo-instructions with a fixed one-word expansion: name -> (base, operand template)
+PSEUDO = {
+    'nop': ('addi', ['x0', 'x0', '0']),
+    'mv': ('addi', ['{0}', '{1}', '0']),
+    'not': ('xori', ['{0}', '{1}', '-1']),
+    'neg': ('sub', ['{0}', 'x0', '{1}']),
+    'seqz': ('sltiu', ['{0}', '{1}', '1']),
+    'snez': ('sltu', ['{0}', 'x0', '{1}']),
+    'sltz': ('slt', ['{0}', '{1}', 'x0']),
+    'sgtz': ('slt', ['{0}', 'x0', '{1}']),
+    'j': ('jal', ['x0', '{0}']),
+    'jr': ('jalr', ['x0', '0({0})']),
+    'ret': ('jalr', ['x0', '0(x1)']),
+    'call': ('jal', ['x1', '{0}']),
+    'tail': ('jal', ['x0', '{0}']),
+    'beqz': ('beq', ['{0}', 'x0', '{1}']),
+    'bnez': ('bne', ['{0}', 'x0', '{1}']),
+    'blez': ('bge', ['x0', '{0}', '{1}']),
+    'bgez': ('bge', ['{0}', 'x0', '{1}']),
+    'bltz': ('blt', ['{0}', 'x0', '{1}']),
+    'bgtz': ('blt', ['x0', '{0}', '{1}']),
+    'bgt': ('blt', ['{1}', '{0}', '{2}']),
+    'ble': ('bge', ['{1}', '{0}', '{2}']),
+    'bgtu': ('bltu', ['{1}', '{0}', '{2}']),
+    'bleu': ('bgeu', ['{1}', '{0}', '{2}']),
+}
+
+COMMENT_RE = re.compile(r"'[^']'|(#|//|;)")    # group 1 outside character literals
+OPERAND_SEP_RE = re.compile(r",(?=(?:[^']*'[^']*')*[^']*$)")   # commas outside quotes
+LABEL_RE = re.compile(r'^\s*([A-Za-z_.$][\w.$]*)\s*:')
+MEM_RE = re.compile(r'^(.*)\(\s*(\w+)\s*\)$')
+RELOC_RE = re.compile(r'^%(hi|lo)\((.*)\)$')
+TOKEN_RE = re.compile(r"[+-]|'[^']'|[^\s+-]+")
+SYMBOL_RE = re.compile(r'^[A-Za-z_.$][\w.$]*$')
+
+
+class AssemblyError(Exception):
+    """Raised for malformed source; carries the file name and line number"""
+
+    def __init__(self, message, name='<input>', line_no=None):
+        self.name = name
+        self.line_no = line_no
+        where = f"{name}:{line_no}: " if line_no is not None else f"{name}: "
+        super().__init__(where + message)
+
+
+class Assembly:
+    """Result of assembling one source file"""
+
+    def __init__(self, words, listing, symbols):
+        self.words = words        # instruction words, index = address / 4
+        self.listing = listing    # ['group', title] | ['label', name] | ['instr', index, word, text]
+        self.symbols = symbols    # label / .equ name -> value
+
+    def hex_text(self):
+        return ''.join(f"{w:08X}\n" for w in self.words)
+
+    def listing_text(self, title="PROGRAM - INSTRUCTION LIST"):
+        """instructions.txt contents in the generate_test3.py layout"""
+        width = max(2, len(str(len(self.words) - 1)))
+        lines = ["=" * 80, title, "=" * 80, ""]
+        if not self.listing or self.listing[0][0] != 'group':
+            lines.append("-" * 80)
+        for entry in self.listing:
+            if entry[0] == 'group':
+                lines += ["", f"### {entry[1]}", "-" * 80]
+            elif entry[0] == 'label':
+                lines.append(f"{'':{width}}  {entry[1]}:")
+            else:
+                _, index, word, text = entry
+                lines.append(f"{index:{width}d}: {word:08X}  {text}")
+        lines += ["", "=" * 80, f"Total: {len(self.words)} instructions", "=" * 80, ""]
+        return '\n'.join(lines)
+
+    def to_json(self):
+        return {'words': self.words, 'listing': self.listing, 'symbols': self.symbols}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data['words'], data['listing'], data['symbols'])
+
+
+def hi20(value):
+    """Upper immediate such that (hi20 << 12) + sext(lo12) == value"""
+    return ((value + 0x800) >> 12) & 0xFFFFF
+
+
+def lo12(value):
+    return sext(value & 0xFFF, 12)
+
+
+class Assembler:
+    """Two-pass assembler for one source text"""
+
+    def __init__(self, name='<input>', max_words=IMEM_WORDS):
+        self.name = name
+        self.max_words = max_words
+        self.symbols = {}
+        self.items = []        # (pc, mnemonic, operands, line_no, text, is_pseudo)
+        self.line_no = 0
+
+    def error(self, message):
+        raise AssemblyError(message, self.name, self.line_no)
+
+    # -- operands ---------------------------------------------------------
+
+    def register(self, text):
+        reg = REGISTERS.get(text.strip().lower())
+        if reg is None:
+            self.error(f"bad register '{text.strip()}'")
+        return reg
+
+    def evaluate(self, expr, pc, required=True):
+        """Integer value of an expression: numbers, symbols, '.', + and -"""
+        expr = expr.strip()
+        m = RELOC_RE.match(expr)
+        if m:
+            value = self.evaluate(m.group(2), pc, required)
+            if value is None:
+                return None
+            return hi20(value) if m.group(1) == 'hi' else lo12(value)
+
+        total = 0
+        sign = 1
+        after_operand = False
+        for token in TOKEN_RE.findall(expr):
+            if token in ('+', '-'):
+                if token == '-':
+                    sign = -sign
+                after_operand = False
+                continue
+            if after_operand:
+                self.error(f"bad expression '{expr}'")
+            if token[0] == "'":
+                value = ord(token[1])
+            elif token == '.':
+                value = pc
+            elif token[0].isdigit():
+                try:
+                    value = int(token, 0)
+                except ValueError:
+                    self.error(f"bad number '{token}'")
+            elif SYMBOL_RE.match(token):
+                value = self.symbols.get(token)
+                if value is None:
+                    if required:
+                        self.error(f"undefined symbol '{token}'")
+                    return None
+            else:
+                self.error(f"bad expression '{expr}'")
+            total += sign * value
+            sign = 1
+            after_operand = True
+        if not after_operand:
+            self.error(f"bad expression '{expr}'")
+        return total
+
+    def immediate(self, expr, pc, lo, hi, what='immediate'):
+        value = self.evaluate(expr, pc)
+        if not lo <= value <= hi:
+            self.error(f"{what} {value} out of range [{lo}, {hi}]")
+        return value
+
+    def memory(self, text, pc):
+        """'imm(reg)', '(reg)' or a bare x0-relative address"""
+        m = MEM_RE.match(text.strip())
+        if m:
+            offset = m.group(1).strip() or '0'
+            return self.immediate(offset, pc, -2048, 2047, 'offset'), self.register(m.group(2))
+        return self.immediate(text, pc, -2048, 2047, 'address'), 0
+
+    def target(self, text, pc, bits):
+        """Branch/jump offset: labels are absolute, plain numbers relative"""
+        text = text.strip()
+        try:
+            offset = int(text, 0)
+        except ValueError:
+            offset = self.evaluate(text, pc) - pc
+        limit = 1 << (bits - 1)
+        if not -limit <= offset < limit:
+            self.error(f"target offset {offset} out of range")
+        if offset & 1:
+            self.error(f"target offset {offset} is odd")
+        return offset
+
+    # -- pass 1 -----------------------------------------------------------
+
+    def emit(self, pc, mnemonic, operands, text, pseudo):
+        self.items.append((pc, mnemonic, operands, self.line_no, text, pseudo))
+        return pc + 4
+
+    def expand(self, pc, mnemonic, operands, text):
+        """Append the base instructions for one source statement"""
+        if mnemonic in BASE:
+            if mnemonic == 'jal' and len(operands) == 1:
+                return self.emit(pc, 'jal', ['x1'] + operands, text, True)
+            if mnemonic == 'jalr' and len(operands) == 1 and '(' not in operands[0]:
+                return self.emit(pc, 'jalr', ['x1', f'0({operands[0]})'], text, True)
+            return self.emit(pc, mnemonic, operands, text, False)
+
+        if mnemonic in PSEUDO:
+            base, template = PSEUDO[mnemonic]
+            needed = max((int(t[t.index('{') + 1]) + 1 for t in template if '{' in t), default=0)
+            if len(operands) != needed:
+                self.error(f"{mnemonic} takes {needed} operand(s)")
+            return self.emit(pc, base, [t.format(*operands) for t in template], text, True)
+
+        if mnemonic in ('li', 'la'):
+            if len(operands) != 2:
+                self.error(f"{mnemonic} takes 2 operands")
+            rd, expr = operands
+            value = self.evaluate(expr, pc, required=False) if mnemonic == 'li' else None
+            if value is not None and -2048 <= to_signed(value & MASK32) < 2048:
+                return self.emit(pc, 'addi', [rd, 'x0', str(to_signed(value & MASK32))], text, True)
+            if value is not None and lo12(value) == 0:
+                return self.emit(pc, 'lui', [rd, f'%hi({expr})'], text, True)
+            pc = self.emit(pc, 'lui', [rd, f'%hi({expr})'], text, True)
+            return self.emit(pc, 'addi', [rd, rd, f'%lo({expr})'], text, True)
+
+        self.error(f"unknown instruction '{mnemonic}'")
+
+    def directive(self, pc, name, args):
+        if name in ('.equ', '.set'):
+            if len(args) != 2 or not SYMBOL_RE.match(args[0]):
+                self.error(f"usage: {name} NAME, VALUE")
+            self.symbols[args[0]] = self.evaluate(args[1], pc)
+        elif name == '.word':
+            for arg in args:
+                pc = self.emit(pc, '.word', [arg], f".word {arg}", False)
+        elif name == '.org':
+            target = self.evaluate(args[0], pc)
+            if target < pc or target % 4:
+                self.error(f".org 0x{target:x} is behind 0x{pc:x} or unaligned")
+            pc = target
+        elif name == '.align':
+            step = 1 << self.evaluate(args[0], pc)
+            pc = max(pc, (pc + step - 1) // step * step)
+        elif name == '.space':
+            size = self.evaluate(args[0], pc)
+            pc += (size + 3) // 4 * 4
+        elif name not in ('.text', '.globl', '.global', '.section', '.option', '.file'):
+            self.error(f"unknown directive '{name}'")
+        return pc
+
+    def first_pass(self, lines):
+        pc = 0
+        for self.line_no, raw in enumerate(lines, 1):
+            stripped = raw.strip()
+            if stripped.startswith('##'):
+                self.items.append((pc, '.group', [stripped.lstrip('#').strip()],
+                                   self.line_no, '', False))
+                continue
+            m = next((m for m in COMMENT_RE.finditer(raw) if m.group(1)), None)
+            line = raw[:m.start()] if m else raw
+            while True:
+                m = LABEL_RE.match(line)
+                if not m:
+                    break
+                label = m.group(1)
+                if label in self.symbols:
+                    self.error(f"duplicate label '{label}'")
+                self.symbols[label] = pc
+                self.items.append((pc, '.label', [label], self.line_no, '', False))
+                line = line[m.end():]
+            line = line.strip()
+            if not line:
+                continue
+            parts = line.split(None, 1)
+            mnemonic = parts[0].lower()
+            operands = [op.strip() for op in OPERAND_SEP_RE.split(parts[1])] if len(parts) > 1 else []
+            text = f"{mnemonic} {', '.join(operands)}" if operands else mnemonic
+            if mnemonic[0] == '.':
+                pc = self.directive(pc, mnemonic, operands)
+            else:
+                pc = self.expand(pc, mnemonic, operands, text)
+            if pc > self.max_words * 4:
+                self.error(f"program exceeds {self.max_words} words of instruction memory")
+
+    # -- pass 2 -----------------------------------------------------------
+
+    def encode(self, pc, mnemonic, ops):
+        if mnemonic == '.word':
+            return self.evaluate(ops[0], pc) & MASK32
+        fmt, opcode, funct3, funct7 = BASE[mnemonic]
+        count = OPERAND_COUNT.get(fmt)
+        if count is not None and len(ops) != count:
+            self.error(f"{mnemonic} takes {count} operands")
+        if fmt == 'R':
+            return encode_rtype(opcode, self.register(ops[0]), funct3,
+                                self.register(ops[1]), self.register(ops[2]), funct7)
+        if fmt == 'I':
+            return encode_itype(opcode, self.register(ops[0]), funct3, self.register(ops[1]),
+                                self.immediate(ops[2], pc, -2048, 2047))
+        if fmt == 'SHIFT':
+            shamt = self.immediate(ops[2], pc, 0, 31, 'shift amount')
+            return encode_itype(opcode, self.register(ops[0]), funct3, self.register(ops[1]),
+                                (funct7 << 5) | shamt)
+        if fmt == 'LOAD':
+            offset, base = self.memory(ops[1], pc)
+            return encode_itype(opcode, self.register(ops[0]), funct3, base, offset)
+        if fmt == 'S':
+            offset, base = self.memory(ops[1], pc)
+            return encode_stype(opcode, funct3, base, self.register(ops[0]), offset)
+        if fmt == 'B':
+            return encode_btype(opcode, funct3, self.register(ops[0]), self.register(ops[1]),
+                                self.target(ops[2], pc, 13))
+        if fmt == 'U':
+            imm = self.immediate(ops[1], pc, -(1 << 19), (1 << 20) - 1, 'upper immediate')
+            return encode_utype(opcode, self.register(ops[0]), imm)
+        if fmt == 'J':
+            return encode_jtype(opcode, self.register(ops[0]), self.target(ops[1], pc, 21))
+        # JALR: "rd, imm(rs1)" or "rd, rs1, imm"
+        if len(ops) == 3:
+            offset, base = self.immediate(ops[2], pc, -2048, 2047), self.register(ops[1])
+        elif len(ops) == 2:
+            offset, base = self.memory(ops[1], pc)
+        else:
+            self.error("jalr takes 2 or 3 operands")
+        return encode_itype(opcode, self.register(ops[0]), funct3, base, offset)
+
+    def second_pass(self):
+        words = []
+        listing = []
+        for pc, mnemonic, ops, self.line_no, text, pseudo in self.items:
+            if mnemonic == '.group':
+                listing.append(['group', ops[0]])
+                continue
+            if mnemonic == '.label':
+                listing.append(['label', ops[0]])
+                continue
+            index = pc // 4
+            if index > len(words):
+                words.extend([NOP] * (index - len(words)))
+            word = self.encode(pc, mnemonic, ops)
+            words.append(word)
+            listing.append(['instr', index, word,
+                            f"{disassemble(word)}  # {text}" if pseudo else text])
+        return words, listing
+
+    def assemble(self, source):
+        self.first_pass(source.splitlines())
+        words, listing = self.second_pass()
+        return Assembly(words, listing, dict(self.symbols))
+
+
+def assemble(source, name='<input>', max_words=IMEM_WORDS):
+    """Assemble source text into an Assembly (raises AssemblyError)"""
+    return Assembler(name, max_words).assemble(source)
+
+
+def _assembler_digest():
+    with open(os.path.abspath(__file__), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def default_cache_dir():
+    sys.path.insert(0, TOOLS_DIR)
+    from sim_cache import CACHE_DIR
+    return os.path.join(CACHE_DIR, 'asm')
+
+
+def assemble_file(path, cache_dir=None, use_cache=True, max_words=IMEM_WORDS):
+    """Assemble a .s file, reusing the cached image when the source is unchanged
+
+    Returns (Assembly, cache_hit).
+    """
+    with open(path, 'rb') as f:
+        source = f.read()
+    if not use_cache:
+        return assemble(source.decode(), path, max_words), False
+
+    h = hashlib.sha256()
+    h.update(_assembler_digest().encode())
+    h.update(str(max_words).encode() + b'\0')
+    h.update(source)
+    cache_dir = cache_dir or default_cache_dir()
+    cached = os.path.join(cache_dir, h.hexdigest()[:32] + '.json')
+    try:
+        with open(cached) as f:
+            return Assembly.from_json(json.load(f)), True
+    except (OSError, ValueError, KeyError):
+        pass
+
+    result = assemble(source.decode(), path, max_words)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{cached}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(result.to_json(), f)
+    os.replace(tmp, cached)
+    return result, False
+
+
+def hex_for_source(path, cache_dir=None):
+    """Path of a cached program.hex image for a .s file, assembling if needed"""
+    cache_dir = cache_dir or default_cache_dir()
+    result, _ = assemble_file(path, cache_dir)
+    text = result.hex_text()
+    hexfile = os.path.join(cache_dir, hashlib.sha256(text.encode()).hexdigest()[:32] + '.hex')
+    if not os.path.isfile(hexfile):
+        tmp = f"{hexfile}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(text)
+        os.replace(tmp, hexfile)
+    return hexfile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Two-pass RV32I assembler")
+    parser.add_argument('source', help=".s file")
+    parser.add_argument('-o', '--output', default='program.hex')
+    parser.add_argument('-l', '--listing', default='instructions.txt',
+                        help="annotated listing ('' to skip)")
+    parser.add_argument('--title', help="listing title (default: from the file name)")
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--max-words', type=int, default=IMEM_WORDS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        result, hit = assemble_file(args.source, use_cache=not args.no_cache,
+                                    max_words=args.max_words)
+    except (AssemblyError, OSError) as e:
+        print(f"✗ {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+
+    with open(args.output, 'w') as f:
+        f.write(result.hex_text())
+    if args.listing:
+        title = args.title or os.path.splitext(os.path.basename(args.source))[0].upper()
+        with open(args.listing, 'w') as f:
+            f.write(result.listing_text(f"{title} - INSTRUCTION LIST"))
+
+    print(f"✓ Assembled {len(result.words)} instructions "
+          f"({'cached' if hit else f'{elapsed * 1000:.1f} ms'})")
+    print(f"✓ Created {args.output}")
+    if args.listing:
+        print(f"✓ Created {args.listing}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Lockstep Commit-Log Checker for the Pipelined RISC-V CPU
+Runs the testbench with +commitlog and compares every instruction that
+reaches WB (pc, rd, value, store address/data) against riscv_iss.py as
+the lines stream out of vvp. The simulation is killed at the first
+mismatch and the exact instruction, retirement number and cycle are
+reported, instead of finding out from a wrong final register dump.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from riscv_iss import (MASK32, NOP, OP_AUIPC, OP_IMM, OP_JAL, OP_JALR, OP_LOAD, OP_LUI,
+                       OP_REG, OP_STORE, RV32ISim, cycle_budget, decode_fields, decode_imm,
+                       disassemble, load_hex)
+from sim_trace import REG_RE, parse_value
+
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools')
+
+# COMMIT <cycle> <pc> <rd> <value> <store bytes> <store addr> <store data>
+COMMIT_RE = re.compile(r'^COMMIT\s+(\d+)\s+(\S+)\s+(\d+)\s+(\S+)\s+(\d+)\s+(\S+)\s+(\S+)')
+
+# Opcodes whose rd is written back (writeback.v gates rd == 0 itself)
+WRITES_RD = (OP_LUI, OP_AUIPC, OP_JAL, OP_JALR, OP_LOAD, OP_IMM, OP_REG)
+STORE_BYTES = {0b000: 1, 0b001: 2, 0b010: 4}
+
+# Retirements shown before the failing one
+CONTEXT = 4
+
+
+@dataclass
+class Commit:
+    """One retirement, as printed by the testbench or predicted by the ISS.
+
+    Values that were X/Z in simulation are None.
+    """
+    cycle: Optional[int]
+    pc: Optional[int]
+    rd: int = 0
+    value: Optional[int] = 0
+    store_bytes: int = 0
+    store_addr: Optional[int] = 0
+    store_data: Optional[int] = 0
+
+    def fields(self):
+        store = (self.store_bytes, self.store_addr, self.store_data) if self.store_bytes else None
+        return {'pc': self.pc, 'rd': self.rd, 'value': self.value if self.rd else 0,
+                'store': store}
+
+
+@dataclass
+class Mismatch:
+    """First disagreement between the RTL commit log and the ISS"""
+    index: int
+    cycle: Optional[int]
+    message: str
+    pc: Optional[int] = None
+    expected: Optional[Commit] = None
+    actual: Optional[Commit] = None
+
+
+def parse_commit(line):
+    """Return a Commit for a COMMIT line, None for anything else"""
+    m = COMMIT_RE.match(line)
+    if not m:
+        return None
+    return Commit(cycle=int(m.group(1)), pc=parse_value(m.group(2), 16),
+                  rd=int(m.group(3)), value=parse_value(m.group(4), 16),
+                  store_bytes=int(m.group(5)), store_addr=parse_value(m.group(6), 16),
+                  store_data=parse_value(m.group(7), 16))
+
+
+def format_value(value, width=8):
+    return f"{value:0{width}x}" if value is not None else "x" * width
+
+
+def format_commit(c):
+    if c is None:
+        return "-"
+    text = f"pc={format_value(c.pc)}"
+    if c.rd:
+        text += f" x{c.rd}={format_value(c.value)}"
+    if c.store_bytes:
+        text += (f" mem[{format_value(c.store_addr, 3)}]"
+                 f"={format_value(c.store_data, 2 * c.store_bytes)}")
+    return text
+
+
+# ----------------------------------------------------------------------------
+# Reference side
+# ----------------------------------------------------------------------------
+
+class LockstepChecker:
+    """Steps the ISS once per commit record and compares the two
+
+    Taken branches and jumps never reach WB (execute.v drops their valid
+    bit when it redirects fetch), so the ISS steps over them silently. A
+    taken jump that links (rd != 0) is reported, because its write-back is
+    lost along with it. Once the ISS reaches the program's self-loop halt
+    the check is done: whatever the RTL retires after that is not compared.
+    """
+
+    def __init__(self, program):
+        self.sim = RV32ISim(program)
+        self.imask = self.sim.imem_words - 1
+        self.dmask = self.sim.dmem_bytes - 1
+        self.retired = 0
+        self.skipped = 0
+        self.halted = False
+        self.history = []
+        self.mismatch = None
+        self.last_cycle = None
+        self.expected = None    # Next retirement the ISS predicts
+        self.lost_link = None   # Taken linking jump the RTL cannot retire
+        self._advance()
+
+    @property
+    def done(self):
+        """The ISS halted with every retirement before the halt matched"""
+        return self.halted and self.expected is None and self.lost_link is None
+
+    def instruction(self, pc):
+        if pc is None:
+            return None
+        index = (pc >> 2) & self.imask
+        return self.sim.program[index] if index < len(self.sim.program) else NOP
+
+    def _step(self):
+        """Execute one ISS instruction; returns (Commit, taken) or None at the end"""
+        sim = self.sim
+        pc = sim.pc
+        if sim._table[(pc >> 2) & self.imask] is None:
+            return None
+        instr = self.instruction(pc)
+        opcode, rd, funct3, rs1, rs2, _ = decode_fields(instr)
+        expected = Commit(cycle=None, pc=pc)
+        if opcode == OP_STORE and funct3 in STORE_BYTES:
+            nbytes = STORE_BYTES[funct3]
+            expected.store_bytes = nbytes
+            expected.store_addr = (sim.regs[rs1] + decode_imm(instr)) & self.dmask
+            expected.store_data = sim.regs[rs2] & ((1 << (8 * nbytes)) - 1)
+        sim.run(1)
+        if opcode in WRITES_RD and rd:
+            expected.rd = rd
+            expected.value = sim.regs[rd]
+        if sim.pc == pc:
+            self.halted = True  # jump-to-self: the end of every generated program
+        return expected, sim.pc != ((pc + 4) & MASK32)
+
+    def _fail(self, cycle, message, pc=None, expected=None, actual=None):
+        self.mismatch = Mismatch(self.retired, cycle, message, pc, expected, actual)
+        return self.mismatch
+
+    def _advance(self):
+        """Step the ISS over taken branches/jumps to its next retirement"""
+        self.expected = None
+        while not self.halted:
+            step = self._step()
+            if step is None:
+                return
+            expected, taken = step
+            if not taken:
+                self.expected = expected
+                return
+            self.skipped += 1
+            if expected.rd:
+                self.lost_link = expected
+                return
+
+    def _fail_lost_link(self, cycle):
+        lost = self.lost_link
+        return self._fail(cycle, f"taken {disassemble(self.instruction(lost.pc))} writes "
+                                 f"x{lost.rd}={lost.value:08x} in the ISS but never "
+                                 f"reaches WB", lost.pc, lost, None)
+
+    def check(self, actual):
+        """Compare one RTL commit; returns a Mismatch or None"""
+        self.last_cycle = actual.cycle
+        if self.lost_link:
+            return self._fail_lost_link(actual.cycle)
+
+        expected = self.expected
+        if expected is None:
+            # NOP fill past the image is harmless; anything else is not
+            if actual.rd or actual.store_bytes:
+                return self._fail(actual.cycle, "retirement after the end of the program",
+                                  actual.pc, None, actual)
+            return None
+
+        expected.cycle = actual.cycle
+        diffs = [name for name, value in expected.fields().items()
+                 if actual.fields()[name] != value]
+        if diffs:
+            return self._fail(actual.cycle, f"{', '.join(diffs)} mismatch", expected.pc,
+                              expected, actual)
+        self.retired += 1
+        self.history.append(actual)
+        if len(self.history) > CONTEXT:
+            self.history.pop(0)
+        self._advance()
+        return None
+
+    def finish(self, registers=None):
+        """Called when the log ends: anything the ISS still expects is missing"""
+        if self.mismatch:
+            return self.mismatch
+        if self.lost_link:
+            return self._fail_lost_link(self.last_cycle)
+        if self.expected is not None:
+            return self._fail(self.last_cycle,
+                              "simulation ended before this instruction retired "
+                              "(cycle budget too small or pipeline hang)",
+                              self.expected.pc, self.expected, None)
+        for name, value in (registers or {}).items():
+            want = self.sim.regs[int(name[1:])]
+            if value != want:
+                return self._fail(self.last_cycle,
+                                  f"final {name}={format_value(value)} but the ISS has "
+                                  f"{want:08x} with no mismatching retirement")
+        return None
+
+
+# ----------------------------------------------------------------------------
+# RTL side
+# ----------------------------------------------------------------------------
+
+def check_lines(lines, checker, stop=None):
+    """Feed simulator output through the checker; returns the parsed register dump
+
+    Reading ends at the first mismatch or once the ISS has halted; `stop`
+    (e.g. killing vvp) is called in both cases.
+    """
+    registers = {}
+    if checker.done:
+        if stop:
+            stop()
+        return registers
+    for line in lines:
+        commit = parse_commit(line)
+        if commit is not None:
+            if checker.check(commit) is not None or checker.done:
+                if stop:
+                    stop()
+                return registers
+            continue
+        m = REG_RE.match(line)
+        if m:
+            registers[f'x{int(m.group(1))}'] = parse_value(m.group(2), 16)
+    checker.finish(registers)
+    return registers
+
+
+def check_log(path, program):
+    checker = LockstepChecker(program)
+    with open(path) as f:
+        check_lines(f, checker)
+    return checker
+
+
+def check_program(hexfile, cycles=None, timeout=120):
+    """Run one program on the cached RTL simulator in lockstep with the ISS"""
+    sys.path.insert(0, TOOLS_DIR)
+    from sim_cache import compile_project
+    from sim_projects import find_project
+
+    program = load_hex(hexfile)
+    instret = RV32ISim(program).run()
+    binary = compile_project(find_project('01'))
+    cmd = ['vvp', '-n', binary, f"+program={os.path.abspath(hexfile)}",
+           f"+cycles={cycles or cycle_budget(instret)}", '+novcd', '+commitlog']
+
+    checker = LockstepChecker(program)
+    with tempfile.TemporaryDirectory(prefix='commit-check-') as scratch:
+        proc = subprocess.Popen(cmd, cwd=scratch, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, text=True, bufsize=1)
+        timer = threading.Timer(timeout, proc.kill)
+        timer.start()
+        try:
+            check_lines(proc.stdout, checker, stop=proc.kill)
+        finally:
+            timer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            proc.wait()
+    return checker
+
+
+# ----------------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------------
+
+def format_report(name, checker):
+    lines = []
+    lines.append("=" * 80)
+    lines.append(f"COMMIT-LOG CHECK - {name}")
+    lines.append("=" * 80)
+    m = checker.mismatch
+    if m is None:
+        end = "halted" if checker.done else f"last commit at cycle {checker.last_cycle}"
+        lines.append(f"✓ {checker.retired} retirements match the ISS "
+                     f"({checker.skipped} taken branches/jumps, {end})")
+        return '\n'.join(lines)
+
+    cycle = m.cycle if m.cycle is not None else "?"
+    lines.append(f"✗ MISMATCH at cycle {cycle}, retirement #{m.index}: {m.message}")
+    if m.pc is not None:
+        instr = checker.instruction(m.pc)
+        lines.append(f"  Instruction: {m.pc:08x}: {instr:08x}  {disassemble(instr)}")
+    if m.expected or m.actual:
+        lines.append(f"  Expected (ISS): {format_commit(m.expected)}")
+        lines.append(f"  Actual (RTL):   {format_commit(m.actual)}")
+    if checker.history:
+        lines.append("  Last matching retirements:")
+        for c in checker.history:
+            lines.append(f"    cycle {c.cycle:6d}  {disassemble(checker.instruction(c.pc)):24s}"
+                         f"  {format_commit(c)}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lockstep RTL vs ISS commit-log checker")
+    parser.add_argument('programs', nargs='*', help="program.hex files to simulate")
+    parser.add_argument('--log', help="check a saved +commitlog simulation log instead")
+    parser.add_argument('--program', default='program.hex',
+                        help="with --log: the program the log was produced from")
+    parser.add_argument('--cycles', type=int, help="cycle budget (default: derived from the ISS)")
+    parser.add_argument('--timeout', type=int, default=120, help="seconds per simulation")
+    args = parser.parse_args()
+
+    results = {}
+    if args.log:
+        results[args.log] = check_log(args.log, load_hex(args.program))
+    for path in args.programs or ([] if args.log else ['program.hex']):
+        results[path] = check_program(path, args.cycles, args.timeout)
+
+    failed = 0
+    for name, checker in results.items():
+        print(format_report(name, checker))
+        print()
+        failed += checker.mismatch is not None
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
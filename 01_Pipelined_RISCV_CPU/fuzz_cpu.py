@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Coverage-guided Instruction Fuzzer for the Pipelined RISC-V CPU
+Mutates RV32I programs, runs them on the RTL and measures functional
+coverage from the per-cycle trace (sim_trace.py):
+
+  fwd      fwd_a_sel x fwd_b_sel for each instruction class in EX
+  hazard   stall_if/stall_id/flush_ex patterns over three cycles
+  branch   branch/jump kind x outcome x forwarding of its operands
+  pairs    instruction class pairs at distance 1-4, with and without a
+           read-after-write dependence between them
+
+Programs that add coverage join the corpus. Batches of mutants run in
+parallel and the corpus and coverage bitmap are persisted after every
+batch, so a run can be stopped and resumed at any time.
+
+Mutations keep generate_random.py's invariants (forward-only control
+flow, x0-relative memory accesses, the trailing halt), so every mutant
+terminates on the ISS. Every mutant also goes through
+avoid_load_use_hang(): a load whose rd matches a register field of the
+next word hangs hazard_unit.v, so load-use stalls are never exercised
+(see generate_random.py). On the RTL, mutants without jal/jalr reach the
+halt. --check replays each program in lockstep with the ISS
+(commit_check.py), which stops at the ISS halt; fuzz with
+--mix jal=0,jalr=0 there, or the known jump divergences fill failures/.
+Programs given with --import are run as they are.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from generate_random import (ALU_IMM, ALU_REG, AUIPC, BRANCH, CLASS_NAMES, JAL, JALR, LOAD,
+                             LUI, STORE, avoid_load_use_hang, generate, hex_bytes, parse_mix)
+from commit_check import check_program, format_report
+from riscv_iss import NOP, RV32ISim, cycle_budget, load_hex
+from sim_trace import StreamingSim
+
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools')
+
+OPCODE_CLASS = {0x33: ALU_REG, 0x13: ALU_IMM, 0x03: LOAD, 0x23: STORE, 0x63: BRANCH,
+                0x6F: JAL, 0x67: JALR, 0x37: LUI, 0x17: AUIPC}
+CONTROL = (BRANCH, JAL, JALR)
+NCLS = len(CLASS_NAMES)
+
+# Branch kinds: the six B-type funct3 values, then jal and jalr
+BRANCH_KINDS = ['beq', 'bne', 'blt', 'bge', 'bltu', 'bgeu', 'jal', 'jalr']
+BRANCH_KIND = {0: 0, 1: 1, 4: 2, 5: 3, 6: 4, 7: 5}
+FWD_VALUES = 3          # FWD_NONE, FWD_EX_MEM, FWD_MEM_WB
+HAZARD_WINDOW = 3       # cycles per stall/flush pattern
+MAX_DISTANCE = 4        # opcode pairs up to this many instructions apart
+
+# Coverage map layout: (name, size), packed back to back
+SPACES = [
+    ('fwd', NCLS * FWD_VALUES * FWD_VALUES),
+    ('hazard', 8 ** HAZARD_WINDOW),
+    ('branch', len(BRANCH_KINDS) * 2 * FWD_VALUES * FWD_VALUES),
+    ('pairs', MAX_DISTANCE * NCLS * NCLS * 2),
+]
+OFFSET = {}
+MAP_SIZE = 0
+for _name, _size in SPACES:
+    OFFSET[_name] = MAP_SIZE
+    MAP_SIZE += _size
+
+
+# ----------------------------------------------------------------------------
+# Instruction fields
+# ----------------------------------------------------------------------------
+
+def instr_class(word):
+    return OPCODE_CLASS.get(word & 0x7F, ALU_IMM)
+
+
+def sources(word, cls):
+    """Registers an instruction actually reads"""
+    rs1, rs2 = (word >> 15) & 0x1F, (word >> 20) & 0x1F
+    if cls in (ALU_REG, BRANCH, STORE):
+        return (rs1, rs2)
+    if cls in (ALU_IMM, LOAD, JALR):
+        return (rs1,)
+    return ()
+
+
+def dest(word, cls):
+    return (word >> 7) & 0x1F if cls not in (STORE, BRANCH) else 0
+
+
+def set_field(word, shift, value):
+    return (word & ~(0x1F << shift) & 0xFFFFFFFF) | ((value & 0x1F) << shift)
+
+
+# ----------------------------------------------------------------------------
+# Coverage
+# ----------------------------------------------------------------------------
+
+class Coverage:
+    """Turns CycleRecords of one run into coverage point indices"""
+
+    def __init__(self, words):
+        self.words = list(words)
+        self.hits = set()
+        self._hazard = 0
+        self.cycles = 0
+        self._retired = []      # (class, rd) of the last MAX_DISTANCE instructions
+
+    def word_at(self, pc):
+        index = (pc >> 2) & 0xFF
+        return self.words[index] if index < len(self.words) else NOP
+
+    def feed(self, r):
+        hits = self.hits
+        self.cycles += 1
+        state = bool(r.stall_if) | (bool(r.stall_id) << 1) | (bool(r.flush_ex) << 2)
+        self._hazard = ((self._hazard << 3) | state) & (8 ** HAZARD_WINDOW - 1)
+        if self.cycles >= HAZARD_WINDOW:
+            hits.add(OFFSET['hazard'] + self._hazard)
+
+        if not r.id_valid or r.flush_ex or r.id_pc is None:
+            return
+        word = self.word_at(r.id_pc)
+        cls = instr_class(word)
+        fa = r.fwd_a if r.fwd_a is not None and r.fwd_a < FWD_VALUES else 0
+        fb = r.fwd_b if r.fwd_b is not None and r.fwd_b < FWD_VALUES else 0
+        hits.add(OFFSET['fwd'] + (cls * FWD_VALUES + fa) * FWD_VALUES + fb)
+
+        if cls in CONTROL:
+            if cls == BRANCH:
+                kind = BRANCH_KIND.get((word >> 12) & 0x7)
+            else:
+                kind = 6 if cls == JAL else 7
+            if kind is not None:
+                outcome = kind * 2 + (1 if r.branch_taken else 0)
+                hits.add(OFFSET['branch'] + (outcome * FWD_VALUES + fa) * FWD_VALUES + fb)
+
+        srcs = sources(word, cls)
+        for d, (pcls, prd) in enumerate(reversed(self._retired), start=1):
+            raw = 1 if prd and prd in srcs else 0
+            hits.add(OFFSET['pairs'] + (((d - 1) * NCLS + pcls) * NCLS + cls) * 2 + raw)
+        self._retired.append((cls, dest(word, cls)))
+        if len(self._retired) > MAX_DISTANCE:
+            self._retired.pop(0)
+
+
+def describe(point):
+    """Human-readable name of a coverage point"""
+    for name, size in reversed(SPACES):
+        if point >= OFFSET[name]:
+            i = point - OFFSET[name]
+            break
+    if name == 'fwd':
+        cls, rest = divmod(i, FWD_VALUES * FWD_VALUES)
+        return f"fwd {CLASS_NAMES[cls]} A={rest // FWD_VALUES} B={rest % FWD_VALUES}"
+    if name == 'hazard':
+        states = [(i >> (3 * k)) & 7 for k in reversed(range(HAZARD_WINDOW))]
+        text = ' -> '.join('+'.join(n for bit, n in ((1, 'stall_if'), (2, 'stall_id'),
+                                                      (4, 'flush_ex')) if s & bit) or 'run'
+                           for s in states)
+        return f"hazard {text}"
+    if name == 'branch':
+        kt, rest = divmod(i, FWD_VALUES * FWD_VALUES)
+        kind, taken = divmod(kt, 2)
+        return (f"branch {BRANCH_KINDS[kind]} {'taken' if taken else 'not taken'} "
+                f"A={rest // FWD_VALUES} B={rest % FWD_VALUES}")
+    rest, raw = divmod(i, 2)
+    rest, cls = divmod(rest, NCLS)
+    d, pcls = divmod(rest, NCLS)
+    return f"pair {CLASS_NAMES[pcls]} -> {CLASS_NAMES[cls]} d={d + 1}{' RAW' if raw else ''}"
+
+
+def space_counts(bitmap):
+    return {name: (int(bitmap[OFFSET[name]:OFFSET[name] + size].sum()), size)
+            for name, size in SPACES}
+
+
+# ----------------------------------------------------------------------------
+# Mutation
+# ----------------------------------------------------------------------------
+
+def mutate(words, rng, corpus, mix=None):
+    """Return a mutated copy of a program (uint32 array ending in the halt)"""
+    words = words.copy()
+    n = len(words) - 1                  # never touch the halt
+    for _ in range(1 + rng.geometric(0.5)):
+        op = rng.integers(6)
+        p = int(rng.integers(n))
+        if op == 0:
+            # Fresh instructions at the same positions keep their invariants
+            donor = generate(1, len(words), int(rng.integers(1 << 31)), mix)[0]
+            q = min(p + int(rng.integers(1, 5)), n)
+            words[p:q] = donor[p:q]
+        elif op == 1:
+            # Crossover with a same-length corpus program over a range
+            mates = [w for w in corpus if len(w) == len(words)]
+            if mates:
+                mate = mates[int(rng.integers(len(mates)))]
+                q = int(rng.integers(p, n + 1))
+                words[p:q] = mate[p:q]
+        elif op == 2:
+            # Copy an instruction to an earlier slot: its targets stay forward
+            if p:
+                words[int(rng.integers(p))] = words[p]
+        elif op == 3:
+            # Swap two neighbouring straight-line instructions
+            if p + 1 < n and not ({instr_class(int(words[p])), instr_class(int(words[p + 1]))}
+                                  & set(CONTROL)):
+                words[p], words[p + 1] = words[p + 1], words[p]
+        elif op == 4:
+            # Make a source read the result of an instruction 1-4 slots back
+            word = int(words[p])
+            cls = instr_class(word)
+            shifts = [s for s, ok in ((15, cls in (ALU_REG, ALU_IMM, BRANCH)),
+                                      (20, cls in (ALU_REG, BRANCH, STORE))) if ok]
+            producer = p - int(rng.integers(1, MAX_DISTANCE + 1))
+            if shifts and producer >= 0:
+                pword = int(words[producer])
+                rd = dest(pword, instr_class(pword))
+                if rd:
+                    words[p] = set_field(word, shifts[int(rng.integers(len(shifts)))], rd)
+        else:
+            # New destination register
+            word = int(words[p])
+            if dest(word, instr_class(word)):
+                words[p] = set_field(word, 7, int(rng.integers(1, 32)))
+    # Swaps, copies and new fields can put a matching word behind a load
+    return avoid_load_use_hang(words)
+
+
+# ----------------------------------------------------------------------------
+# Corpus state
+# ----------------------------------------------------------------------------
+
+def program_id(words):
+    return hashlib.sha256(np.asarray(words, dtype=np.uint32).tobytes()).hexdigest()[:16]
+
+
+class FuzzState:
+    """Corpus, coverage bitmap and counters kept in one directory
+
+        <dir>/corpus/<id>.hex    programs that added coverage
+        <dir>/failures/<id>.hex  programs whose RTL result differs from the ISS
+        <dir>/coverage.npy       hit bitmap (one byte per coverage point)
+        <dir>/state.json         per-entry metadata and run totals
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.corpus_dir = os.path.join(path, 'corpus')
+        self.failure_dir = os.path.join(path, 'failures')
+        os.makedirs(self.corpus_dir, exist_ok=True)
+        bitmap = os.path.join(path, 'coverage.npy')
+        self.bitmap = np.load(bitmap) if os.path.isfile(bitmap) else np.zeros(MAP_SIZE, np.uint8)
+        if len(self.bitmap) != MAP_SIZE:
+            raise ValueError(f"{bitmap}: coverage map layout changed, start a new directory")
+        state = os.path.join(path, 'state.json')
+        if os.path.isfile(state):
+            with open(state) as f:
+                self.meta = json.load(f)
+        else:
+            self.meta = {'execs': 0, 'cpu_seconds': 0.0, 'failures': 0, 'entries': {}}
+        self.corpus = {}
+        for name in sorted(self.meta['entries']):
+            self.corpus[name] = np.array(load_hex(os.path.join(self.corpus_dir, name + '.hex')),
+                                         dtype=np.uint32)
+
+    def merge(self, words, hits):
+        """Add a run's hits; keeps the program if it covered anything new"""
+        hits = np.asarray(hits, dtype=np.int64)
+        new = int((self.bitmap[hits] == 0).sum()) if len(hits) else 0
+        if not new:
+            return 0
+        self.bitmap[hits] = 1
+        name = program_id(words)
+        if name not in self.corpus:
+            with open(os.path.join(self.corpus_dir, name + '.hex'), 'wb') as f:
+                f.write(hex_bytes(words))
+            self.corpus[name] = words
+            self.meta['entries'][name] = {'new': new, 'picked': 0, 'added': self.meta['execs']}
+        return new
+
+    def add_failure(self, words, reason):
+        os.makedirs(self.failure_dir, exist_ok=True)
+        name = program_id(words)
+        with open(os.path.join(self.failure_dir, name + '.hex'), 'wb') as f:
+            f.write(hex_bytes(words))
+        with open(os.path.join(self.failure_dir, name + '.txt'), 'w') as f:
+            f.write(reason + '\n')
+        self.meta['failures'] += 1
+
+    def pick(self, rng):
+        """Parent for the next mutant: recent and rarely picked entries first"""
+        names = list(self.corpus)
+        entries = self.meta['entries']
+        weights = np.array([entries[n]['new'] / (1 + entries[n]['picked']) for n in names], float)
+        name = names[int(rng.choice(len(names), p=weights / weights.sum()))]
+        entries[name]['picked'] += 1
+        return self.corpus[name]
+
+    def save(self):
+        fd, tmp = tempfile.mkstemp(suffix='.npy', dir=self.path)
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, self.bitmap)
+        os.replace(tmp, os.path.join(self.path, 'coverage.npy'))
+        fd, tmp = tempfile.mkstemp(suffix='.json', dir=self.path)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.meta, f, indent=1)
+        os.replace(tmp, os.path.join(self.path, 'state.json'))
+
+
+# ----------------------------------------------------------------------------
+# Execution
+# ----------------------------------------------------------------------------
+
+def _run_job(binary, words, timeout, check):
+    """Run one program on the RTL; returns (hit indices, cycles, failure reason)"""
+    words = [int(w) for w in words]
+    instret = RV32ISim(words).run()
+    fd, hexfile = tempfile.mkstemp(suffix='.hex')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(hex_bytes(words))
+    reason = None
+    try:
+        with tempfile.TemporaryDirectory(prefix='fuzz-cpu-') as scratch:
+            sim = StreamingSim(['vvp', '-n', binary, f"+program={hexfile}",
+                                f"+cycles={cycle_budget(instret)}", '+novcd'],
+                               cwd=scratch, timeout=timeout)
+            cov = Coverage(words)
+            for record in sim:
+                cov.feed(record)
+        if sim.timed_out:
+            reason = f"timed out after {timeout}s"
+        elif check:
+            # Final registers are meaningless if the RTL ran past the halt;
+            # the lockstep check compares retirements up to the ISS halt
+            checker = check_program(hexfile, timeout=timeout)
+            if checker.mismatch:
+                reason = format_report(program_id(words), checker)
+    finally:
+        os.unlink(hexfile)
+    return np.fromiter(cov.hits, dtype=np.int64), cov.cycles, reason
+
+
+def fuzz(state, workers, batch, max_time=None, max_execs=None, length=64, seed=None,
+         mix=None, timeout=60, check=False, imports=()):
+    sys.path.insert(0, TOOLS_DIR)
+    from sim_cache import compile_project
+    from sim_projects import find_project
+
+    binary = compile_project(find_project('01'))
+    rng = np.random.default_rng(seed)
+    pending = [np.array(load_hex(path), dtype=np.uint32) for path in imports]
+    if not state.corpus:
+        pending += list(generate(batch, length, seed, mix))
+    start = time.perf_counter()
+    execs = 0
+
+    print("=" * 80)
+    print(f"CPU FUZZER - {len(state.corpus)} corpus entries, {workers} workers, "
+          f"{MAP_SIZE} coverage points")
+    print("=" * 80)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            elapsed = time.perf_counter() - start
+            if (max_time and elapsed >= max_time) or (max_execs and execs >= max_execs):
+                break
+            candidates = pending or [mutate(state.pick(rng), rng, list(state.corpus.values()), mix)
+                                     for _ in range(batch)]
+            pending = []
+            t0 = time.perf_counter()
+            futures = [pool.submit(_run_job, binary, words, timeout, check) for words in candidates]
+            new_bits = added = 0
+            for words, future in zip(candidates, futures):
+                hits, _, reason = future.result()
+                before = len(state.corpus)
+                new_bits += state.merge(words, hits)
+                added += len(state.corpus) - before
+                if reason:
+                    state.add_failure(words, reason)
+            execs += len(candidates)
+            state.meta['execs'] += len(candidates)
+            state.meta['cpu_seconds'] += (time.perf_counter() - t0) * workers
+            state.save()
+
+            covered = int(state.bitmap.sum())
+            rate = execs / max(time.perf_counter() - start, 1e-9)
+            print(f"execs {state.meta['execs']:8d}  {rate:7.1f}/s  corpus {len(state.corpus):5d} "
+                  f"(+{added})  coverage {covered}/{MAP_SIZE} (+{new_bits})  "
+                  f"failures {state.meta['failures']}", flush=True)
+            if not state.corpus:
+                raise RuntimeError("no run produced coverage; check the simulator output")
+    return execs
+
+
+# ----------------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------------
+
+def print_report(state, missing=False):
+    print("=" * 80)
+    print(f"CPU FUZZER COVERAGE - {state.path}")
+    print("=" * 80)
+    print(f"Executions:  {state.meta['execs']} ({state.meta['cpu_seconds'] / 3600:.2f} CPU hours)")
+    print(f"Corpus:      {len(state.corpus)} programs")
+    print(f"Failures:    {state.meta['failures']}")
+    total = 0
+    for name, (hit, size) in space_counts(state.bitmap).items():
+        total += hit
+        print(f"  {name:8s} {hit:6d} / {size:<6d} ({hit / size:6.1%})")
+    print(f"  {'total':8s} {total:6d} / {MAP_SIZE:<6d} ({total / MAP_SIZE:6.1%})")
+    print("(the hazard and pair spaces include combinations this pipeline cannot produce)")
+    if missing:
+        print()
+        print("Uncovered points:")
+        for point in np.flatnonzero(state.bitmap == 0):
+            print(f"  {describe(int(point))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coverage-guided fuzzing of the pipelined CPU")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p = sub.add_parser('run', help="fuzz, adding to the corpus in DIR")
+    p.add_argument('dir', help="corpus / coverage directory (created if missing)")
+    p.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+    p.add_argument('-b', '--batch', type=int, help="programs per batch (default: 4 per worker)")
+    p.add_argument('-t', '--time', type=float, help="stop after this many seconds")
+    p.add_argument('-n', '--execs', type=int, help="stop after this many executions")
+    p.add_argument('-l', '--length', type=int, default=64, help="words per seed program")
+    p.add_argument('-s', '--seed', type=int)
+    p.add_argument('--mix', type=parse_mix, help="class weights for seeds and fresh instructions")
+    p.add_argument('--import', dest='imports', nargs='*', default=[],
+                   help="program.hex files to try first")
+    p.add_argument('--check', action='store_true',
+                   help="check each program in lockstep with the ISS and keep failing ones")
+    p.add_argument('--timeout', type=int, default=60, help="seconds per simulation")
+
+    p = sub.add_parser('report', help="coverage summary of DIR")
+    p.add_argument('dir')
+    p.add_argument('--missing', action='store_true', help="list uncovered points")
+    args = parser.parse_args()
+
+    if args.cmd == 'report':
+        print_report(FuzzState(args.dir), args.missing)
+        return 0
+
+    if not args.time and not args.execs:
+        parser.error("give a budget with --time and/or --execs")
+    state = FuzzState(args.dir)
+    try:
+        fuzz(state, args.jobs, args.batch or 4 * args.jobs, args.time, args.execs, args.length,
+             args.seed, args.mix, args.timeout, args.check, args.imports)
+    except KeyboardInterrupt:
+        state.save()
+        print("\nInterrupted; corpus and coverage saved")
+    print()
+    print_report(state)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Constrained-random RV32I Program Generator
+Builds whole batches of programs as NumPy field arrays (opcode class, rd,
+rs1, rs2, funct3, immediate) and packs them into instruction words with the
+same bit layout as encode_rtype/encode_itype in generate_test*.py, plus the
+S/B/U/J formats. Knobs control the opcode mix, register-reuse distance (to
+stress forwarding_unit.v), load-use density (ISS and models only, see below) and
+branch density.
+
+Branches and jumps only go forward, loads/stores use x0-relative
+addresses inside the 1KB data memory and the last word is `beq x0, x0, 0`,
+a PC-relative self-loop in both the ISS and the RTL.
+
+The RTL diverges from the ISA in two ways:
+  - Load-use hang: hazard_unit.v compares the rd of a load with bits
+    [19:15] and [24:20] of the next word, whatever its format, and on a
+    match holds the load in ID/EX while flushing EX every cycle, so the
+    load never advances. Immediates and other fields match by accident,
+    so by default the rd of such a load is renamed (load_use_hazards /
+    avoid_load_use_hang) and there are no load-use pairs at all; --iss-only
+    allows them (and --load-use) for the ISS and the models.
+  - Jumps: execute.v computes the jal target as rs1 + imm rather than
+    PC + imm, and a taken jal/jalr leaves the pipeline in EX without
+    writing its link register, so use --mix jal=0,jalr=0 as well when
+    comparing against the RTL.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from riscv_iss import (IMEM_WORDS, DMEM_BYTES, disassemble, encode_btype, encode_itype,
+                       encode_jtype, encode_rtype, encode_stype, encode_utype)
+
+# Instruction classes
+ALU_REG, ALU_IMM, LOAD, STORE, BRANCH, JAL, JALR, LUI, AUIPC = range(9)
+CLASS_NAMES = ['alu_reg', 'alu_imm', 'load', 'store', 'branch', 'jal', 'jalr', 'lui', 'auipc']
+WRITES_RD = np.array([True, True, True, False, False, True, True, True, True])
+
+DEFAULT_MIX = {
+    'alu_reg': 10, 'alu_imm': 8, 'load': 3, 'store': 2, 'branch': 2,
+    'jal': 0.5, 'jalr': 0.5, 'lui': 1, 'auipc': 0.5,
+}
+
+HALT = 0x00000063  # beq x0, x0, 0
+
+# (funct3, funct7) pairs for OP_REG and funct3 for the other formats
+REG_FUNCTS = np.array([(0, 0x00), (0, 0x20), (1, 0), (2, 0), (3, 0),
+                       (4, 0), (5, 0x00), (5, 0x20), (6, 0), (7, 0)])
+IMM_FUNCT3 = np.array([0, 2, 3, 4, 6, 7, 1, 5])
+LOAD_FUNCT3 = np.array([0, 1, 2, 4, 5])
+LOAD_WIDTH = np.array([1, 2, 4, 0, 1, 2, 0, 0])    # indexed by funct3
+STORE_FUNCT3 = np.array([0, 1, 2])
+BRANCH_FUNCT3 = np.array([0, 1, 4, 5, 6, 7])
+
+HEX_DIGITS = np.frombuffer(b'0123456789ABCDEF', dtype=np.uint8)
+
+
+def class_weights(mix=None, load_density=None, branch_density=None):
+    """Probability of each instruction class
+
+    load_density / branch_density pin the share of loads / branches and
+    the remaining classes share what is left in proportion to the mix.
+    """
+    mix = dict(DEFAULT_MIX, **(mix or {}))
+    weights = np.array([float(mix[name]) for name in CLASS_NAMES])
+    pinned = {}
+    if load_density is not None:
+        pinned[LOAD] = load_density
+    if branch_density is not None:
+        pinned[BRANCH] = branch_density
+    free = [c for c in range(len(CLASS_NAMES)) if c not in pinned]
+    rest = 1.0 - sum(pinned.values())
+    if rest < 0:
+        raise ValueError("load_density + branch_density exceeds 1")
+    total = weights[free].sum()
+    probs = np.zeros(len(CLASS_NAMES))
+    if total > 0:
+        probs[free] = weights[free] / total * rest
+    for c, p in pinned.items():
+        probs[c] = p
+    return probs / probs.sum()
+
+
+def load_use_hazards(words):
+    """Mask of the loads that hang hazard_unit.v
+
+    A load hangs the RTL when its rd is nonzero and equals bits [19:15] or
+    [24:20] of the word behind it. words is (..., length); the word after
+    the last one is taken as 0.
+    """
+    words = np.asarray(words, dtype=np.uint32)
+    rd = (words >> 7) & 0x1F
+    after = np.zeros_like(words)
+    after[..., :-1] = words[..., 1:]
+    return (((words & 0x7F) == 0x03) & (rd != 0)
+            & ((rd == ((after >> 15) & 0x1F)) | (rd == ((after >> 20) & 0x1F))))
+
+
+def avoid_load_use_hang(words, num_regs=31):
+    """Rename the rd of every hanging load to one the next word does not match
+
+    Works in place on a uint32 array and returns it. A load's own bits
+    [24:15] do not contain its rd, so one pass is enough; with fewer than
+    three registers the load may end up writing x0.
+    """
+    hazard = load_use_hazards(words)
+    if not hazard.any():
+        return words
+    after = np.zeros_like(words)
+    after[..., :-1] = words[..., 1:]
+    f1, f2 = (after >> 15) & 0x1F, (after >> 20) & 0x1F
+    rd = ((words >> 7) & 0x1F).astype(np.int64)
+    for _ in range(2):
+        rd = np.where((rd == f1) | (rd == f2), rd % num_regs + 1, rd)
+    rd = np.where((rd == f1) | (rd == f2), 0, rd)
+    words[hazard] = (words[hazard] & np.uint32(~(0x1F << 7) & 0xFFFFFFFF)) \
+        | (rd[hazard].astype(np.uint32) << 7)
+    return words
+
+
+def generate(count=1, length=IMEM_WORDS, seed=None, mix=None, num_regs=31,
+             reuse=0.5, max_distance=3, load_use=0.0, load_density=None,
+             branch_density=None, branch_span=8, rtl_safe=True):
+    """Generate a (count, length) uint32 array of programs
+
+    reuse:        probability a source register is the destination of one
+                  of the previous max_distance instructions
+    load_use:     probability the instruction after a load reads its rd
+                  (needs rtl_safe=False: every such pair hangs the RTL)
+    branch_span:  maximum forward distance of branches/jumps, in instructions
+    rtl_safe:     rename loads that would hang hazard_unit.v
+    """
+    if not 2 <= length <= IMEM_WORDS:
+        raise ValueError(f"length must be in [2, {IMEM_WORDS}]")
+    if rtl_safe and load_use:
+        raise ValueError("load-use pairs hang the RTL (hazard_unit.v); use rtl_safe=False")
+    rng = np.random.default_rng(seed)
+    n = length - 1                      # last word is the halt
+    shape = (count, n)
+    pos = np.broadcast_to(np.arange(n), shape)
+
+    cls = rng.choice(len(CLASS_NAMES), size=shape, p=class_weights(mix, load_density, branch_density))
+    writes = WRITES_RD[cls]
+
+    rd = rng.integers(1, num_regs + 1, size=shape)
+    rs1 = rng.integers(0, num_regs + 1, size=shape)
+    rs2 = rng.integers(0, num_regs + 1, size=shape)
+    dst = np.where(writes, rd, 0)
+
+    # Register reuse at a bounded distance: read what an earlier writer produced
+    for src in (rs1, rs2):
+        dist = rng.integers(1, max_distance + 1, size=shape)
+        j = pos - dist
+        producer = np.take_along_axis(dst, np.maximum(j, 0), axis=1)
+        take = (rng.random(shape) < reuse) & (j >= 0) & (producer > 0)
+        src[take] = producer[take]
+
+    # Load-use pairs: the next instruction reads the loaded register
+    after_load = np.zeros(shape, dtype=bool)
+    after_load[:, 1:] = (cls[:, :-1] == LOAD) & (rng.random((count, n - 1)) < load_use)
+    prev_rd = np.zeros(shape, dtype=np.int64)
+    prev_rd[:, 1:] = rd[:, :-1]
+    uses_rs2 = np.isin(cls, (STORE, BRANCH, ALU_REG))
+    uses_rs1 = np.isin(cls, (ALU_REG, ALU_IMM, BRANCH))
+    rs1 = np.where(after_load & uses_rs1, prev_rd, rs1)
+    rs2 = np.where(after_load & ~uses_rs1 & uses_rs2, prev_rd, rs2)
+
+    # Memory ops are x0-relative so every address is known to be in range
+    rs1 = np.where(np.isin(cls, (LOAD, STORE, JAL, JALR, LUI, AUIPC)), 0, rs1)
+
+    # Forward control-flow targets, never past the halt instruction
+    remaining = n - pos
+    span = np.minimum(remaining, branch_span)
+    skip = 1 + (rng.random(shape) * span).astype(np.int64)
+    offset = skip * 4
+
+    reg_f = REG_FUNCTS[rng.integers(0, len(REG_FUNCTS), size=shape)]
+    imm_f3 = IMM_FUNCT3[rng.integers(0, len(IMM_FUNCT3), size=shape)]
+    ld_f3 = LOAD_FUNCT3[rng.integers(0, len(LOAD_FUNCT3), size=shape)]
+    st_f3 = STORE_FUNCT3[rng.integers(0, len(STORE_FUNCT3), size=shape)]
+    br_f3 = BRANCH_FUNCT3[rng.integers(0, len(BRANCH_FUNCT3), size=shape)]
+
+    imm12 = rng.integers(-2048, 2048, size=shape)
+    shamt = rng.integers(0, 32, size=shape)
+    shift_imm = shamt | np.where(rng.random(shape) < 0.5, 0x400, 0)
+    imm12 = np.where((imm_f3 == 1), shamt, np.where(imm_f3 == 5, shift_imm, imm12))
+
+    ld_w = LOAD_WIDTH[ld_f3]
+    st_w = LOAD_WIDTH[st_f3]
+    ld_off = (rng.random(shape) * (DMEM_BYTES // ld_w)).astype(np.int64) * ld_w
+    st_off = (rng.random(shape) * (DMEM_BYTES // st_w)).astype(np.int64) * st_w
+    imm20 = rng.integers(0, 1 << 20, size=shape)
+
+    words = np.select(
+        [cls == ALU_REG, cls == ALU_IMM, cls == LOAD, cls == STORE,
+         cls == BRANCH, cls == JAL, cls == JALR, cls == LUI],
+        [encode_rtype(0x33, rd, reg_f[..., 0], rs1, rs2, reg_f[..., 1]),
+         encode_itype(0x13, rd, imm_f3, rs1, imm12),
+         encode_itype(0x03, rd, ld_f3, 0, ld_off),
+         encode_stype(0x23, st_f3, 0, rs2, st_off),
+         encode_btype(0x63, br_f3, rs1, rs2, offset),
+         encode_jtype(0x6F, rd, offset),
+         encode_itype(0x67, rd, 0, 0, (pos + skip) * 4),
+         encode_utype(0x37, rd, imm20)],
+        default=encode_utype(0x17, rd, imm20))
+
+    programs = np.empty((count, length), dtype=np.uint32)
+    programs[:, :n] = words
+    programs[:, n] = HALT
+    if rtl_safe:
+        avoid_load_use_hang(programs, num_regs)
+    return programs
+
+
+def hex_bytes(words):
+    """program.hex contents for a 1-D word array, formatted in bulk"""
+    words = np.asarray(words, dtype=np.uint32)
+    shifts = np.arange(28, -1, -4, dtype=np.uint32)
+    out = np.empty((len(words), 9), dtype=np.uint8)
+    out[:, :8] = HEX_DIGITS[(words[:, None] >> shifts) & 0xF]
+    out[:, 8] = ord('\n')
+    return out.tobytes()
+
+
+def listing_text(words, title="RANDOM PROGRAM - INSTRUCTION LIST"):
+    """instructions.txt contents, same layout as generate_test3.py"""
+    lines = ["=" * 80, title, "=" * 80, "", "-" * 80]
+    lines.extend(f"{i:3d}: {int(w):08X}  {disassemble(int(w))}" for i, w in enumerate(words))
+    lines += ["", "=" * 80, f"Total: {len(words)} instructions", "=" * 80, ""]
+    return '\n'.join(lines)
+
+
+def parse_mix(text):
+    mix = {}
+    for item in filter(None, (text or '').split(',')):
+        name, value = item.split('=')
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown class '{name}' (use {', '.join(CLASS_NAMES)})")
+        mix[name] = float(value)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Constrained-random RV32I program generator")
+    parser.add_argument('-n', '--count', type=int, default=1, help="number of programs")
+    parser.add_argument('-l', '--length', type=int, default=IMEM_WORDS,
+                        help=f"words per program, including the halt (max {IMEM_WORDS})")
+    parser.add_argument('-s', '--seed', type=int)
+    parser.add_argument('-o', '--out-dir', help="write prog_NNNNNN.hex files here (default "
+                        "for -n 1: program.hex + instructions.txt in the current directory)")
+    parser.add_argument('--listing', action='store_true', help="also write .txt listings")
+    parser.add_argument('--mix', type=parse_mix, help="class weights, e.g. alu_reg=4,load=2,jal=0")
+    parser.add_argument('--regs', type=int, default=31, help="use only x1..xN as destinations")
+    parser.add_argument('--reuse', type=float, default=0.5)
+    parser.add_argument('--max-distance', type=int, default=3)
+    parser.add_argument('--load-use', type=float, default=0.0,
+                        help="load-use pair probability (needs --iss-only)")
+    parser.add_argument('--load-density', type=float)
+    parser.add_argument('--branch-density', type=float)
+    parser.add_argument('--branch-span', type=int, default=8)
+    parser.add_argument('--iss-only', action='store_true',
+                        help="allow loads whose next word hangs the RTL's hazard unit")
+    args = parser.parse_args()
+    if args.load_use and not args.iss_only:
+        parser.error("--load-use pairs hang the RTL's hazard unit; add --iss-only")
+
+    start = time.perf_counter()
+    programs = generate(args.count, args.length, args.seed, args.mix, args.regs, args.reuse,
+                        args.max_distance, args.load_use, args.load_density,
+                        args.branch_density, args.branch_span, not args.iss_only)
+    gen_time = time.perf_counter() - start
+
+    if args.out_dir is None and args.count == 1:
+        with open('program.hex', 'wb') as f:
+            f.write(hex_bytes(programs[0]))
+        with open('instructions.txt', 'w') as f:
+            f.write(listing_text(programs[0]))
+        print(f"✓ Generated {args.length} instructions")
+        print("✓ Created program.hex")
+        print("✓ Created instructions.txt")
+        return 0
+
+    out_dir = args.out_dir or 'random_programs'
+    os.makedirs(out_dir, exist_ok=True)
+    for i, words in enumerate(programs):
+        base = os.path.join(out_dir, f"prog_{i:06d}")
+        with open(base + '.hex', 'wb') as f:
+            f.write(hex_bytes(words))
+        if args.listing:
+            with open(base + '.txt', 'w') as f:
+                f.write(listing_text(words, f"RANDOM PROGRAM {i} - INSTRUCTION LIST"))
+    total = time.perf_counter() - start
+
+    n_instr = programs.size
+    print(f"✓ Generated {args.count} programs, {n_instr} instructions "
+          f"({n_instr / gen_time / 1e6:.1f}M instr/s)")
+    print(f"✓ Wrote {out_dir}/ in {total:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
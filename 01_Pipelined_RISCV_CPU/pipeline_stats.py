@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Pipeline Performance Analytics for the 5-stage RISC-V CPU
+Aggregates the per-cycle trace (see sim_trace.py) into performance
+counters: retired instructions, cycles, CPI, stall cycles by cause,
+flushes, forwarding-path usage and branch penalty cycles. Emits a text
+report and a JSON summary tagged with the git commit, so the effect of
+hazard_unit.v / forwarding_unit.v changes can be tracked over time.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from riscv_iss import RV32ISim, cycle_budget, load_hex
+from sim_trace import StreamingSim, parse_lines
+
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools')
+
+# Forwarding mux selections (rtl/riscv_pkg.v)
+FWD_NONE = 0b00
+FWD_EX_MEM = 0b01
+FWD_MEM_WB = 0b10
+
+# Cycles lost per taken branch/jump: the IF bubble plus the flushed ID/EX
+BRANCH_PENALTY = 2
+# Cycles before the first instruction reaches WB
+PIPELINE_FILL = 4
+
+
+def collect_stats(records, end_pc=None):
+    """Aggregate CycleRecords into a counter dict
+
+    An instruction is counted when it leaves EX: the ID/EX register is
+    valid and not being flushed by a load-use bubble. Taken branches and
+    jumps are counted too, even though execute.v drops their valid bit on
+    the way to MEM. If end_pc is given, only instructions below it count
+    and the window ends when the last of them reaches WB, so the NOP fill
+    after the program does not dilute CPI.
+    """
+    cycles = 0
+    last_cycle = -1
+    retired = 0
+    load_use_stalls = 0
+    taken = 0
+    fwd = {'a': {'ex_mem': 0, 'mem_wb': 0}, 'b': {'ex_mem': 0, 'mem_wb': 0}}
+
+    for r in records:
+        cycles += 1
+        # stall_if, stall_id and flush_ex are all load_use_hazard: one bubble
+        if r.stall_if:
+            load_use_stalls += 1
+
+        in_program = end_pc is None or (r.id_pc is not None and r.id_pc < end_pc)
+        if r.id_valid and not r.flush_ex and in_program:
+            retired += 1
+            last_cycle = r.cycle
+            if r.branch_taken:
+                taken += 1
+            for operand, sel in (('a', r.fwd_a), ('b', r.fwd_b)):
+                if sel == FWD_EX_MEM:
+                    fwd[operand]['ex_mem'] += 1
+                elif sel == FWD_MEM_WB:
+                    fwd[operand]['mem_wb'] += 1
+
+    if end_pc is not None and last_cycle >= 0:
+        # EX -> MEM -> WB: the last instruction retires two cycles later
+        cycles = last_cycle + 3
+
+    branch_penalty = taken * BRANCH_PENALTY
+    accounted = PIPELINE_FILL + load_use_stalls + branch_penalty
+    return {
+        'cycles': cycles,
+        'retired': retired,
+        'cpi': round(cycles / retired, 4) if retired else None,
+        'ipc': round(retired / cycles, 4) if cycles else None,
+        'stall_cycles': {
+            'load_use': load_use_stalls,
+            'branch': branch_penalty,
+            'fill': PIPELINE_FILL,
+            'other': max(cycles - retired - accounted, 0),
+        },
+        'flushes': {
+            'branch': taken,
+        },
+        'forwarding': {
+            'ex_to_ex': fwd['a']['ex_mem'] + fwd['b']['ex_mem'],
+            'mem_to_ex': fwd['a']['mem_wb'] + fwd['b']['mem_wb'],
+            'operand_a': fwd['a'],
+            'operand_b': fwd['b'],
+        },
+        'branches': {
+            'taken': taken,
+            'penalty_cycles': branch_penalty,
+        },
+    }
+
+
+def stats_from_log(path, end_pc=None):
+    with open(path) as f:
+        return collect_stats(parse_lines(f), end_pc)
+
+
+def stats_from_program(hexfile, cycles=None, timeout=120):
+    """Run one program on the cached RTL simulator and collect its stats"""
+    sys.path.insert(0, TOOLS_DIR)
+    from sim_cache import compile_project
+    from sim_projects import find_project
+
+    program = load_hex(hexfile)
+    iss = RV32ISim(program)
+    instret = iss.run()
+    binary = compile_project(find_project('01'))
+    plusargs = [f"+program={os.path.abspath(hexfile)}",
+                f"+cycles={cycles or cycle_budget(instret)}"]
+    with tempfile.TemporaryDirectory(prefix='pipeline-stats-') as scratch:
+        sim = StreamingSim(['vvp', '-n', binary] + plusargs, cwd=scratch, timeout=timeout)
+        stats = collect_stats(sim, end_pc=len(program) * 4)
+    stats['iss_instret'] = instret
+    return stats
+
+
+def format_report(name, stats):
+    lines = []
+    lines.append("=" * 80)
+    lines.append(f"PIPELINE STATISTICS - {name}")
+    lines.append("=" * 80)
+    cpi = f"{stats['cpi']:.3f}" if stats['cpi'] is not None else "n/a"
+    lines.append(f"Cycles:              {stats['cycles']}")
+    lines.append(f"Retired:             {stats['retired']}"
+                 + (f" (ISS: {stats['iss_instret']})" if 'iss_instret' in stats else ""))
+    lines.append(f"CPI:                 {cpi}")
+    s = stats['stall_cycles']
+    lines.append(f"Stall cycles:        load-use {s['load_use']}, branch {s['branch']}, "
+                 f"fill {s['fill']}, other {s['other']}")
+    f = stats['flushes']
+    lines.append(f"Flushes:             branch {f['branch']} "
+                 f"(load-use EX bubbles are the load-use stall cycles)")
+    fw = stats['forwarding']
+    lines.append(f"Forwarding:          EX->EX {fw['ex_to_ex']}, MEM->EX {fw['mem_to_ex']} "
+                 f"(A: {fw['operand_a']['ex_mem']}/{fw['operand_a']['mem_wb']}, "
+                 f"B: {fw['operand_b']['ex_mem']}/{fw['operand_b']['mem_wb']})")
+    b = stats['branches']
+    lines.append(f"Branches:            {b['taken']} taken, {b['penalty_cycles']} penalty cycles")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPI and hazard analytics for the pipelined CPU")
+    parser.add_argument('programs', nargs='*', help="program.hex files to simulate")
+    parser.add_argument('--log', action='append', default=[],
+                        help="analyse a saved simulation log instead (repeatable)")
+    parser.add_argument('--end-pc', type=lambda v: int(v, 0),
+                        help="with --log: only count instructions below this PC")
+    parser.add_argument('--cycles', type=int, help="cycle budget (default: derived from the ISS)")
+    parser.add_argument('--json', help="write the machine-readable summary here")
+    args = parser.parse_args()
+
+    if not args.programs and not args.log:
+        args.programs = ['program.hex']
+
+    summary = {}
+    for path in args.log:
+        summary[path] = stats_from_log(path, args.end_pc)
+    for path in args.programs:
+        summary[path] = stats_from_program(path, args.cycles)
+
+    for name, stats in summary.items():
+        print(format_report(name, stats))
+        print()
+
+    if args.json:
+        sys.path.insert(0, TOOLS_DIR)
+        from sim_projects import git_revision
+        commit, dirty = git_revision()
+        with open(args.json, 'w') as f:
+            json.dump({'commit': commit, 'dirty': dirty, 'programs': summary}, f, indent=2)
+        print(f"Wrote {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+# Test Suite 3 - Different instruction patterns
+# Same program as generate_test3.py, written as assembly
+
+## Test Group 1: Small values and combinations
+    addi  x1, x0, 3
+    addi  x2, x0, 7
+    addi  x3, x0, 11
+    add   x4, x1, x2
+    add   x5, x2, x3
+    add   x6, x1, x3
+
+## Test Group 2: Subtraction patterns
+    addi  x7, x0, 50
+    addi  x8, x0, 30
+    sub   x9, x7, x8
+    sub   x10, x8, x1
+
+## Test Group 3: Bitwise operations with hex patterns (0x55 & 0xAA)
+    addi  x11, x0, 0x55
+    addi  x12, x0, 0xAA
+    and   x13, x11, x12
+    or    x14, x11, x12
+    xor   x15, x11, x12
+
+## Test Group 4: More bitwise with different patterns (0x33 & 0xCC)
+    addi  x16, x0, 0x33
+    addi  x17, x0, 0xCC
+    and   x18, x16, x17
+    or    x19, x16, x17
+    xor   x20, x16, x17
+
+## Test Group 5: Shift patterns
+    addi  x21, x0, 64
+    addi  x22, x0, 2
+    sll   x23, x21, x22
+    srl   x24, x23, x22
+
+## Test Group 6: Comparisons
+    slt   x25, x1, x7
+    slt   x26, x7, x1
+    sltu  x27, x2, x8
+
+## Test Group 7: Forwarding chains
+    addi  x28, x0, 15
+    add   x28, x28, x1
+    add   x28, x28, x2
+    sub   x28, x28, x3
+
+## Test Group 8: Zero register and edge cases
+    add   x29, x7, x0
+    sub   x30, x0, x1
+    addi  x31, x0, 1000
@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+"""
+RV32I Instruction Set Simulator for the Pipelined RISC-V CPU
+Golden reference model: runs any program.hex and produces the final
+register file and data memory state the RTL should end up with.
+
+Speed comes from decoding every instruction memory word exactly once into
+a table of small handler closures (one per opcode/funct combination, with
+rd/rs1/rs2/imm already bound), so the inner loop is just
+"look up handler, call it, get next PC".
+"""
+
+import sys
+import time
+
+# Memory geometry - must match the RTL
+IMEM_WORDS = 256        # instruction_fetch.v: reg [31:0] imem [0:255]
+DMEM_BYTES = 1024       # memory_stage.v:     reg [7:0]  dmem [0:1023]
+NOP = 0x00000013        # addi x0, x0, 0
+
+# Opcodes (rtl/riscv_pkg.v)
+OP_LUI = 0b0110111
+OP_AUIPC = 0b0010111
+OP_JAL = 0b1101111
+OP_JALR = 0b1100111
+OP_BRANCH = 0b1100011
+OP_LOAD = 0b0000011
+OP_STORE = 0b0100011
+OP_IMM = 0b0010011
+OP_REG = 0b0110011
+
+MASK32 = 0xFFFFFFFF
+
+
+def sext(value, bits):
+    """Sign-extend a bits-wide value to a Python int"""
+    sign = 1 << (bits - 1)
+    return (value & (sign - 1)) - (value & sign)
+
+
+def to_signed(value):
+    """Interpret a 32-bit register value as signed"""
+    return value - 0x100000000 if value & 0x80000000 else value
+
+
+def load_hex(path):
+    """Read a $readmemh-style hex file into a list of 32-bit words"""
+    words = []
+    addr = 0
+    with open(path) as f:
+        for line in f:
+            line = line.split('//')[0].strip()
+            if not line:
+                continue
+            for token in line.split():
+                if token.startswith('@'):
+                    addr = int(token[1:], 16)
+                    continue
+                if addr >= len(words):
+                    words.extend([NOP] * (addr + 1 - len(words)))
+                words[addr] = int(token.replace('_', ''), 16) & MASK32
+                addr += 1
+    return words
+
+
+def decode_fields(instr):
+    """Split an instruction into (opcode, rd, funct3, rs1, rs2, funct7)"""
+    return (instr & 0x7F, (instr >> 7) & 0x1F, (instr >> 12) & 0x7,
+            (instr >> 15) & 0x1F, (instr >> 20) & 0x1F, instr >> 25)
+
+
+def decode_imm(instr):
+    """Return the sign-extended immediate for the instruction's format"""
+    opcode = instr & 0x7F
+    if opcode in (OP_LUI, OP_AUIPC):
+        return instr & 0xFFFFF000
+    if opcode == OP_JAL:
+        imm = (((instr >> 31) & 1) << 20) | (((instr >> 12) & 0xFF) << 12) | \
+              (((instr >> 20) & 1) << 11) | (((instr >> 21) & 0x3FF) << 1)
+        return sext(imm, 21)
+    if opcode == OP_BRANCH:
+        imm = (((instr >> 31) & 1) << 12) | (((instr >> 7) & 1) << 11) | \
+              (((instr >> 25) & 0x3F) << 5) | (((instr >> 8) & 0xF) << 1)
+        return sext(imm, 13)
+    if opcode == OP_STORE:
+        return sext(((instr >> 25) << 5) | ((instr >> 7) & 0x1F), 12)
+    return sext(instr >> 20, 12)
+
+
+def encode_rtype(opcode, rd, funct3, rs1, rs2, funct7):
+    """Pack instruction fields; also works element-wise on NumPy arrays"""
+    return ((funct7 << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode) & 0xFFFFFFFF
+
+
+def encode_itype(opcode, rd, funct3, rs1, imm):
+    imm = imm & 0xFFF
+    return ((imm << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode) & 0xFFFFFFFF
+
+
+def encode_stype(opcode, funct3, rs1, rs2, imm):
+    imm = imm & 0xFFF
+    return (((imm >> 5) << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) |
+            ((imm & 0x1F) << 7) | opcode) & 0xFFFFFFFF
+
+
+def encode_btype(opcode, funct3, rs1, rs2, imm):
+    imm = imm & 0x1FFF
+    return ((((imm >> 12) & 1) << 31) | (((imm >> 5) & 0x3F) << 25) | (rs2 << 20) |
+            (rs1 << 15) | (funct3 << 12) | (((imm >> 1) & 0xF) << 8) |
+            (((imm >> 11) & 1) << 7) | opcode) & 0xFFFFFFFF
+
+
+def encode_utype(opcode, rd, imm20):
+    return (((imm20 & 0xFFFFF) << 12) | (rd << 7) | opcode) & 0xFFFFFFFF
+
+
+def encode_jtype(opcode, rd, imm):
+    imm = imm & 0x1FFFFF
+    return ((((imm >> 20) & 1) << 31) | (((imm >> 1) & 0x3FF) << 21) |
+            (((imm >> 11) & 1) << 20) | (((imm >> 12) & 0xFF) << 12) |
+            (rd << 7) | opcode) & 0xFFFFFFFF
+
+
+# Mnemonics by (opcode, funct3[, funct7 bit 5])
+BRANCH_NAMES = {0b000: 'beq', 0b001: 'bne', 0b100: 'blt', 0b101: 'bge', 0b110: 'bltu', 0b111: 'bgeu'}
+LOAD_NAMES = {0b000: 'lb', 0b001: 'lh', 0b010: 'lw', 0b100: 'lbu', 0b101: 'lhu'}
+STORE_NAMES = {0b000: 'sb', 0b001: 'sh', 0b010: 'sw'}
+IMM_NAMES = {0b000: 'addi', 0b010: 'slti', 0b011: 'sltiu', 0b100: 'xori', 0b110: 'ori',
+             0b111: 'andi', 0b001: 'slli', 0b101: 'srli'}
+REG_NAMES = {(0b000, 0): 'add', (0b000, 1): 'sub', (0b001, 0): 'sll', (0b010, 0): 'slt',
+             (0b011, 0): 'sltu', (0b100, 0): 'xor', (0b101, 0): 'srl', (0b101, 1): 'sra',
+             (0b110, 0): 'or', (0b111, 0): 'and'}
+
+
+def disassemble(instr):
+    """One instruction as assembly text, in the style of instructions.txt"""
+    opcode, rd, funct3, rs1, rs2, funct7 = decode_fields(instr)
+    imm = decode_imm(instr)
+    if opcode == OP_LUI:
+        return f"lui x{rd}, 0x{(imm >> 12) & 0xFFFFF:X}"
+    if opcode == OP_AUIPC:
+        return f"auipc x{rd}, 0x{(imm >> 12) & 0xFFFFF:X}"
+    if opcode == OP_JAL:
+        return f"jal x{rd}, {imm}"
+    if opcode == OP_JALR:
+        return f"jalr x{rd}, {imm}(x{rs1})"
+    if opcode == OP_BRANCH and funct3 in BRANCH_NAMES:
+        return f"{BRANCH_NAMES[funct3]} x{rs1}, x{rs2}, {imm}"
+    if opcode == OP_LOAD and funct3 in LOAD_NAMES:
+        return f"{LOAD_NAMES[funct3]} x{rd}, {imm}(x{rs1})"
+    if opcode == OP_STORE and funct3 in STORE_NAMES:
+        return f"{STORE_NAMES[funct3]} x{rs2}, {imm}(x{rs1})"
+    if opcode == OP_IMM:
+        if instr == NOP:
+            return "nop"
+        if funct3 in (0b001, 0b101):
+            name = 'srai' if funct3 == 0b101 and funct7 & 0x20 else IMM_NAMES[funct3]
+            return f"{name} x{rd}, x{rs1}, {imm & 0x1F}"
+        return f"{IMM_NAMES[funct3]} x{rd}, x{rs1}, {imm}"
+    if opcode == OP_REG:
+        name = REG_NAMES.get((funct3, (funct7 >> 5) & 1))
+        if name:
+            return f"{name} x{rd}, x{rs1}, x{rs2}"
+    return f".word 0x{instr:08X}"
+
+
+class RV32ISim:
+    """RV32I ISS with the same memory map as riscv_cpu.v
+
+    Registers live in a flat 32-entry list, data memory in a bytearray.
+    Data addresses wrap at DMEM_BYTES and instruction fetch uses pc[9:2],
+    exactly like the RTL. Opcodes outside riscv_pkg.v (FENCE, SYSTEM, ...)
+    execute as NOPs, which is also what the decode stage does with them.
+    """
+
+    def __init__(self, program=None, imem_words=IMEM_WORDS, dmem_bytes=DMEM_BYTES):
+        self.imem_words = imem_words
+        self.dmem_bytes = dmem_bytes
+        self.regs = [0] * 32
+        self.mem = bytearray(dmem_bytes)
+        self.pc = 0
+        self.instret = 0
+        self.program = []
+        self._table = []
+        if program is not None:
+            self.load_program(program)
+
+    def load_program(self, program):
+        """Load a list of words or a hex file path and pre-decode it"""
+        if isinstance(program, str):
+            program = load_hex(program)
+        if len(program) > self.imem_words:
+            raise ValueError(f"program has {len(program)} words, imem holds {self.imem_words}")
+        self.program = list(program)
+        self._table = [self._compile(word) for word in self.program]
+        # Words past the image are NOP fill; a None slot marks end-of-program
+        self._table.extend([None] * (self.imem_words - len(self._table)))
+
+    def reset(self):
+        """Clear architectural state, keeping the loaded program"""
+        self.regs[:] = [0] * 32
+        self.mem[:] = bytes(self.dmem_bytes)
+        self.pc = 0
+        self.instret = 0
+
+    def step(self):
+        """Execute one instruction; returns False at end of program"""
+        return self.run(1) == 1
+
+    def run(self, max_steps=1_000_000):
+        """Run until the PC leaves the program image, hits a self-loop,
+        or max_steps instructions have retired. Returns instructions run."""
+        table = self._table
+        imask = self.imem_words - 1
+        pc = self.pc
+        n = 0
+        while n < max_steps:
+            handler = table[(pc >> 2) & imask]
+            if handler is None:
+                break
+            next_pc = handler(pc)
+            n += 1
+            if next_pc == pc:
+                break
+            pc = next_pc
+        self.pc = pc
+        self.instret += n
+        return n
+
+    def read_word(self, addr):
+        """Little-endian 32-bit read from data memory"""
+        mem, m = self.mem, self.dmem_bytes - 1
+        return mem[addr & m] | (mem[(addr + 1) & m] << 8) | \
+            (mem[(addr + 2) & m] << 16) | (mem[(addr + 3) & m] << 24)
+
+    def state(self):
+        """Snapshot of the architectural state"""
+        return {
+            'pc': self.pc,
+            'instret': self.instret,
+            'regs': list(self.regs),
+            'mem': bytes(self.mem),
+        }
+
+    def _compile(self, instr):
+        """Turn one instruction word into a handler: pc -> next_pc"""
+        regs = self.regs
+        mem = self.mem
+        m = self.dmem_bytes - 1
+        opcode, rd, funct3, rs1, rs2, funct7 = decode_fields(instr)
+        imm = decode_imm(instr)
+        M = MASK32
+
+        def nop(pc):
+            return pc + 4
+
+        if opcode == OP_LUI:
+            if rd == 0:
+                return nop
+            value = imm & M
+
+            def lui(pc):
+                regs[rd] = value
+                return pc + 4
+            return lui
+
+        if opcode == OP_AUIPC:
+            if rd == 0:
+                return nop
+
+            def auipc(pc):
+                regs[rd] = (pc + imm) & M
+                return pc + 4
+            return auipc
+
+        if opcode == OP_JAL:
+            if rd == 0:
+                def j(pc):
+                    return (pc + imm) & M
+                return j
+
+            def jal(pc):
+                regs[rd] = (pc + 4) & M
+                return (pc + imm) & M
+            return jal
+
+        if opcode == OP_JALR:
+            def jalr(pc):
+                target = (regs[rs1] + imm) & 0xFFFFFFFE
+                if rd:
+                    regs[rd] = (pc + 4) & M
+                return target
+            return jalr
+
+        if opcode == OP_BRANCH:
+            return self._compile_branch(funct3, rs1, rs2, imm) or nop
+
+        if opcode == OP_LOAD:
+            return self._compile_load(funct3, rd, rs1, imm, regs, mem, m) or nop
+
+        if opcode == OP_STORE:
+            return self._compile_store(funct3, rs1, rs2, imm, regs, mem, m) or nop
+
+        if opcode == OP_IMM:
+            if rd == 0:
+                return nop
+            return self._compile_alu_imm(funct3, funct7, rd, rs1, imm, regs)
+
+        if opcode == OP_REG:
+            if rd == 0:
+                return nop
+            return self._compile_alu_reg(funct3, funct7, rd, rs1, rs2, regs)
+
+        return nop
+
+    def _compile_branch(self, funct3, rs1, rs2, imm):
+        regs = self.regs
+        M = MASK32
+
+        if funct3 == 0b000:
+            def beq(pc):
+                return (pc + imm) & M if regs[rs1] == regs[rs2] else pc + 4
+            return beq
+        if funct3 == 0b001:
+            def bne(pc):
+                return (pc + imm) & M if regs[rs1] != regs[rs2] else pc + 4
+            return bne
+        if funct3 == 0b100:
+            def blt(pc):
+                return (pc + imm) & M if (regs[rs1] ^ 0x80000000) < (regs[rs2] ^ 0x80000000) else pc + 4
+            return blt
+        if funct3 == 0b101:
+            def bge(pc):
+                return (pc + imm) & M if (regs[rs1] ^ 0x80000000) >= (regs[rs2] ^ 0x80000000) else pc + 4
+            return bge
+        if funct3 == 0b110:
+            def bltu(pc):
+                return (pc + imm) & M if regs[rs1] < regs[rs2] else pc + 4
+            return bltu
+        if funct3 == 0b111:
+            def bgeu(pc):
+                return (pc + imm) & M if regs[rs1] >= regs[rs2] else pc + 4
+            return bgeu
+        return None
+
+    def _compile_load(self, funct3, rd, rs1, imm, regs, mem, m):
+        # Loads into x0 still have to be decoded (no side effects here)
+        if rd == 0:
+            return None
+        if funct3 == 0b000:
+            def lb(pc):
+                v = mem[(regs[rs1] + imm) & m]
+                regs[rd] = (v | 0xFFFFFF00) if v & 0x80 else v
+                return pc + 4
+            return lb
+        if funct3 == 0b001:
+            def lh(pc):
+                a = (regs[rs1] + imm) & m
+                v = mem[a] | (mem[(a + 1) & m] << 8)
+                regs[rd] = (v | 0xFFFF0000) if v & 0x8000 else v
+                return pc + 4
+            return lh
+        if funct3 == 0b010:
+            def lw(pc):
+                a = (regs[rs1] + imm) & m
+                regs[rd] = mem[a] | (mem[(a + 1) & m] << 8) | \
+                    (mem[(a + 2) & m] << 16) | (mem[(a + 3) & m] << 24)
+                return pc + 4
+            return lw
+        if funct3 == 0b100:
+            def lbu(pc):
+                regs[rd] = mem[(regs[rs1] + imm) & m]
+                return pc + 4
+            return lbu
+        if funct3 == 0b101:
+            def lhu(pc):
+                a = (regs[rs1] + imm) & m
+                regs[rd] = mem[a] | (mem[(a + 1) & m] << 8)
+                return pc + 4
+            return lhu
+        # Reserved load widths read as zero in memory_stage.v
+        def lzero(pc):
+            regs[rd] = 0
+            return pc + 4
+        return lzero
+
+    def _compile_store(self, funct3, rs1, rs2, imm, regs, mem, m):
+        if funct3 == 0b000:
+            def sb(pc):
+                mem[(regs[rs1] + imm) & m] = regs[rs2] & 0xFF
+                return pc + 4
+            return sb
+        if funct3 == 0b001:
+            def sh(pc):
+                a = (regs[rs1] + imm) & m
+                v = regs[rs2]
+                mem[a] = v & 0xFF
+                mem[(a + 1) & m] = (v >> 8) & 0xFF
+                return pc + 4
+            return sh
+        if funct3 == 0b010:
+            def sw(pc):
+                a = (regs[rs1] + imm) & m
+                v = regs[rs2]
+                mem[a] = v & 0xFF
+                mem[(a + 1) & m] = (v >> 8) & 0xFF
+                mem[(a + 2) & m] = (v >> 16) & 0xFF
+                mem[(a + 3) & m] = v >> 24
+                return pc + 4
+            return sw
+        return None
+
+    def _compile_alu_imm(self, funct3, funct7, rd, rs1, imm, regs):
+        M = MASK32
+        uimm = imm & M
+        shamt = imm & 0x1F
+
+        if funct3 == 0b000:
+            if rs1 == 0:
+                def li(pc):
+                    regs[rd] = uimm
+                    return pc + 4
+                return li
+
+            def addi(pc):
+                regs[rd] = (regs[rs1] + imm) & M
+                return pc + 4
+            return addi
+        if funct3 == 0b010:
+            simm = uimm ^ 0x80000000
+
+            def slti(pc):
+                regs[rd] = 1 if (regs[rs1] ^ 0x80000000) < simm else 0
+                return pc + 4
+            return slti
+        if funct3 == 0b011:
+            def sltiu(pc):
+                regs[rd] = 1 if regs[rs1] < uimm else 0
+                return pc + 4
+            return sltiu
+        if funct3 == 0b100:
+            def xori(pc):
+                regs[rd] = regs[rs1] ^ uimm
+                return pc + 4
+            return xori
+        if funct3 == 0b110:
+            def ori(pc):
+                regs[rd] = regs[rs1] | uimm
+                return pc + 4
+            return ori
+        if funct3 == 0b111:
+            def andi(pc):
+                regs[rd] = regs[rs1] & uimm
+                return pc + 4
+            return andi
+        if funct3 == 0b001:
+            def slli(pc):
+                regs[rd] = (regs[rs1] << shamt) & M
+                return pc + 4
+            return slli
+        # funct3 == 0b101
+        if funct7 & 0x20:
+            def srai(pc):
+                v = regs[rs1]
+                regs[rd] = ((v - 0x100000000 if v & 0x80000000 else v) >> shamt) & M
+                return pc + 4
+            return srai
+
+        def srli(pc):
+            regs[rd] = regs[rs1] >> shamt
+            return pc + 4
+        return srli
+
+    def _compile_alu_reg(self, funct3, funct7, rd, rs1, rs2, regs):
+        M = MASK32
+        alt = funct7 & 0x20
+
+        if funct3 == 0b000:
+            if alt:
+                def sub(pc):
+                    regs[rd] = (regs[rs1] - regs[rs2]) & M
+                    return pc + 4
+                return sub
+
+            def add(pc):
+                regs[rd] = (regs[rs1] + regs[rs2]) & M
+                return pc + 4
+            return add
+        if funct3 == 0b001:
+            def sll(pc):
+                regs[rd] = (regs[rs1] << (regs[rs2] & 0x1F)) & M
+                return pc + 4
+            return sll
+        if funct3 == 0b010:
+            def slt(pc):
+                regs[rd] = 1 if (regs[rs1] ^ 0x80000000) < (regs[rs2] ^ 0x80000000) else 0
+                return pc + 4
+            return slt
+        if funct3 == 0b011:
+            def sltu(pc):
+                regs[rd] = 1 if regs[rs1] < regs[rs2] else 0
+                return pc + 4
+            return sltu
+        if funct3 == 0b100:
+            def xor(pc):
+                regs[rd] = regs[rs1] ^ regs[rs2]
+                return pc + 4
+            return xor
+        if funct3 == 0b101:
+            if alt:
+                def sra(pc):
+                    v = regs[rs1]
+                    regs[rd] = ((v - 0x100000000 if v & 0x80000000 else v) >> (regs[rs2] & 0x1F)) & M
+                    return pc + 4
+                return sra
+
+            def srl(pc):
+                regs[rd] = regs[rs1] >> (regs[rs2] & 0x1F)
+                return pc + 4
+            return srl
+        if funct3 == 0b110:
+            def or_(pc):
+                regs[rd] = regs[rs1] | regs[rs2]
+                return pc + 4
+            return or_
+
+        def and_(pc):
+            regs[rd] = regs[rs1] & regs[rs2]
+            return pc + 4
+        return and_
+
+
+def cycle_budget(instret):
+    """RTL cycles needed to retire instret instructions: worst case is a
+    taken branch (2 bubbles) on every instruction, plus pipeline fill"""
+    return 3 * instret + 10
+
+
+def golden_state(program, max_steps=1_000_000):
+    """Run a program (hex path or word list) and return the final state"""
+    sim = RV32ISim(program)
+    sim.run(max_steps)
+    return sim.state()
+
+
+def expected_registers(program, max_steps=1_000_000):
+    """Expected register file as {'x1': value, ...}, in verify_tests*.py form"""
+    regs = golden_state(program, max_steps)['regs']
+    return {f'x{i}': regs[i] for i in range(1, 32)}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="RV32I golden-reference simulator")
+    parser.add_argument('hexfile', nargs='?', default='program.hex')
+    parser.add_argument('--max-steps', type=int, default=1_000_000,
+                        help="stop after this many instructions")
+    parser.add_argument('--mem', action='store_true',
+                        help="also dump non-zero data memory words")
+    args = parser.parse_args()
+
+    sim = RV32ISim(args.hexfile)
+    start = time.perf_counter()
+    executed = sim.run(args.max_steps)
+    elapsed = time.perf_counter() - start
+
+    print("=" * 43)
+    print("ISS Final Register File Contents:")
+    print("=" * 43)
+    for i in range(1, 32):
+        name = f"x{i}"
+        print(f"{name:3s} = {sim.regs[i]:08x} ({to_signed(sim.regs[i])})")
+
+    if args.mem:
+        print()
+        print("Data memory (non-zero words):")
+        for addr in range(0, sim.dmem_bytes, 4):
+            word = sim.read_word(addr)
+            if word:
+                print(f"  [{addr:03x}] = {word:08x}")
+
+    rate = executed / elapsed / 1e6 if elapsed > 0 else float('inf')
+    print()
+    print(f"Executed {executed} instructions, final PC={sim.pc:08x} ({rate:.2f} MIPS)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
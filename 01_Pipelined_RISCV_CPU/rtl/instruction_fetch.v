@@ -17,11 +17,20 @@ module instruction_fetch (
     // Program Counter
     reg [31:0] pc;
     
+    // PC loaded on reset; the testbench overrides it when starting from a
+    // checkpoint (+checkpoint=<file>)
+    reg [31:0] reset_pc;
+    initial reset_pc = 32'h00000000;
+    
     // Simple instruction memory (ROM) - 1KB
     reg [31:0] imem [0:255];
     
+    // Program image file name, overridable at run time with +program=<file>
+    reg [8*256-1:0] program_file;
+    integer program_fd;
+    
     // Initialize instruction memory with test program
-    // Load from program.hex file or use default
+    // Load from program.hex file (or +program=<file>) or use default
     initial begin
         integer i;
         // Fill all with NOPs first
@@ -29,10 +38,15 @@ module instruction_fetch (
             imem[i] = 32'h00000013;  // nop (addi x0, x0, 0)
         end
         
+        if (!$value$plusargs("program=%s", program_file))
+            program_file = "program.hex";
+        
         // Try to load from external file first
-        if ($fopen("program.hex", "r") != 0) begin
-            $readmemh("program.hex", imem);
-            $display("INFO: Loaded program from program.hex");
+        program_fd = $fopen(program_file, "r");
+        if (program_fd != 0) begin
+            $fclose(program_fd);
+            $readmemh(program_file, imem);
+            $display("INFO: Loaded program from %0s", program_file);
         end else begin
             // Default test program if file not found
             $display("INFO: Using default test program");
@@ -58,7 +72,7 @@ module instruction_fetch (
     // PC Logic
     always @(posedge clk or negedge rst_n) begin
         if (!rst_n) begin
-            pc <= 32'h00000000;
+            pc <= reset_pc;
         end else if (branch_taken) begin
             pc <= branch_target;
         end else if (!stall) begin
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Checkpointed Sampled Simulation for the Pipelined RISC-V CPU
+The ISS fast-forwards a program and writes checkpoints (PC, x1-x31, data
+memory) every --interval instructions. Each checkpoint seeds the RTL at
+reset through +checkpoint=<file>, which then runs a short detailed window
+(+window / +warmup) and prints its cycle and hazard counts. The windows
+are combined into a CPI estimate with a confidence interval, so the CPI
+of programs far longer than a full RTL run can afford is still measured
+on the real pipeline.
+
+Checkpoint files are $readmemh images: word 0 is the PC, words 1-31 are
+x1-x31 and words 32-287 are data memory as little-endian words.
+"""
+
+import argparse
+import math
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from pipeline_stats import PIPELINE_FILL
+from riscv_iss import RV32ISim, load_hex
+
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools')
+
+WINDOW_RE = re.compile(r'WINDOW cycles=(\d+) instructions=(\d+) stalls=(\d+) '
+                       r'flushes=(\d+) taken=(\d+)')
+Z95 = 1.96
+
+
+# ----------------------------------------------------------------------------
+# Checkpoints (ISS side)
+# ----------------------------------------------------------------------------
+
+def checkpoint_words(sim):
+    """Architectural state of the ISS in checkpoint layout"""
+    mem = sim.mem
+    words = [sim.pc] + sim.regs[1:32]
+    words += [mem[a] | (mem[a + 1] << 8) | (mem[a + 2] << 16) | (mem[a + 3] << 24)
+              for a in range(0, sim.dmem_bytes, 4)]
+    return words
+
+
+def write_checkpoint(path, sim, index):
+    with open(path, 'w') as f:
+        f.write(f"// checkpoint {index}: instret={sim.instret} pc={sim.pc:08x}\n")
+        f.write(''.join(f"{w:08x}\n" for w in checkpoint_words(sim)))
+
+
+def make_checkpoints(program, out_dir, interval, window, offset=0, max_steps=100_000_000):
+    """Fast-forward the ISS, writing a checkpoint every interval instructions
+
+    Returns (checkpoint list, total instructions). Each entry is
+    {'index', 'path', 'instret', 'pc'}; a checkpoint is only taken if at
+    least one window of instructions follows it.
+    """
+    sim = RV32ISim(program)
+    total = RV32ISim(program).run(max_steps)
+    os.makedirs(out_dir, exist_ok=True)
+
+    checkpoints = []
+    position = offset
+    while position + window <= total or (not checkpoints and position < total):
+        sim.run(position - sim.instret)
+        path = os.path.join(out_dir, f"ckpt_{len(checkpoints):05d}.hex")
+        write_checkpoint(path, sim, len(checkpoints))
+        checkpoints.append({'index': len(checkpoints), 'path': path,
+                            'instret': sim.instret, 'pc': sim.pc})
+        position += interval
+    return checkpoints, total
+
+
+# ----------------------------------------------------------------------------
+# Windows (RTL side)
+# ----------------------------------------------------------------------------
+
+def _window_job(binary, hexfile, checkpoint, window, warmup, timeout):
+    """Run one detailed window from a checkpoint; returns its counters"""
+    cycles = warmup + 3 * window + 10
+    cmd = ['vvp', '-n', binary, f"+program={hexfile}", f"+checkpoint={checkpoint['path']}",
+           f"+window={window}", f"+warmup={warmup}", f"+cycles={cycles}", '+novcd',
+           '+commitlog']  # the commit log replaces the (much longer) per-cycle printout
+    with tempfile.TemporaryDirectory(prefix='sampled-sim-') as scratch:
+        result = subprocess.run(cmd, cwd=scratch, capture_output=True, text=True,
+                                timeout=timeout)
+    m = WINDOW_RE.search(result.stdout)
+    if result.returncode != 0 or not m:
+        raise RuntimeError(f"checkpoint {checkpoint['index']}: no WINDOW line "
+                           f"(vvp exited with {result.returncode})")
+    keys = ('cycles', 'instructions', 'stalls', 'flushes', 'taken')
+    return dict(checkpoint, **{k: int(v) for k, v in zip(keys, m.groups())})
+
+
+def run_windows(hexfile, checkpoints, window, warmup, workers=None, timeout=120):
+    sys.path.insert(0, TOOLS_DIR)
+    from sim_cache import compile_project
+    from sim_projects import find_project
+
+    binary = compile_project(find_project('01'))
+    hexfile = os.path.abspath(hexfile)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(_window_job, binary, hexfile, c, window, warmup, timeout)
+                   for c in checkpoints]
+        return [f.result() for f in futures]
+
+
+def short_window(w, window, total_instructions):
+    """True if a window stopped at the +cycles cap before retiring its instructions"""
+    return w['instructions'] < min(window, total_instructions - w['instret'])
+
+
+def combine(windows, total_instructions, window):
+    """CPI estimate over all complete windows with a 95% confidence interval
+
+    Windows cut short by the cycle cap (the RTL hung or diverged from the
+    ISS) would add about 3 x window cycles for a few instructions, so they
+    are left out and only counted.
+    """
+    short = [w for w in windows if short_window(w, window, total_instructions)]
+    windows = [w for w in windows if w['instructions'] and w not in short]
+    cycles = sum(w['cycles'] for w in windows)
+    instrs = sum(w['instructions'] for w in windows)
+    cpis = [w['cycles'] / w['instructions'] for w in windows]
+    n = len(cpis)
+    mean = sum(cpis) / n if n else None
+    sd = math.sqrt(sum((c - mean) ** 2 for c in cpis) / (n - 1)) if n > 1 else 0.0
+    cpi = cycles / instrs if instrs else None
+    half = Z95 * sd / math.sqrt(n) if n else None
+    return {
+        'windows': n,
+        'short_windows': len(short),
+        'sampled_instructions': instrs,
+        'sampled_cycles': cycles,
+        'cpi': round(cpi, 4) if cpi else None,
+        'cpi_ci95': round(half, 4) if half is not None else None,
+        'cpi_stddev': round(sd, 4),
+        'total_instructions': total_instructions,
+        'estimated_cycles': round(cpi * total_instructions) if cpi else None,
+        'coverage': round(instrs / total_instructions, 4) if total_instructions else None,
+        'stalls_per_kinstr': round(1000 * sum(w['stalls'] for w in windows) / instrs, 2)
+        if instrs else None,
+        'taken_per_kinstr': round(1000 * sum(w['taken'] for w in windows) / instrs, 2)
+        if instrs else None,
+    }
+
+
+# ----------------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------------
+
+def print_report(name, summary, windows=None, full=None, window=None):
+    print("=" * 80)
+    print(f"SAMPLED SIMULATION - {name}")
+    print("=" * 80)
+    if windows:
+        print(f"{'Ckpt':>5s}{'Instret':>12s}{'PC':>10s}{'Cycles':>8s}{'Instr':>7s}{'CPI':>8s}"
+              f"{'Stalls':>8s}{'Taken':>7s}")
+        for w in windows:
+            cpi = w['cycles'] / w['instructions'] if w['instructions'] else float('nan')
+            short = window and short_window(w, window, summary['total_instructions'])
+            print(f"{w['index']:5d}{w['instret']:12d}{w['pc']:10x}{w['cycles']:8d}"
+                  f"{w['instructions']:7d}{cpi:8.3f}{w['stalls']:8d}{w['taken']:7d}"
+                  f"{'  ✗ cut short' if short else ''}")
+        print()
+    s = summary
+    print(f"Program:             {s['total_instructions']} instructions (ISS)")
+    print(f"Sampled:             {s['windows']} windows, {s['sampled_instructions']} instructions "
+          f"({s['coverage']:.2%} of the program)")
+    if s['short_windows']:
+        print(f"✗ Left out:          {s['short_windows']} windows cut short by the cycle cap "
+              f"(RTL hang or divergence at that checkpoint)")
+    if s['cpi'] is not None:
+        print(f"CPI:                 {s['cpi']:.4f} ± {s['cpi_ci95']:.4f} (95% CI)")
+        print(f"Estimated cycles:    {s['estimated_cycles']}")
+        print(f"Load-use stalls:     {s['stalls_per_kinstr']} per 1000 instructions")
+        print(f"Taken branches:      {s['taken_per_kinstr']} per 1000 instructions")
+    if full is not None and full['cpi'] and s['cpi']:
+        error = (s['cpi'] - full['cpi']) / full['cpi']
+        print(f"Full RTL run:        CPI {full['cpi']:.4f} ({error:+.2%} sampling error)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpointed sampled simulation of the CPU")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    for cmd, text in (('save', "fast-forward on the ISS and write checkpoints"),
+                      ('run', "write checkpoints, simulate a window from each and combine")):
+        p = sub.add_parser(cmd, help=text)
+        p.add_argument('program', nargs='?', default='program.hex')
+        p.add_argument('-o', '--out-dir', default='checkpoints')
+        p.add_argument('-i', '--interval', type=int, default=10_000,
+                       help="instructions between checkpoints")
+        p.add_argument('-w', '--window', type=int, default=1000,
+                       help="detailed instructions per window")
+        p.add_argument('--offset', type=int, default=0, help="instructions before the first one")
+        p.add_argument('--max-steps', type=int, default=100_000_000)
+        if cmd == 'run':
+            p.add_argument('--warmup', type=int, default=PIPELINE_FILL,
+                           help="cycles at the start of each window left out of the stats")
+            p.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+            p.add_argument('--timeout', type=int, default=120, help="seconds per window")
+            p.add_argument('--validate', action='store_true',
+                           help="also simulate the whole program and compare CPI")
+            p.add_argument('--json', help="write the summary and windows here")
+    args = parser.parse_args()
+
+    program = load_hex(args.program)
+    checkpoints, total = make_checkpoints(program, args.out_dir, args.interval, args.window,
+                                          args.offset, args.max_steps)
+    if args.cmd == 'save':
+        print(f"✓ {len(checkpoints)} checkpoints of a {total}-instruction run in {args.out_dir}/")
+        return 0
+
+    windows = run_windows(args.program, checkpoints, args.window, args.warmup, args.jobs,
+                          args.timeout)
+    summary = combine(windows, total, args.window)
+    full = None
+    if args.validate:
+        from pipeline_stats import stats_from_program
+        full = stats_from_program(args.program)
+    print_report(args.program, summary, windows, full, args.window)
+
+    if args.json:
+        import json
+        with open(args.json, 'w') as f:
+            json.dump({'summary': summary, 'windows': windows, 'full': full}, f, indent=2)
+        print(f"Wrote {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Streaming Parser for RISC-V CPU Simulation Output
+Reads tb_riscv_cpu.v output line by line (from a running vvp process or a
+saved log) and yields one typed CycleRecord per simulated cycle, then the
+final register dump. A caller-supplied check can abort the simulation as
+soon as a cycle looks wrong, so failing runs stop early and memory stays
+flat no matter how long the program is.
+"""
+
+import re
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+# (line tag, key) -> (CycleRecord field, radix)
+# The testbench prints register numbers with %d and flags with %b.
+FIELD_MAP = {
+    ('IF', 'PC'): ('if_pc', 16),
+    ('IF', 'Instr'): ('if_instr', 16),
+    ('IF', 'Valid'): ('if_valid', 2),
+    ('ID', 'PC'): ('id_pc', 16),
+    ('ID', 'RS1'): ('id_rs1', 10),
+    ('ID', 'RS2'): ('id_rs2', 10),
+    ('ID', 'RD'): ('id_rd', 10),
+    ('ID', 'Valid'): ('id_valid', 2),
+    ('ID', 'RS1_data'): ('id_rs1_data', 16),
+    ('ID', 'RS2_data'): ('id_rs2_data', 16),
+    ('EX', 'ALU_Result'): ('ex_alu_result', 16),
+    ('EX', 'RD'): ('ex_rd', 10),
+    ('EX', 'Valid'): ('ex_valid', 2),
+    ('EX', 'FwdA'): ('fwd_a', 2),
+    ('EX', 'FwdB'): ('fwd_b', 2),
+    ('EX', 'ALU_OpA'): ('ex_op_a', 16),
+    ('EX', 'ALU_OpB'): ('ex_op_b', 16),
+    ('EX', 'ALUOp'): ('ex_alu_op', 16),
+    ('MEM', 'ALU_Result'): ('mem_alu_result', 16),
+    ('MEM', 'MemData'): ('mem_data', 16),
+    ('MEM', 'RD'): ('mem_rd', 10),
+    ('MEM', 'Valid'): ('mem_valid', 2),
+    ('WB', 'Data'): ('wb_data', 16),
+    ('WB', 'RD'): ('wb_rd', 10),
+    ('WB', 'Enable'): ('wb_enable', 2),
+    ('Hazard', 'StallIF'): ('stall_if', 2),
+    ('Hazard', 'StallID'): ('stall_id', 2),
+    ('Hazard', 'FlushEX'): ('flush_ex', 2),
+    ('Branch', 'Taken'): ('branch_taken', 2),
+    ('Branch', 'Target'): ('branch_target', 16),
+}
+
+CYCLE_RE = re.compile(r'^Cycle\s+(\d+)\s*:')
+TAG_RE = re.compile(r'^\s+(IF|ID|EX|MEM|WB|Hazard|Branch):')
+PAIR_RE = re.compile(r'(\w+)=\s*([0-9a-fA-FxXzZ]+)')
+REG_RE = re.compile(r'^x(\d+)\s*=\s*([0-9a-fA-FxXzZ]{8})\s*\((-?\d+|x|z)\)')
+
+
+@dataclass
+class CycleRecord:
+    """Pipeline state printed by tb_riscv_cpu.v for one clock cycle.
+
+    Values that were X/Z in simulation are None.
+    """
+    cycle: int
+    time: int
+    if_pc: Optional[int] = None
+    if_instr: Optional[int] = None
+    if_valid: Optional[int] = None
+    id_pc: Optional[int] = None
+    id_rs1: Optional[int] = None
+    id_rs2: Optional[int] = None
+    id_rd: Optional[int] = None
+    id_valid: Optional[int] = None
+    id_rs1_data: Optional[int] = None
+    id_rs2_data: Optional[int] = None
+    ex_alu_result: Optional[int] = None
+    ex_rd: Optional[int] = None
+    ex_valid: Optional[int] = None
+    fwd_a: Optional[int] = None
+    fwd_b: Optional[int] = None
+    ex_op_a: Optional[int] = None
+    ex_op_b: Optional[int] = None
+    ex_alu_op: Optional[int] = None
+    mem_alu_result: Optional[int] = None
+    mem_data: Optional[int] = None
+    mem_rd: Optional[int] = None
+    mem_valid: Optional[int] = None
+    wb_data: Optional[int] = None
+    wb_rd: Optional[int] = None
+    wb_enable: Optional[int] = None
+    stall_if: Optional[int] = None
+    stall_id: Optional[int] = None
+    flush_ex: Optional[int] = None
+    branch_taken: Optional[int] = None
+    branch_target: Optional[int] = None
+
+
+class SimulationAborted(Exception):
+    """Raised when a check rejects a cycle; the simulator has been killed"""
+
+    def __init__(self, record, message=None):
+        self.record = record
+        super().__init__(message or f"check failed at cycle {record.cycle} (t={record.time})")
+
+
+def parse_value(text, radix):
+    try:
+        return int(text, radix)
+    except ValueError:
+        return None  # X or Z
+
+
+class TraceParser:
+    """Incremental line parser; feed() returns a CycleRecord when one completes"""
+
+    def __init__(self):
+        self.registers = {}
+        self.cycles = 0
+        self._record = None
+        self._tag = None
+
+    def feed(self, line):
+        m = CYCLE_RE.match(line)
+        if m:
+            done = self._record
+            self._record = CycleRecord(cycle=self.cycles, time=int(m.group(1)))
+            self._tag = None
+            self.cycles += 1
+            return done
+
+        if self._record is not None:
+            m = TAG_RE.match(line)
+            if m:
+                self._tag = m.group(1)
+            elif not line.strip() or not line[0].isspace():
+                # The blank line after "Branch:" ends the cycle
+                done, self._record, self._tag = self._record, None, None
+                self._parse_register(line)
+                return done
+            if self._tag is not None:
+                for key, value in PAIR_RE.findall(line):
+                    target = FIELD_MAP.get((self._tag, key))
+                    if target:
+                        setattr(self._record, target[0], parse_value(value, target[1]))
+            return None
+
+        self._parse_register(line)
+        return None
+
+    def finish(self):
+        """Flush a cycle that was cut off by the end of the output"""
+        done, self._record = self._record, None
+        return done
+
+    def _parse_register(self, line):
+        m = REG_RE.match(line)
+        if m:
+            self.registers[f'x{int(m.group(1))}'] = parse_value(m.group(2), 16)
+
+
+def parse_lines(lines, check=None, parser=None):
+    """Yield CycleRecords from an iterable of text lines"""
+    parser = parser or TraceParser()
+    for line in lines:
+        record = parser.feed(line)
+        if record is not None:
+            if check is not None and not check(record):
+                raise SimulationAborted(record)
+            yield record
+    record = parser.finish()
+    if record is not None:
+        if check is not None and not check(record):
+            raise SimulationAborted(record)
+        yield record
+
+
+class StreamingSim:
+    """Run a simulator command and stream its per-cycle records
+
+        sim = StreamingSim(['vvp', 'riscv_cpu_sim', '+cycles=5000'],
+                           check=lambda r: r.if_pc is not None)
+        for record in sim:
+            ...
+        sim.registers  # final register dump, once iteration completes
+
+    When check(record) returns False the process is killed and
+    SimulationAborted is raised from the loop.
+    """
+
+    def __init__(self, cmd, cwd=None, check=None, timeout=None):
+        self.cmd = cmd
+        self.cwd = cwd
+        self.check = check
+        self.timeout = timeout
+        self.parser = TraceParser()
+        self.returncode = None
+        self.timed_out = False
+        self.aborted = None
+
+    @property
+    def registers(self):
+        return self.parser.registers
+
+    def __iter__(self):
+        proc = subprocess.Popen(self.cmd, cwd=self.cwd, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, text=True, bufsize=1)
+        timer = None
+        if self.timeout:
+            def expire():
+                self.timed_out = True
+                proc.kill()
+            timer = threading.Timer(self.timeout, expire)
+            timer.start()
+        try:
+            yield from parse_lines(proc.stdout, self.check, self.parser)
+        except SimulationAborted as e:
+            self.aborted = e.record
+            raise
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            self.returncode = proc.wait()
+            if timer:
+                timer.cancel()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stream and summarize CPU simulation output")
+    parser.add_argument('source', nargs='?', default='-',
+                        help="log file, '-' for stdin (e.g. `vvp riscv_cpu_sim | ...`)")
+    parser.add_argument('--cycles', action='store_true', help="print one line per cycle")
+    args = parser.parse_args()
+
+    stream = sys.stdin if args.source == '-' else open(args.source)
+    trace = TraceParser()
+    stalls = flushes = taken = 0
+    for record in parse_lines(stream, parser=trace):
+        stalls += bool(record.stall_if)
+        flushes += bool(record.flush_ex)
+        taken += bool(record.branch_taken)
+        if args.cycles:
+            pc = f"{record.if_pc:08x}" if record.if_pc is not None else "xxxxxxxx"
+            print(f"{record.cycle:5d} IF={pc} FwdA={record.fwd_a} FwdB={record.fwd_b} "
+                  f"Stall={record.stall_if} Flush={record.flush_ex} Br={record.branch_taken}")
+
+    print(f"Cycles: {trace.cycles}  stall cycles: {stalls}  flushes: {flushes}  "
+          f"taken branches: {taken}")
+    for name in sorted(trace.registers, key=lambda r: int(r[1:])):
+        value = trace.registers[name]
+        print(f"{name:3s} = {value:08x}" if value is not None else f"{name:3s} = xxxxxxxx")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
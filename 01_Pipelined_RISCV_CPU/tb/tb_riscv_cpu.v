@@ -9,6 +9,9 @@ module tb_riscv_cpu;
     reg clk;
     reg rst_n;
     
+    // Cycle budget, overridable at run time with +cycles=<n>
+    integer max_cycles;
+    
     // Clock generation - 100MHz
     initial begin
         clk = 0;
@@ -21,19 +24,146 @@ module tb_riscv_cpu;
         .rst_n (rst_n)
     );
     
-    // VCD dump for GTKWave
+    // VCD control: +novcd, +vcd=<file>, +dumpdepth=<n>, +dump=top (common/vcd_dump.vh)
+    //   +dump=pipeline  stage valids, hazards, forwarding and writeback only
+    //   +dump=units     ports of each pipeline stage and the hazard/forward units
+    task dump_subset(input [8*32-1:0] name, output found);
+        begin
+            found = 1;
+            if (name == "pipeline") begin
+                $dumpvars(1, tb_riscv_cpu);
+                $dumpvars(0, dut.if_pc, dut.if_instruction, dut.if_valid,
+                          dut.id_pc, dut.id_rd, dut.id_valid,
+                          dut.ex_alu_result, dut.ex_rd, dut.ex_valid,
+                          dut.mem_rd, dut.mem_valid,
+                          dut.wb_enable, dut.wb_rd, dut.wb_data,
+                          dut.stall_if, dut.stall_id, dut.flush_ex,
+                          dut.fwd_a_sel, dut.fwd_b_sel,
+                          dut.branch_taken, dut.branch_target);
+            end else if (name == "units") begin
+                $dumpvars(1, tb_riscv_cpu);
+                $dumpvars(1, dut.u_if);
+                $dumpvars(1, dut.u_id);
+                $dumpvars(1, dut.u_ex);
+                $dumpvars(1, dut.u_mem);
+                $dumpvars(1, dut.u_wb);
+                $dumpvars(1, dut.u_forward);
+                $dumpvars(1, dut.u_hazard);
+            end else
+                found = 0;
+        end
+    endtask
+    
+    `define VCD_DEFAULT_FILE "riscv_cpu.vcd"
+    `define VCD_TOP tb_riscv_cpu
+    `define VCD_SUBSETS
+    `include "vcd_dump.vh"
+    
+    // Commit log: +commitlog prints one line per instruction reaching WB
+    //   COMMIT <cycle> <pc> <rd> <value> <store bytes> <store addr> <store data>
+    // rd/value are 0 when nothing is written; store bytes is 0 for non-stores.
+    // The PC and store info are not carried past EX in the RTL, so they are
+    // shadowed here alongside the EX/MEM and MEM/WB registers.
+    // (consumed by commit_check.py)
+    reg         commit_log;
+    integer     cycle_count;
+    reg  [31:0] mem_pc_q, wb_pc_q;
+    reg  [2:0]  wb_st_bytes;
+    reg  [31:0] wb_st_addr, wb_st_data;
+    
+    initial commit_log = $test$plusargs("commitlog");
+    
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            cycle_count <= 0;
+            mem_pc_q    <= 32'b0;
+            wb_pc_q     <= 32'b0;
+            wb_st_bytes <= 3'd0;
+            wb_st_addr  <= 32'b0;
+            wb_st_data  <= 32'b0;
+        end else begin
+            if (commit_log && dut.mem_valid)
+                $display("COMMIT %0d %h %0d %h %0d %h %h", cycle_count, wb_pc_q,
+                         dut.wb_enable ? dut.wb_rd : 5'd0,
+                         dut.wb_enable ? dut.wb_data : 32'b0,
+                         wb_st_bytes, wb_st_addr, wb_st_data);
+            
+            cycle_count <= cycle_count + 1;
+            mem_pc_q    <= dut.flush_ex ? 32'b0 : dut.id_pc;
+            wb_pc_q     <= mem_pc_q;
+            if (dut.ex_mem_write && dut.ex_valid) begin
+                wb_st_addr <= {22'b0, dut.ex_alu_result[9:0]};
+                case (dut.ex_funct3)
+                    3'b000:  begin wb_st_bytes <= 3'd1; wb_st_data <= {24'b0, dut.ex_rs2_data[7:0]}; end
+                    3'b001:  begin wb_st_bytes <= 3'd2; wb_st_data <= {16'b0, dut.ex_rs2_data[15:0]}; end
+                    3'b010:  begin wb_st_bytes <= 3'd4; wb_st_data <= dut.ex_rs2_data; end
+                    default: begin wb_st_bytes <= 3'd0; wb_st_data <= 32'b0; end
+                endcase
+            end else begin
+                wb_st_bytes <= 3'd0;
+                wb_st_addr  <= 32'b0;
+                wb_st_data  <= 32'b0;
+            end
+        end
+    end
+    
+    // Checkpoint start: +checkpoint=<file> loads the PC, x1-x31 and data
+    // memory written by sampled_sim.py before reset is released. Word 0 is
+    // the PC, words 1-31 the registers, words 32-287 data memory.
+    // +window=<n> ends the run after n instructions have left EX, not
+    // counting the first +warmup=<n> cycles, and prints the window's stats.
+    reg [8*256-1:0] ckpt_file;
+    reg [31:0]  ckpt [0:287];
+    integer     window, warmup;
+    integer     win_cycles, win_instr, win_stalls, win_flushes, win_taken;
+    reg         window_done;
+    
+    task load_checkpoint;
+        integer i;
+        begin
+            $readmemh(ckpt_file, ckpt);
+            dut.u_if.reset_pc = ckpt[0];
+            for (i = 1; i < 32; i = i + 1)
+                dut.u_id.regfile[i] = ckpt[i];
+            for (i = 0; i < 256; i = i + 1) begin
+                dut.u_mem.dmem[4*i]   = ckpt[32+i][7:0];
+                dut.u_mem.dmem[4*i+1] = ckpt[32+i][15:8];
+                dut.u_mem.dmem[4*i+2] = ckpt[32+i][23:16];
+                dut.u_mem.dmem[4*i+3] = ckpt[32+i][31:24];
+            end
+            $display("INFO: Loaded checkpoint %0s (pc=%h)", ckpt_file, ckpt[0]);
+        end
+    endtask
+    
     initial begin
-        $dumpfile("riscv_cpu.vcd");
-        $dumpvars(0, tb_riscv_cpu);
-        
-        // Dump internal signals for pipeline visualization
-        $dumpvars(1, dut.u_if);
-        $dumpvars(1, dut.u_id);
-        $dumpvars(1, dut.u_ex);
-        $dumpvars(1, dut.u_mem);
-        $dumpvars(1, dut.u_wb);
-        $dumpvars(1, dut.u_forward);
-        $dumpvars(1, dut.u_hazard);
+        if (!$value$plusargs("window=%d", window))
+            window = 0;
+        if (!$value$plusargs("warmup=%d", warmup))
+            warmup = 0;
+        win_cycles = 0;
+        win_instr = 0;
+        win_stalls = 0;
+        win_flushes = 0;
+        win_taken = 0;
+        window_done = 0;
+    end
+    
+    // Same instruction count as pipeline_stats.py: an instruction is counted
+    // when it leaves EX (valid and not replaced by a load-use bubble)
+    always @(posedge clk) begin
+        if (rst_n && window > 0 && !window_done && cycle_count >= warmup) begin
+            win_cycles = win_cycles + 1;
+            if (dut.id_valid && !dut.flush_ex)
+                win_instr = win_instr + 1;
+            if (dut.stall_if)
+                win_stalls = win_stalls + 1;
+            if (dut.flush_ex)
+                win_flushes = win_flushes + 1;
+            if (dut.branch_taken)
+                win_taken = win_taken + 1;
+            if (win_instr >= window)
+                window_done = 1;
+        end
     end
     
     // Test sequence
@@ -42,40 +172,56 @@ module tb_riscv_cpu;
         $display("Pipelined RISC-V CPU Testbench");
         $display("===========================================");
         
+        if (!$value$plusargs("cycles=%d", max_cycles))
+            max_cycles = 100;
+        
         // Reset
         rst_n = 0;
+        #1;
+        if ($value$plusargs("checkpoint=%s", ckpt_file))
+            load_checkpoint;
         repeat(5) @(posedge clk);
         rst_n = 1;
         
         $display("\nStarting pipeline execution...\n");
         
-        // Run for enough cycles to execute test program
-        repeat(100) begin
-            @(posedge clk);
+        // Run for enough cycles to execute test program (or one window)
+        begin : run_loop
+            repeat(max_cycles) begin
+                @(posedge clk);
+                if (window_done)
+                    disable run_loop;
             
-            // Display pipeline status
-            $display("Cycle %0t:", $time);
-            $display("  IF:  PC=%h Instr=%h Valid=%b", 
-                    dut.if_pc, dut.if_instruction, dut.if_valid);
-            $display("  ID:  PC=%h RS1=%d RS2=%d RD=%d Valid=%b",
-                    dut.id_pc, dut.id_rs1_addr, dut.id_rs2_addr, dut.id_rd, dut.id_valid);
-            $display("       RS1_data=%h RS2_data=%h",
-                    dut.u_ex.rs1_data_in, dut.u_ex.rs2_data_in);
-            $display("  EX:  ALU_Result=%h RD=%d Valid=%b FwdA=%b FwdB=%b",
-                    dut.ex_alu_result, dut.ex_rd, dut.ex_valid, 
-                    dut.fwd_a_sel, dut.fwd_b_sel);
-            $display("       ALU_OpA=%h ALU_OpB=%h ALUOp=%h",
-                    dut.u_ex.alu_operand_a, dut.u_ex.alu_operand_b, dut.u_ex.alu_op_in);
-            $display("  MEM: ALU_Result=%h MemData=%h RD=%d Valid=%b",
-                    dut.mem_alu_result, dut.mem_mem_data, dut.mem_rd, dut.mem_valid);
-            $display("  WB:  Data=%h RD=%d Enable=%b",
-                    dut.wb_data, dut.wb_rd, dut.wb_enable);
-            $display("  Hazard: StallIF=%b StallID=%b FlushEX=%b",
-                    dut.stall_if, dut.stall_id, dut.flush_ex);
-            $display("  Branch: Taken=%b Target=%h\n",
-                    dut.branch_taken, dut.branch_target);
+                // Display pipeline status (the commit log replaces it)
+                if (!commit_log) begin
+                    $display("Cycle %0t:", $time);
+                    $display("  IF:  PC=%h Instr=%h Valid=%b", 
+                            dut.if_pc, dut.if_instruction, dut.if_valid);
+                    $display("  ID:  PC=%h RS1=%d RS2=%d RD=%d Valid=%b",
+                            dut.id_pc, dut.id_rs1_addr, dut.id_rs2_addr, dut.id_rd, dut.id_valid);
+                    $display("       RS1_data=%h RS2_data=%h",
+                            dut.u_ex.rs1_data_in, dut.u_ex.rs2_data_in);
+                    $display("  EX:  ALU_Result=%h RD=%d Valid=%b FwdA=%b FwdB=%b",
+                            dut.ex_alu_result, dut.ex_rd, dut.ex_valid, 
+                            dut.fwd_a_sel, dut.fwd_b_sel);
+                    $display("       ALU_OpA=%h ALU_OpB=%h ALUOp=%h",
+                            dut.u_ex.alu_operand_a, dut.u_ex.alu_operand_b, dut.u_ex.alu_op_in);
+                    $display("  MEM: ALU_Result=%h MemData=%h RD=%d Valid=%b",
+                            dut.mem_alu_result, dut.mem_mem_data, dut.mem_rd, dut.mem_valid);
+                    $display("  WB:  Data=%h RD=%d Enable=%b",
+                            dut.wb_data, dut.wb_rd, dut.wb_enable);
+                    $display("  Hazard: StallIF=%b StallID=%b FlushEX=%b",
+                            dut.stall_if, dut.stall_id, dut.flush_ex);
+                    $display("  Branch: Taken=%b Target=%h\n",
+                            dut.branch_taken, dut.branch_target);
+                end
+            end
         end
         
+        if (window > 0)
+            $display("WINDOW cycles=%0d instructions=%0d stalls=%0d flushes=%0d taken=%0d",
+                     win_cycles, win_instr, win_stalls, win_flushes, win_taken);
+        
         // Display final register file contents
         $display("\n===========================================");
         $display("Final Register File Contents:");
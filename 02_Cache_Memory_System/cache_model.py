@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+Trace-driven Cache Model
+Python model of direct_mapped_cache.v and set_associative_cache.v with the
+same tag/index/offset split, write-allocate + write-back dirty handling and
+LRU replacement, generalised to any size, associativity and block size.
+
+Addresses are processed in bulk as NumPy arrays. Direct-mapped and 2-way
+caches use a vectorized engine (hits and evictions derived from each
+set's access order); wider caches fall back to the per-access reference
+model. Traces are streamed in chunks with the cache contents carried
+between them, so 100M-access files run in constant memory, and the sweep
+driver spreads configurations over all cores.
+
+Trace files are packed little-endian records (TRACE_DTYPE, 5 bytes):
+    addr u32, write u8
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools')
+
+TRACE_DTYPE = np.dtype([('addr', '<u4'), ('write', 'u1')])
+CHUNK = 1 << 22
+
+# RTL configurations (cache_pkg.v)
+CACHE_SIZE = 1024
+BLOCK_SIZE = 32
+RTL_CONFIGS = {'dm': (CACHE_SIZE, 1, BLOCK_SIZE), 'sa': (CACHE_SIZE, 2, BLOCK_SIZE)}
+
+STAT_RE = re.compile(r'^(Direct-Mapped|Set-Associative) Cache:|^\s+(Hits|Misses|Fills|Writebacks):\s+(\d+)',
+                     re.M)
+
+
+def log2(n):
+    bits = int(n).bit_length() - 1
+    if n <= 0 or 1 << bits != n:
+        raise ValueError(f"{n} is not a power of two")
+    return bits
+
+
+def geometry(size, ways, block):
+    """(number of sets, offset bits, index bits) of a cache configuration"""
+    sets = size // (ways * block)
+    if sets < 1 or sets * ways * block != size:
+        raise ValueError(f"{size}B cache cannot hold {ways} ways of {block}B blocks")
+    return sets, log2(block), log2(sets)
+
+
+class ReferenceCache:
+    """Per-access model: each set is a list of [block, dirty], LRU first
+
+    Matches the RTL's replacement: a 2-way set fills an invalid way before
+    evicting, and the lru bit always names the least recently used way.
+    """
+
+    def __init__(self, size=CACHE_SIZE, ways=1, block=BLOCK_SIZE):
+        self.size, self.ways, self.block = size, ways, block
+        self.n_sets, self.offset_bits, _ = geometry(size, ways, block)
+        self.sets = [[] for _ in range(self.n_sets)]
+        self.counts = dict.fromkeys(('reads', 'writes', 'read_hits', 'write_hits',
+                                     'dirty_evictions'), 0)
+
+    def access(self, addr, write):
+        """One access; returns True on a hit"""
+        blk = addr >> self.offset_bits
+        lines = self.sets[blk & (self.n_sets - 1)]
+        self.counts['writes' if write else 'reads'] += 1
+        for i, line in enumerate(lines):
+            if line[0] == blk:
+                if i != len(lines) - 1:
+                    lines.append(lines.pop(i))
+                if write:
+                    line[1] = True
+                self.counts['write_hits' if write else 'read_hits'] += 1
+                return True
+        if len(lines) == self.ways:
+            if lines.pop(0)[1]:
+                self.counts['dirty_evictions'] += 1
+        lines.append([blk, bool(write)])
+        return False
+
+    def run(self, addr, write):
+        access = self.access
+        for a, w in zip(np.asarray(addr).tolist(), np.asarray(write).tolist()):
+            access(a, w)
+
+    def resident(self):
+        """[(set, [(block, dirty), ...LRU first])] of the current contents"""
+        return [(s, [tuple(line) for line in lines]) for s, lines in enumerate(self.sets) if lines]
+
+
+class CacheModel:
+    """Chunked bulk model; vectorized for 1- and 2-way caches
+
+    writebacks=False reproduces the RTL under tb_cache_system.v: its
+    one-cycle cpu_read/cpu_write strobe is already low in COMPARE, so
+    cache_miss and needs_writeback stay 0 and dirty victims are dropped
+    instead of written back. Hits, misses and fills are unaffected.
+    """
+
+    def __init__(self, size=CACHE_SIZE, ways=1, block=BLOCK_SIZE, writebacks=True):
+        self.size, self.ways, self.block = size, ways, block
+        self.writebacks = writebacks
+        self.n_sets, self.offset_bits, _ = geometry(size, ways, block)
+        self.vectorized = ways <= 2
+        if self.vectorized:
+            # Resident blocks per set, column 0 = LRU ... ways-1 = MRU, -1 = invalid
+            self.state_blk = np.full((self.n_sets, ways), -1, dtype=np.int64)
+            self.state_dirty = np.zeros((self.n_sets, ways), dtype=bool)
+            self.counts = dict.fromkeys(('reads', 'writes', 'read_hits', 'write_hits',
+                                         'dirty_evictions'), 0)
+        else:
+            self.reference = ReferenceCache(size, ways, block)
+            self.counts = self.reference.counts
+
+    def run(self, addr, write, chunk=CHUNK):
+        """Feed accesses; may be called repeatedly on consecutive pieces of a trace"""
+        for start in range(0, len(addr), chunk):
+            a = np.asarray(addr[start:start + chunk])
+            w = np.asarray(write[start:start + chunk]) != 0
+            if self.vectorized:
+                self._run_chunk(a, w)
+            else:
+                self.reference.run(a, w)
+
+    def _run_chunk(self, addr, write):
+        # Carry the current contents in as leading "virtual" accesses, LRU
+        # first and marked as writes when dirty; they are not counted.
+        valid = self.state_blk >= 0
+        carry_blk = self.state_blk[valid]
+        carry_dirty = self.state_dirty[valid]
+        n_carry = len(carry_blk)
+
+        blk = np.concatenate([carry_blk, addr.astype(np.int64) >> self.offset_bits])
+        wr = np.concatenate([carry_dirty, write])
+        real = np.arange(len(blk)) >= n_carry
+        n = len(blk)
+        if n == 0:
+            return
+
+        # Each set's accesses in time order
+        order = np.argsort(blk & (self.n_sets - 1), kind='stable')
+        b, w, r = blk[order], wr[order], real[order]
+        s = b & (self.n_sets - 1)
+        pos = np.arange(n)
+        set_start = np.ones(n, dtype=bool)
+        set_start[1:] = s[1:] != s[:-1]
+
+        # Previous access to the same block (sets are a function of the block)
+        by_blk = np.argsort(b, kind='stable')
+        same = b[by_blk[1:]] == b[by_blk[:-1]]
+        prev = np.full(n, -1, dtype=np.int64)
+        prev[by_blk[1:][same]] = by_blk[:-1][same]
+
+        # Runs of consecutive accesses to one block within a set
+        new_run = set_start.copy()
+        new_run[1:] |= b[1:] != b[:-1]
+        run_start = np.maximum.accumulate(np.where(new_run, pos, 0))
+
+        if self.ways == 1:
+            hit = (prev >= 0) & (prev == pos - 1)
+        else:
+            # 2-way LRU: a hit iff at most one other block was used in the set
+            # since this block's previous access
+            before = np.empty(n, dtype=np.int64)
+            before[0] = 0
+            before[1:] = run_start[:-1]
+            hit = (prev >= 0) & (before <= prev + 1)
+
+        # Residencies start at misses; a dirty residency that does not survive
+        # to the end of the chunk was evicted with a writeback
+        res_flag = ~hit[by_blk]
+        res_sorted = np.cumsum(res_flag) - 1
+        res = np.empty(n, dtype=np.int64)
+        res[by_blk] = res_sorted
+        dirty_res = np.bincount(res, weights=w, minlength=res_sorted[-1] + 1) > 0
+
+        set_end = np.flatnonzero(np.r_[set_start[1:], True])
+        mru = set_end
+        residents = [mru]
+        if self.ways == 2:
+            lru = run_start[set_end] - 1
+            has_lru = (lru >= 0) & ~set_start[np.maximum(run_start[set_end], 0)]
+            residents.append(lru[has_lru])
+        resident_pos = np.concatenate(residents)
+        evicted_dirty = int(dirty_res.sum()) - int(dirty_res[res[resident_pos]].sum())
+
+        c = self.counts
+        c['reads'] += int((r & ~w).sum())
+        c['writes'] += int((r & w).sum())
+        c['read_hits'] += int((r & ~w & hit).sum())
+        c['write_hits'] += int((r & w & hit).sum())
+        c['dirty_evictions'] += evicted_dirty
+
+        # New contents
+        self.state_blk.fill(-1)
+        self.state_dirty.fill(False)
+        sets = s[set_end]
+        self.state_blk[sets, self.ways - 1] = b[mru]
+        self.state_dirty[sets, self.ways - 1] = dirty_res[res[mru]]
+        if self.ways == 2:
+            sets_lru = s[lru[has_lru]]
+            self.state_blk[sets_lru, 0] = b[lru[has_lru]]
+            self.state_dirty[sets_lru, 0] = dirty_res[res[lru[has_lru]]]
+
+    def dirty_lines(self):
+        if self.vectorized:
+            return int(self.state_dirty.sum())
+        return sum(line[1] for lines in self.reference.sets for line in lines)
+
+    def stats(self):
+        c = self.counts
+        accesses = c['reads'] + c['writes']
+        hits = c['read_hits'] + c['write_hits']
+        misses = accesses - hits
+        writebacks = c['dirty_evictions'] if self.writebacks else 0
+        return {
+            'size': self.size,
+            'ways': self.ways,
+            'block': self.block,
+            'sets': self.n_sets,
+            'accesses': accesses,
+            'reads': c['reads'],
+            'writes': c['writes'],
+            'hits': hits,
+            'misses': misses,
+            'read_hits': c['read_hits'],
+            'read_misses': c['reads'] - c['read_hits'],
+            'write_misses': c['writes'] - c['write_hits'],
+            'hit_rate': round(hits / accesses, 6) if accesses else None,
+            'fills': misses,
+            'writebacks': writebacks,
+            'dirty_evictions': c['dirty_evictions'],
+            'dirty_at_end': self.dirty_lines(),
+            'bytes_read': misses * self.block,
+            'bytes_written': writebacks * self.block,
+            'traffic_bytes': (misses + writebacks) * self.block,
+        }
+
+
+def simulate(trace, size=CACHE_SIZE, ways=1, block=BLOCK_SIZE, writebacks=True, chunk=CHUNK):
+    """Run a whole trace (array or memmap of TRACE_DTYPE) and return its stats"""
+    model = CacheModel(size, ways, block, writebacks)
+    for start in range(0, len(trace), chunk):
+        piece = trace[start:start + chunk]
+        model.run(piece['addr'], piece['write'], chunk)
+    return model.stats()
+
+
+# ---------------------------------------------------------------------------
+# Traces
+# ---------------------------------------------------------------------------
+
+def make_trace(addr, write):
+    trace = np.zeros(len(addr), dtype=TRACE_DTYPE)
+    trace['addr'] = addr
+    trace['write'] = write
+    return trace
+
+
+def read_trace(path):
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=TRACE_DTYPE)
+    return np.memmap(path, dtype=TRACE_DTYPE, mode='r')
+
+
+def write_trace(path, trace):
+    np.asarray(trace, dtype=TRACE_DTYPE).tofile(path)
+
+
+# tb_cache_system.v stimulus: (address, write); the testbench counts hits
+# and misses of the reads only
+TESTBENCH_ACCESSES = [
+    (0x000, 0), (0x004, 0), (0x020, 0),
+    (0x000, 1), (0x000, 0),
+    (0x400, 0), (0x000, 0),
+    (0x000, 0), (0x200, 0), (0x400, 0),
+    (0x800, 1), (0xA00, 1),
+]
+
+
+def testbench_trace():
+    addr, write = zip(*TESTBENCH_ACCESSES)
+    return make_trace(addr, write)
+
+
+def synthetic_trace(n, seed=None, write_fraction=0.3, footprint=1 << 20):
+    """Mix of sequential streams, strided walks, a hot working set and
+    uniformly random accesses, interleaved in bursts"""
+    rng = np.random.default_rng(seed)
+    kind = rng.choice(4, size=n, p=[0.35, 0.15, 0.4, 0.1])
+    burst = np.repeat(rng.integers(0, 4, size=n // 16 + 1), 16)[:n]
+    kind = np.where(rng.random(n) < 0.8, burst, kind)
+
+    i = np.arange(n, dtype=np.int64)
+    stream_base = rng.integers(0, footprint // 4, size=4) * 4
+    sequential = stream_base[i % 4] + (i // 4) * 4
+    strided = (i * 1028) % footprint
+    hot = rng.integers(0, 4096 // 4, size=n) * 4 + 0x10000
+    uniform = rng.integers(0, footprint // 4, size=n) * 4
+    addr = np.select([kind == 0, kind == 1, kind == 2], [sequential, strided, hot], uniform)
+    return make_trace(addr % footprint, rng.random(n) < write_fraction)
+
+
+def load_source(spec, length=1_000_000, seed=1):
+    """A trace from a file path, 'synthetic' or 'testbench'"""
+    if spec == 'testbench':
+        return testbench_trace()
+    if spec == 'synthetic':
+        return synthetic_trace(length, seed)
+    return read_trace(spec)
+
+
+# ---------------------------------------------------------------------------
+# Sweep and RTL cross-check
+# ---------------------------------------------------------------------------
+
+def _sweep_job(args):
+    path, size, ways, block = args
+    start = time.perf_counter()
+    stats = simulate(read_trace(path), size, ways, block)
+    stats['elapsed'] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def sweep(trace_path, sizes, ways_list, blocks, workers=None):
+    """Every valid (size, ways, block) combination, in parallel"""
+    jobs = []
+    for size, ways, block in itertools.product(sizes, ways_list, blocks):
+        try:
+            geometry(size, ways, block)
+        except ValueError:
+            continue
+        jobs.append((trace_path, size, ways, block))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_sweep_job, jobs))
+
+
+def parse_rtl_output(output):
+    """{'dm': {...}, 'sa': {...}} statistics printed by tb_cache_system.v"""
+    stats = {}
+    current = None
+    for m in STAT_RE.finditer(output):
+        if m.group(1):
+            current = stats.setdefault('dm' if m.group(1) == 'Direct-Mapped' else 'sa', {})
+        elif current is not None:
+            current[m.group(2).lower()] = int(m.group(3))
+    return stats
+
+
+def expected_rtl_stats(trace):
+    """What tb_cache_system.v should print for a trace (read hits/misses only)"""
+    expected = {}
+    for name, (size, ways, block) in RTL_CONFIGS.items():
+        s = simulate(trace, size, ways, block, writebacks=False)
+        expected[name] = {'hits': s['read_hits'], 'misses': s['read_misses'],
+                          'fills': s['fills'], 'writebacks': s['writebacks']}
+    return expected
+
+
+def crosscheck(timeout=120):
+    """Run tb_cache_system.v and compare its statistics with the model
+
+    Returns (rtl, expected) dicts keyed by 'dm' / 'sa'.
+    """
+    sys.path.insert(0, TOOLS_DIR)
+    from sim_cache import compile_project, run_binary
+    from sim_projects import find_project
+
+    binary = compile_project(find_project('02'))
+    with tempfile.TemporaryDirectory(prefix='cache-crosscheck-') as scratch:
+        returncode, output, timed_out = run_binary(binary, scratch, ['+novcd'], timeout)
+    if timed_out or returncode != 0:
+        raise RuntimeError(f"RTL simulation failed ({'timeout' if timed_out else returncode})")
+    return parse_rtl_output(output), expected_rtl_stats(testbench_trace())
+
+
+def parse_sizes(text):
+    return [int(v, 0) for v in text.split(',')]
+
+
+def format_table(results):
+    lines = [f"{'Size':>8s} {'Ways':>4s} {'Block':>5s} {'Hit rate':>9s} {'Misses':>11s} "
+             f"{'Writebacks':>11s} {'Traffic MB':>10s} {'Time':>7s}", "-" * 80]
+    for r in sorted(results, key=lambda r: (r['size'], r['ways'], r['block'])):
+        lines.append(f"{r['size']:8d} {r['ways']:4d} {r['block']:5d} {r['hit_rate'] * 100:8.2f}% "
+                     f"{r['misses']:11d} {r['writebacks']:11d} "
+                     f"{r['traffic_bytes'] / 1e6:10.2f} {r.get('elapsed', 0):6.2f}s")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trace-driven cache model")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p = sub.add_parser('gen', help="write a binary trace file")
+    p.add_argument('source', help="'synthetic' or 'testbench'")
+    p.add_argument('output')
+    p.add_argument('-n', '--length', type=int, default=10_000_000)
+    p.add_argument('-s', '--seed', type=int, default=1)
+
+    p = sub.add_parser('run', help="evaluate one configuration")
+    p.add_argument('source', help="trace file, 'synthetic' or 'testbench'")
+    p.add_argument('--size', type=int, default=CACHE_SIZE)
+    p.add_argument('--ways', type=int, default=1)
+    p.add_argument('--block', type=int, default=BLOCK_SIZE)
+    p.add_argument('--rtl', action='store_true',
+                   help="drop dirty victims like the RTL under tb_cache_system.v")
+    p.add_argument('-n', '--length', type=int, default=10_000_000)
+    p.add_argument('-s', '--seed', type=int, default=1)
+
+    p = sub.add_parser('sweep', help="evaluate many configurations in parallel")
+    p.add_argument('source')
+    p.add_argument('--size', type=parse_sizes, default=[1024, 4096, 16384, 65536])
+    p.add_argument('--ways', type=parse_sizes, default=[1, 2, 4])
+    p.add_argument('--block', type=parse_sizes, default=[16, 32, 64])
+    p.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+    p.add_argument('-n', '--length', type=int, default=10_000_000)
+    p.add_argument('-s', '--seed', type=int, default=1)
+    p.add_argument('--json', help="write results here")
+
+    sub.add_parser('crosscheck', help="compare the model with tb_cache_system.v")
+    args = parser.parse_args()
+
+    if args.cmd == 'gen':
+        trace = load_source(args.source, args.length, args.seed)
+        write_trace(args.output, trace)
+        print(f"✓ Wrote {len(trace)} accesses to {args.output}")
+        return 0
+
+    if args.cmd == 'run':
+        trace = load_source(args.source, args.length, args.seed)
+        start = time.perf_counter()
+        stats = simulate(trace, args.size, args.ways, args.block, writebacks=not args.rtl)
+        elapsed = time.perf_counter() - start
+        print("=" * 80)
+        print(f"CACHE MODEL - {args.size}B, {args.ways}-way, {args.block}B blocks")
+        print("=" * 80)
+        for key, value in stats.items():
+            print(f"{key:16s} {value}")
+        print(f"{'accesses/s':16s} {len(trace) / elapsed:,.0f}")
+        return 0
+
+    if args.cmd == 'sweep':
+        if os.path.isfile(args.source):
+            path, tmp = args.source, None
+        else:
+            fd, tmp = tempfile.mkstemp(suffix='.ctr')
+            os.close(fd)
+            write_trace(tmp, load_source(args.source, args.length, args.seed))
+            path = tmp
+        try:
+            start = time.perf_counter()
+            results = sweep(path, args.size, args.ways, args.block, args.jobs)
+            elapsed = time.perf_counter() - start
+        finally:
+            if tmp:
+                os.unlink(tmp)
+        print("=" * 80)
+        print(f"CACHE SWEEP - {len(results)} configurations, {results[0]['accesses']} accesses")
+        print("=" * 80)
+        print(format_table(results))
+        print(f"\nWall time {elapsed:.2f}s on {args.jobs} workers")
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Wrote {args.json}")
+        return 0
+
+    # crosscheck
+    rtl, expected = crosscheck()
+    print("=" * 80)
+    print("CACHE CROSS-CHECK - tb_cache_system.v stimulus")
+    print("=" * 80)
+    failures = 0
+    for name, label in (('dm', 'Direct-Mapped'), ('sa', 'Set-Associative')):
+        for key, value in expected[name].items():
+            got = rtl.get(name, {}).get(key)
+            ok = got == value
+            failures += not ok
+            print(f"{'✓' if ok else '✗'} {label:16s} {key:11s} RTL={got} model={value}")
+    if failures:
+        print(f"✗ {failures} mismatches")
+        return 1
+    print("✓ RTL and model agree")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -49,6 +49,8 @@ module tb_cache_system;
     // Statistics
     integer dm_hits, dm_misses;
     integer sa_hits, sa_misses;
+    integer dm_fills, dm_writebacks;
+    integer sa_fills, sa_writebacks;
     
     // Clock generation
     initial begin
@@ -130,10 +132,38 @@ module tb_cache_system;
         .ready (sa_mem_ready)
     );
     
-    // VCD dump
-    initial begin
-        $dumpfile("cache_system.vcd");
-        $dumpvars(0, tb_cache_system);
+    // VCD control: +novcd, +vcd=<file>, +dumpdepth=<n>, +dump=top (common/vcd_dump.vh)
+    //   +dump=status    CPU requests, hit/miss/eviction status and memory
+    //                   handshakes of both caches (no line data or arrays)
+    task dump_subset(input [8*32-1:0] name, output found);
+        begin
+            found = 1;
+            if (name == "status")
+                $dumpvars(0, clk, rst_n, cpu_addr, cpu_wdata, cpu_read, cpu_write,
+                          dm_cpu_rdata, dm_cpu_ready, dm_hit, dm_miss, dm_dirty_evict,
+                          dm_index, dm_tag, dm_valid, dm_dirty,
+                          dm_mem_addr, dm_mem_read, dm_mem_write, dm_mem_ready,
+                          sa_cpu_rdata, sa_cpu_ready, sa_hit, sa_miss, sa_dirty_evict,
+                          sa_hit_way, sa_lru_way, sa_index, sa_tag,
+                          sa_mem_addr, sa_mem_read, sa_mem_write, sa_mem_ready);
+            else
+                found = 0;
+        end
+    endtask
+    
+    `define VCD_DEFAULT_FILE "cache_system.vcd"
+    `define VCD_TOP tb_cache_system
+    `define VCD_SUBSETS
+    `include "vcd_dump.vh"
+    
+    // Memory traffic: count block transfers as the memory completes them
+    always @(posedge clk) begin
+        if (rst_n) begin
+            if (dm_mem_ready && dm_mem_read)  dm_fills = dm_fills + 1;
+            if (dm_mem_ready && dm_mem_write) dm_writebacks = dm_writebacks + 1;
+            if (sa_mem_ready && sa_mem_read)  sa_fills = sa_fills + 1;
+            if (sa_mem_ready && sa_mem_write) sa_writebacks = sa_writebacks + 1;
+        end
     end
     
     // Task: Read from cache
@@ -205,6 +235,10 @@ module tb_cache_system;
         dm_misses = 0;
         sa_hits = 0;
         sa_misses = 0;
+        dm_fills = 0;
+        dm_writebacks = 0;
+        sa_fills = 0;
+        sa_writebacks = 0;
         
         repeat(10) @(posedge clk);
         rst_n = 1;
@@ -261,11 +295,15 @@ module tb_cache_system;
         $display("  Hits:   %0d", dm_hits);
         $display("  Misses: %0d", dm_misses);
         $display("  Hit Rate: %0.1f%%", 100.0 * dm_hits / (dm_hits + dm_misses));
+        $display("  Fills:      %0d", dm_fills);
+        $display("  Writebacks: %0d", dm_writebacks);
         $display("");
         $display("Set-Associative Cache:");
         $display("  Hits:   %0d", sa_hits);
         $display("  Misses: %0d", sa_misses);
         $display("  Hit Rate: %0.1f%%", 100.0 * sa_hits / (sa_hits + sa_misses));
+        $display("  Fills:      %0d", sa_fills);
+        $display("  Writebacks: %0d", sa_writebacks);
         $display("");
         $display("View waveforms: gtkwave cache_system.vcd");
         $display("===========================================");
@@ -0,0 +1,581 @@
+#!/usr/bin/env python3
+"""
+Trace-driven Model of the GShare Predictor and BTB
+Bit-exact Python model of rtl/gshare_predictor.v and rtl/btb.v as wired by
+rtl/branch_predictor.v, generalised to any GHR width, PHT size and BTB
+size. Branch traces of millions of records are read from binary files or
+produced by generators, and evaluated either by a per-record reference
+model or by a vectorized NumPy engine. A sweep driver runs many
+configurations in parallel and reports MPKI; a cross-check mode replays a
+trace sample through the RTL testbench (+trace=) and compares every
+prediction.
+
+Trace files are raw little-endian records (TRACE_DTYPE, 12 bytes):
+    pc u32, target u32, taken u8, kind u8 (0 branch, 1 jump), insts u16
+where insts is the number of instructions retired since the previous
+record, including this one (used for MPKI).
+"""
+
+import argparse
+import itertools
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools')
+
+TRACE_DTYPE = np.dtype([('pc', '<u4'), ('target', '<u4'), ('taken', 'u1'),
+                        ('kind', 'u1'), ('insts', '<u2')])
+KIND_BRANCH = 0
+KIND_JUMP = 1
+
+# RTL configuration (gshare_predictor.v / btb.v)
+RTL_GHR_BITS = 8
+RTL_PHT_ENTRIES = 256
+RTL_BTB_ENTRIES = 64
+TB_TRACE_MAX = 65536    # trace_mem depth in tb_branch_predictor.v
+
+# 2-bit saturating counter states
+SN, WN, WT, ST = range(4)
+
+BRANCH_RE = re.compile(r'Branch PC=([0-9a-fA-F]+): Predicted=([01x]), Actual=([01x]) '
+                       r'\[(CORRECT|WRONG)\]\s+GHR=([01x]+) Counter=\s*(\d+|x)')
+
+
+def log2(n):
+    bits = int(n).bit_length() - 1
+    if n <= 0 or 1 << bits != n:
+        raise ValueError(f"{n} is not a power of two")
+    return bits
+
+
+# ---------------------------------------------------------------------------
+# Reference model: one record at a time, mirroring the RTL
+# ---------------------------------------------------------------------------
+
+class GsharePredictor:
+    """gshare_predictor.v: GHR and PHT of 2-bit counters, reset to WN"""
+
+    def __init__(self, ghr_bits=RTL_GHR_BITS, pht_entries=RTL_PHT_ENTRIES):
+        self.ghr_mask = (1 << ghr_bits) - 1
+        self.index_mask = pht_entries - 1
+        log2(pht_entries)
+        self.ghr = 0
+        self.pht = [WN] * pht_entries
+
+    def index(self, pc):
+        return ((pc >> 2) ^ self.ghr) & self.index_mask
+
+    def predict(self, pc):
+        return self.pht[self.index(pc)] >= WT
+
+    def update(self, pc, taken):
+        i = self.index(pc)
+        c = self.pht[i]
+        self.pht[i] = min(c + 1, ST) if taken else max(c - 1, SN)
+        self.ghr = ((self.ghr << 1) | taken) & self.ghr_mask
+
+
+class BranchTargetBuffer:
+    """btb.v: direct-mapped, indexed by pc[k+1:2], tagged with the rest"""
+
+    def __init__(self, entries=RTL_BTB_ENTRIES):
+        self.index_bits = log2(entries)
+        self.valid = [False] * entries
+        self.tags = [0] * entries
+        self.targets = [0] * entries
+
+    def lookup(self, pc):
+        i = (pc >> 2) & ((1 << self.index_bits) - 1)
+        hit = self.valid[i] and self.tags[i] == pc >> (self.index_bits + 2)
+        return hit, self.targets[i]
+
+    def update(self, pc, target):
+        i = (pc >> 2) & ((1 << self.index_bits) - 1)
+        self.valid[i] = True
+        self.tags[i] = pc >> (self.index_bits + 2)
+        self.targets[i] = target
+
+
+class BranchPredictor:
+    """branch_predictor.v: predict taken only on a BTB hit and a taken counter"""
+
+    def __init__(self, ghr_bits=RTL_GHR_BITS, pht_entries=RTL_PHT_ENTRIES,
+                 btb_entries=RTL_BTB_ENTRIES):
+        self.gshare = GsharePredictor(ghr_bits, pht_entries)
+        self.btb = BranchTargetBuffer(btb_entries)
+
+    def predict(self, pc):
+        """(predict_taken, predict_target, btb_hit)"""
+        hit, target = self.btb.lookup(pc)
+        return hit and self.gshare.predict(pc), target, hit
+
+    def resolve(self, pc, taken, target, is_branch=True):
+        if is_branch:
+            self.gshare.update(pc, taken)
+        self.btb.update(pc, target)
+
+
+def reference_run(trace, ghr_bits=RTL_GHR_BITS, pht_entries=RTL_PHT_ENTRIES,
+                  btb_entries=RTL_BTB_ENTRIES):
+    """Per-record model; yields what tb_branch_predictor.v prints per branch
+
+    (predicted, ghr, counter) where ghr and counter are sampled like the
+    testbench's $display: before this branch's update, and counter read at
+    pc[9:2] of the previously resolved branch (resolve_pc has not changed yet).
+    """
+    bp = BranchPredictor(ghr_bits, pht_entries, btb_entries)
+    last_pc = 0
+    for pc, target, taken, kind in zip(trace['pc'].tolist(), trace['target'].tolist(),
+                                       trace['taken'].tolist(), trace['kind'].tolist()):
+        predicted, _, _ = bp.predict(pc)
+        counter = bp.gshare.pht[bp.gshare.index(last_pc)]
+        yield predicted, bp.gshare.ghr, counter
+        bp.resolve(pc, taken, target, kind == KIND_BRANCH)
+        last_pc = pc
+
+
+# ---------------------------------------------------------------------------
+# Vectorized engine
+# ---------------------------------------------------------------------------
+
+def history(taken, is_branch, bits):
+    """GHR value in front of every record: earlier conditional outcomes"""
+    outcomes = taken[is_branch].astype(np.int64)
+    before = np.cumsum(is_branch) - is_branch     # conditional branches before each record
+    ghr = np.zeros(len(taken), dtype=np.int64)
+    for k in range(1, bits + 1):
+        j = before - k
+        ok = j >= 0
+        ghr[ok] |= outcomes[j[ok]] << (k - 1)
+    return ghr
+
+
+def counter_before(index, taken, is_branch):
+    """PHT counter each record reads, by a segmented scan over the PHT index
+
+    Each conditional branch applies x -> clamp(x +/- 1, 0, 3) to its entry,
+    everything else the identity. Compositions of clamps are clamps
+    (a, lo, hi), so a Hillis-Steele scan over records grouped by entry gives
+    every entry's state in log2(n) vector passes.
+    """
+    n = len(index)
+    order = np.argsort(index, kind='stable')
+    key = index[order]
+    step = np.where(is_branch[order], np.where(taken[order] != 0, 1, -1), 0).astype(np.int8)
+    a = step.copy()
+    lo = np.zeros(n, dtype=np.int8)
+    hi = np.full(n, ST, dtype=np.int8)
+
+    d = 1
+    while d < n:
+        same = key[d:] == key[:-d]
+        if not same.any():
+            break
+        # prefix(i) = element(i) after prefix(i - d)
+        pa, plo, phi = a[:-d], lo[:-d], hi[:-d]
+        ea, elo, ehi = a[d:], lo[d:], hi[d:]
+        na = np.clip(pa + ea, -4, 4)
+        nlo = np.clip(plo + ea, elo, ehi)
+        nhi = np.clip(phi + ea, elo, ehi)
+        a[d:] = np.where(same, na, ea)
+        lo[d:] = np.where(same, nlo, elo)
+        hi[d:] = np.where(same, nhi, ehi)
+        d *= 2
+
+    # Exclusive result: apply the prefix of the previous record to the reset value
+    state = np.full(n, WN, dtype=np.int8)
+    first = np.ones(n, dtype=bool)
+    first[1:] = key[1:] != key[:-1]
+    prev = np.flatnonzero(~first)
+    state[prev] = np.clip(WN + a[prev - 1], lo[prev - 1], hi[prev - 1])
+    out = np.empty(n, dtype=np.int8)
+    out[order] = state
+    return out
+
+
+def btb_lookup(pc, target, entries):
+    """(hit, predicted target) for every record; every record updates the BTB"""
+    bits = log2(entries)
+    index = (pc >> 2) & (entries - 1)
+    tag = pc >> (bits + 2)
+    order = np.argsort(index, kind='stable')
+    hit = np.zeros(len(pc), dtype=bool)
+    pred = np.zeros(len(pc), dtype=np.uint32)
+    s_index, s_tag, s_target = index[order], tag[order], target[order]
+    same = s_index[1:] == s_index[:-1]
+    hit[order[1:]] = same & (s_tag[1:] == s_tag[:-1])
+    pred[order[1:]] = np.where(same, s_target[:-1], 0)
+    return hit, pred
+
+
+def simulate(trace, ghr_bits=RTL_GHR_BITS, pht_entries=RTL_PHT_ENTRIES,
+             btb_entries=RTL_BTB_ENTRIES, detail=False):
+    """Evaluate a whole trace with the vectorized engine; returns a stats dict"""
+    log2(pht_entries)
+    pc = np.asarray(trace['pc'], dtype=np.int64)
+    target = np.asarray(trace['target'], dtype=np.uint32)
+    taken = np.asarray(trace['taken']) != 0
+    is_branch = np.asarray(trace['kind']) == KIND_BRANCH
+
+    ghr = history(taken, is_branch, ghr_bits)
+    index = ((pc >> 2) ^ ghr) & (pht_entries - 1)
+    counter = counter_before(index, taken, is_branch)
+    hit, pred_target = btb_lookup(pc, target, btb_entries)
+    predicted = hit & (counter >= WT)
+    wrong = predicted != taken
+
+    stats = summarize(trace, wrong, hit, predicted & taken & (pred_target != target))
+    stats.update(ghr_bits=ghr_bits, pht_entries=pht_entries, btb_entries=btb_entries)
+    if detail:
+        stats['predicted'] = predicted
+        stats['ghr'] = ghr
+    return stats
+
+
+def summarize(trace, wrong, hit, target_wrong):
+    records = len(trace)
+    insts = int(np.asarray(trace['insts'], dtype=np.int64).sum()) or records
+    is_branch = np.asarray(trace['kind']) == KIND_BRANCH
+    mispredicts = int(wrong.sum())
+    return {
+        'records': records,
+        'branches': int(is_branch.sum()),
+        'instructions': insts,
+        'mispredictions': mispredicts,
+        'branch_mispredictions': int((wrong & is_branch).sum()),
+        'target_mispredictions': int(target_wrong.sum()),
+        'accuracy': round(1 - mispredicts / records, 6) if records else None,
+        'mpki': round(mispredicts * 1000 / insts, 4) if insts else None,
+        'btb_hit_rate': round(float(hit.mean()), 6) if records else None,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Traces
+# ---------------------------------------------------------------------------
+
+def make_trace(pc, target, taken, kind=None, insts=None):
+    trace = np.zeros(len(pc), dtype=TRACE_DTYPE)
+    trace['pc'] = pc
+    trace['target'] = target
+    trace['taken'] = taken
+    trace['kind'] = KIND_BRANCH if kind is None else kind
+    trace['insts'] = 1 if insts is None else insts
+    return trace
+
+
+def read_trace(path):
+    """Memory-map a binary trace file"""
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=TRACE_DTYPE)
+    return np.memmap(path, dtype=TRACE_DTYPE, mode='r')
+
+
+def write_trace(path, trace):
+    np.asarray(trace, dtype=TRACE_DTYPE).tofile(path)
+
+
+def testbench_trace():
+    """The built-in test sequence of tb_branch_predictor.v"""
+    records = []
+    records += [(0x1000, 0x1100, 1)] * 10
+    records += [(0x2000, 0x2100, 0)] * 10
+    records += [(0x3000, 0x3100, 1), (0x3000, 0x3100, 0)] * 10
+    records += [(0x4000, 0x4100, 1), (0x4000, 0x4100, 1),
+                (0x4000, 0x4100, 0), (0x4000, 0x4100, 0)] * 3
+    records += [(0x5000, 0x5100, 1), (0x5040, 0x5140, 0), (0x5080, 0x5180, 1)] * 5
+    pc, target, taken = zip(*records)
+    return make_trace(pc, target, taken)
+
+
+def synthetic_trace(n, seed=None, static_branches=512, jump_fraction=0.1,
+                    mean_gap=5.0, code_bytes=1 << 16):
+    """Program-like trace: a Zipf-weighted set of static branches, each with
+    a behaviour (biased, loop exit, repeating pattern or random)"""
+    rng = np.random.default_rng(seed)
+    pcs = rng.choice(code_bytes // 4, size=static_branches, replace=False).astype(np.uint32) * 4
+    offsets = (rng.integers(-256, 256, size=static_branches) * 4).astype(np.int64)
+    targets = ((pcs.astype(np.int64) + offsets) & 0xFFFFFFFF).astype(np.uint32)
+    kinds = (rng.random(static_branches) < jump_fraction).astype(np.uint8)
+    # 0 biased, 1 loop, 2 repeating pattern, 3 random
+    behaviour = rng.choice(4, size=static_branches, p=[0.5, 0.3, 0.1, 0.1])
+    bias = rng.choice([0.02, 0.1, 0.9, 0.98], size=static_branches)
+    period = rng.integers(2, 17, size=static_branches)
+    pattern = rng.integers(0, 2, size=(static_branches, 16))
+
+    weights = 1.0 / np.arange(1, static_branches + 1)
+    which = rng.choice(static_branches, size=n, p=weights / weights.sum())
+
+    # Occurrence number of each record within its static branch
+    order = np.argsort(which, kind='stable')
+    sorted_which = which[order]
+    starts = np.flatnonzero(np.r_[True, sorted_which[1:] != sorted_which[:-1]])
+    run_start = np.repeat(starts, np.diff(np.r_[starts, n]))
+    occurrence = np.empty(n, dtype=np.int64)
+    occurrence[order] = np.arange(n) - run_start
+
+    b = behaviour[which]
+    p = period[which]
+    u = rng.random(n)
+    taken = np.select(
+        [b == 0, b == 1, b == 2],
+        [u < bias[which], occurrence % p != p - 1, pattern[which, occurrence % p] == 1],
+        default=u < 0.5)
+    taken |= kinds[which] == KIND_JUMP
+    gap = np.minimum(rng.geometric(1.0 / mean_gap, size=n), 0xFFFF)
+    return make_trace(pcs[which], targets[which], taken, kinds[which], gap)
+
+
+def iss_trace(hexfile, max_steps=1_000_000):
+    """Branches and jumps executed by a program on the 01 CPU's ISS"""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    '..', '01_Pipelined_RISCV_CPU'))
+    from riscv_iss import MASK32, OP_BRANCH, OP_JAL, OP_JALR, RV32ISim, decode_imm, load_hex
+
+    sim = RV32ISim(load_hex(hexfile))
+    records = []
+    since = 0
+    for _ in range(max_steps):
+        pc = sim.pc
+        slot = (pc >> 2) % sim.imem_words
+        instr = sim.program[slot] if slot < len(sim.program) else 0
+        if not sim.step():
+            break
+        since += 1
+        opcode = instr & 0x7F
+        if opcode in (OP_BRANCH, OP_JAL, OP_JALR):
+            taken = sim.pc != pc + 4
+            kind = KIND_BRANCH if opcode == OP_BRANCH else KIND_JUMP
+            # Like the testbench, record the taken target even when not taken
+            target = sim.pc if opcode == OP_JALR else (pc + decode_imm(instr)) & MASK32
+            records.append((pc, target, taken, kind, since))
+            since = 0
+            if sim.pc == pc:
+                break
+    if not records:
+        return np.zeros(0, dtype=TRACE_DTYPE)
+    pc, target, taken, kind, insts = zip(*records)
+    return make_trace(pc, target, taken, kind, insts)
+
+
+def load_source(spec, length=1_000_000, seed=1):
+    """A trace from a file path or 'testbench', 'synthetic' or 'iss:<program.hex>'"""
+    if spec == 'testbench':
+        return testbench_trace()
+    if spec == 'synthetic':
+        return synthetic_trace(length, seed)
+    if spec.startswith('iss:'):
+        return iss_trace(spec[4:])
+    return read_trace(spec)
+
+
+# ---------------------------------------------------------------------------
+# Sweep and RTL cross-check
+# ---------------------------------------------------------------------------
+
+def _sweep_job(args):
+    path, ghr_bits, pht_entries, btb_entries = args
+    start = time.perf_counter()
+    stats = simulate(read_trace(path), ghr_bits, pht_entries, btb_entries)
+    stats['elapsed'] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def sweep(trace_path, ghr_sizes, pht_sizes, btb_sizes, workers=None):
+    """Evaluate every (GHR, PHT, BTB) combination; workers memory-map the trace"""
+    jobs = [(trace_path, g, p, b) for g, p, b in itertools.product(ghr_sizes, pht_sizes, btb_sizes)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_sweep_job, jobs))
+
+
+def trace_hex(trace):
+    """+trace= file contents: {flags, target, pc} per line"""
+    flags = np.asarray(trace['taken'], dtype=np.uint64) | (np.asarray(trace['kind'], dtype=np.uint64) << 1)
+    return ''.join(f"{f:X}{t:08X}{p:08X}\n" for f, t, p in
+                   zip(flags.tolist(), trace['target'].tolist(), trace['pc'].tolist()))
+
+
+def parse_rtl_output(output):
+    """[(pc, predicted, actual, ghr, counter)] from tb_branch_predictor.v output"""
+    rows = []
+    for m in BRANCH_RE.finditer(output):
+        to_int = lambda text, radix: int(text, radix) if 'x' not in text else None  # noqa: E731
+        rows.append((int(m.group(1), 16), to_int(m.group(2), 2), to_int(m.group(3), 2),
+                     to_int(m.group(5), 2), to_int(m.group(6), 10)))
+    return rows
+
+
+def crosscheck(trace, timeout=600):
+    """Replay a trace through the RTL testbench and compare every branch
+
+    Returns (checked, mismatches) where mismatches lists
+    (record, field, rtl value, model value).
+    """
+    sys.path.insert(0, TOOLS_DIR)
+    from sim_cache import compile_project, run_binary
+    from sim_projects import find_project
+
+    binary = compile_project(find_project('03'))
+    with tempfile.TemporaryDirectory(prefix='bp-crosscheck-') as scratch:
+        plusargs = ['+novcd']
+        if trace is not None:
+            if len(trace) > TB_TRACE_MAX:
+                raise ValueError(f"the testbench replays at most {TB_TRACE_MAX} records")
+            path = os.path.join(scratch, 'trace.hex')
+            with open(path, 'w') as f:
+                f.write(trace_hex(trace))
+            plusargs.append(f'+trace={path}')
+        else:
+            trace = testbench_trace()
+        returncode, output, timed_out = run_binary(binary, scratch, plusargs, timeout)
+    if timed_out or returncode != 0:
+        raise RuntimeError(f"RTL simulation failed ({'timeout' if timed_out else returncode})")
+
+    rows = parse_rtl_output(output)
+    mismatches = []
+    if len(rows) != len(trace):
+        mismatches.append((None, 'count', len(rows), len(trace)))
+    for i, (row, model) in enumerate(zip(rows, reference_run(trace))):
+        pc, predicted, actual, ghr, counter = row
+        expected = (int(trace['pc'][i]), int(model[0]), int(trace['taken'][i]), model[1], model[2])
+        for field, rtl_value, model_value in zip(('pc', 'predicted', 'actual', 'ghr', 'counter'),
+                                                 row, expected):
+            if rtl_value != model_value:
+                mismatches.append((i, field, rtl_value, model_value))
+    return len(rows), mismatches
+
+
+def parse_sizes(text):
+    return [int(v, 0) for v in text.split(',')]
+
+
+def format_table(results):
+    lines = [f"{'GHR':>4s} {'PHT':>7s} {'BTB':>6s} {'MPKI':>9s} {'Accuracy':>9s} "
+             f"{'BTB hit':>8s} {'Mispred':>10s} {'Time':>7s}", "-" * 80]
+    for r in sorted(results, key=lambda r: (r['mpki'] is None, r['mpki'])):
+        lines.append(f"{r['ghr_bits']:4d} {r['pht_entries']:7d} {r['btb_entries']:6d} "
+                     f"{r['mpki']:9.3f} {r['accuracy'] * 100:8.2f}% {r['btb_hit_rate'] * 100:7.2f}% "
+                     f"{r['mispredictions']:10d} {r.get('elapsed', 0):6.2f}s")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GShare/BTB trace-driven model")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p = sub.add_parser('gen', help="write a binary trace file")
+    p.add_argument('source', help="'synthetic', 'testbench' or 'iss:<program.hex>'")
+    p.add_argument('output')
+    p.add_argument('-n', '--length', type=int, default=1_000_000)
+    p.add_argument('-s', '--seed', type=int, default=1)
+
+    p = sub.add_parser('run', help="evaluate one configuration")
+    p.add_argument('source', help="trace file, 'synthetic', 'testbench' or 'iss:<program.hex>'")
+    p.add_argument('--ghr', type=int, default=RTL_GHR_BITS)
+    p.add_argument('--pht', type=int, default=RTL_PHT_ENTRIES)
+    p.add_argument('--btb', type=int, default=RTL_BTB_ENTRIES)
+    p.add_argument('--reference', action='store_true', help="use the per-record model")
+    p.add_argument('-n', '--length', type=int, default=1_000_000)
+    p.add_argument('-s', '--seed', type=int, default=1)
+
+    p = sub.add_parser('sweep', help="evaluate many configurations in parallel")
+    p.add_argument('source')
+    p.add_argument('--ghr', type=parse_sizes, default=[4, 6, 8, 10, 12])
+    p.add_argument('--pht', type=parse_sizes, default=[256, 1024, 4096])
+    p.add_argument('--btb', type=parse_sizes, default=[16, 64, 256])
+    p.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+    p.add_argument('-n', '--length', type=int, default=1_000_000)
+    p.add_argument('-s', '--seed', type=int, default=1)
+    p.add_argument('--json', help="write results here")
+
+    p = sub.add_parser('crosscheck', help="compare the model with the RTL testbench")
+    p.add_argument('source', nargs='?', default='testbench',
+                   help="'testbench' (built-in tests) or a trace to sample")
+    p.add_argument('--sample', type=int, default=2000, help="records replayed through the RTL")
+    p.add_argument('-s', '--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.cmd == 'gen':
+        trace = load_source(args.source, args.length, args.seed)
+        write_trace(args.output, trace)
+        print(f"✓ Wrote {len(trace)} records to {args.output}")
+        return 0
+
+    if args.cmd == 'run':
+        trace = load_source(args.source, args.length, args.seed)
+        start = time.perf_counter()
+        if args.reference:
+            wrong, hit, target_wrong = [], [], []
+            bp = BranchPredictor(args.ghr, args.pht, args.btb)
+            for pc, target, taken, kind in zip(trace['pc'].tolist(), trace['target'].tolist(),
+                                               trace['taken'].tolist(), trace['kind'].tolist()):
+                predicted, pred_target, btb_hit = bp.predict(pc)
+                wrong.append(predicted != bool(taken))
+                hit.append(btb_hit)
+                target_wrong.append(predicted and taken and pred_target != target)
+                bp.resolve(pc, taken, target, kind == KIND_BRANCH)
+            stats = summarize(trace, np.array(wrong), np.array(hit), np.array(target_wrong))
+        else:
+            stats = simulate(trace, args.ghr, args.pht, args.btb)
+        elapsed = time.perf_counter() - start
+        print("=" * 80)
+        print(f"GSHARE MODEL - GHR {args.ghr} bits, PHT {args.pht}, BTB {args.btb}")
+        print("=" * 80)
+        for key, value in stats.items():
+            print(f"{key:24s} {value}")
+        print(f"{'records/s':24s} {len(trace) / elapsed:,.0f}")
+        return 0
+
+    if args.cmd == 'sweep':
+        if os.path.isfile(args.source):
+            path, tmp = args.source, None
+        else:
+            fd, tmp = tempfile.mkstemp(suffix='.bpt')
+            os.close(fd)
+            write_trace(tmp, load_source(args.source, args.length, args.seed))
+            path = tmp
+        try:
+            start = time.perf_counter()
+            results = sweep(path, args.ghr, args.pht, args.btb, args.jobs)
+            elapsed = time.perf_counter() - start
+        finally:
+            if tmp:
+                os.unlink(tmp)
+        print("=" * 80)
+        print(f"GSHARE SWEEP - {len(results)} configurations, {results[0]['records']} records")
+        print("=" * 80)
+        print(format_table(results))
+        print(f"\nWall time {elapsed:.2f}s on {args.jobs} workers")
+        if args.json:
+            import json
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Wrote {args.json}")
+        return 0
+
+    # crosscheck
+    trace = None
+    if args.source != 'testbench':
+        full = load_source(args.source, max(args.sample, 1), args.seed)
+        trace = np.array(full[:args.sample])
+    checked, mismatches = crosscheck(trace)
+    print("=" * 80)
+    print(f"GSHARE CROSS-CHECK - {checked} branches")
+    print("=" * 80)
+    for i, field, rtl_value, model_value in mismatches[:20]:
+        print(f"✗ record {i}: {field} RTL={rtl_value} model={model_value}")
+    if mismatches:
+        print(f"✗ {len(mismatches)} mismatches")
+        return 1
+    print("✓ RTL and model agree on every prediction, GHR and counter value")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -30,6 +30,15 @@ module tb_branch_predictor;
     wire        misprediction;
     wire        btb_hit;
     
+    // Trace replay: +trace=<file> replays branches from a $readmemh file
+    // instead of the built-in tests. One record per line, {flags, target, pc}
+    // with flags[0] = taken and flags[1] = unconditional jump.
+    localparam TRACE_MAX = 65536;
+    reg [67:0] trace_mem [0:TRACE_MAX-1];
+    reg [8*256-1:0] trace_file;
+    integer trace_idx;
+    reg next_is_branch;
+    
     // Statistics
     integer total_branches;
     integer correct_predictions;
@@ -63,11 +72,10 @@ module tb_branch_predictor;
         .btb_hit_out       (btb_hit)
     );
     
-    // VCD dump
-    initial begin
-        $dumpfile("branch_predictor.vcd");
-        $dumpvars(0, tb_branch_predictor);
-    end
+    // VCD control: +novcd, +vcd=<file>, +dumpdepth=<n>, +dump=top (common/vcd_dump.vh)
+    `define VCD_DEFAULT_FILE "branch_predictor.vcd"
+    `define VCD_TOP tb_branch_predictor
+    `include "vcd_dump.vh"
     
     // Task: Simulate a branch
     task execute_branch;
@@ -92,7 +100,7 @@ module tb_branch_predictor;
             resolve_pc <= pc;
             resolve_taken <= taken;
             resolve_target <= target;
-            resolve_is_branch <= 1'b1;
+            resolve_is_branch <= next_is_branch;
             was_predicted_taken <= predicted;
             
             total_branches = total_branches + 1;
@@ -128,6 +136,7 @@ module tb_branch_predictor;
         resolve_target = 0;
         resolve_is_branch = 0;
         was_predicted_taken = 0;
+        next_is_branch = 1;
         total_branches = 0;
         correct_predictions = 0;
         mispredictions = 0;
@@ -136,45 +145,58 @@ module tb_branch_predictor;
         rst_n = 1;
         repeat(5) @(posedge clk);
         
-        // Test 1: Always taken loop (should learn pattern)
-        $display("\nTest 1: Always-Taken Loop (10 iterations)");
-        $display("-------------------------------------------");
-        repeat(10) begin
-            execute_branch(32'h00001000, 32'h00001100, 1'b1);
-        end
+        if ($value$plusargs("trace=%s", trace_file)) begin
+            $display("\nTrace Replay: %0s", trace_file);
+            $display("-------------------------------------------");
+            $readmemh(trace_file, trace_mem);
+            for (trace_idx = 0; trace_idx < TRACE_MAX && trace_mem[trace_idx][0] !== 1'bx;
+                 trace_idx = trace_idx + 1) begin
+                next_is_branch = !trace_mem[trace_idx][65];
+                execute_branch(trace_mem[trace_idx][31:0], trace_mem[trace_idx][63:32],
+                               trace_mem[trace_idx][64]);
+            end
+            next_is_branch = 1'b1;
+        end else begin
+            // Test 1: Always taken loop (should learn pattern)
+            $display("\nTest 1: Always-Taken Loop (10 iterations)");
+            $display("-------------------------------------------");
+            repeat(10) begin
+                execute_branch(32'h00001000, 32'h00001100, 1'b1);
+            end
         
-        // Test 2: Never taken branch
-        $display("\nTest 2: Never-Taken Branch (10 iterations)");
-        $display("-------------------------------------------");
-        repeat(10) begin
-            execute_branch(32'h00002000, 32'h00002100, 1'b0);
-        end
+            // Test 2: Never taken branch
+            $display("\nTest 2: Never-Taken Branch (10 iterations)");
+            $display("-------------------------------------------");
+            repeat(10) begin
+                execute_branch(32'h00002000, 32'h00002100, 1'b0);
+            end
         
-        // Test 3: Alternating pattern (T,N,T,N,...)
-        $display("\nTest 3: Alternating Pattern (10 iterations)");
-        $display("-------------------------------------------");
-        repeat(10) begin
-            execute_branch(32'h00003000, 32'h00003100, 1'b1);
-            execute_branch(32'h00003000, 32'h00003100, 1'b0);
-        end
+            // Test 3: Alternating pattern (T,N,T,N,...)
+            $display("\nTest 3: Alternating Pattern (10 iterations)");
+            $display("-------------------------------------------");
+            repeat(10) begin
+                execute_branch(32'h00003000, 32'h00003100, 1'b1);
+                execute_branch(32'h00003000, 32'h00003100, 1'b0);
+            end
         
-        // Test 4: TTNNTTNNT... pattern (period 4)
-        $display("\nTest 4: TTNN Repeating Pattern (12 iterations)");
-        $display("-------------------------------------------");
-        repeat(3) begin
-            execute_branch(32'h00004000, 32'h00004100, 1'b1);
-            execute_branch(32'h00004000, 32'h00004100, 1'b1);
-            execute_branch(32'h00004000, 32'h00004100, 1'b0);
-            execute_branch(32'h00004000, 32'h00004100, 1'b0);
-        end
+            // Test 4: TTNNTTNNT... pattern (period 4)
+            $display("\nTest 4: TTNN Repeating Pattern (12 iterations)");
+            $display("-------------------------------------------");
+            repeat(3) begin
+                execute_branch(32'h00004000, 32'h00004100, 1'b1);
+                execute_branch(32'h00004000, 32'h00004100, 1'b1);
+                execute_branch(32'h00004000, 32'h00004100, 1'b0);
+                execute_branch(32'h00004000, 32'h00004100, 1'b0);
+            end
         
-        // Test 5: Different PC addresses (independent branches)
-        $display("\nTest 5: Multiple Independent Branches");
-        $display("-------------------------------------------");
-        repeat(5) begin
-            execute_branch(32'h00005000, 32'h00005100, 1'b1);
-            execute_branch(32'h00005040, 32'h00005140, 1'b0);
-            execute_branch(32'h00005080, 32'h00005180, 1'b1);
+            // Test 5: Different PC addresses (independent branches)
+            $display("\nTest 5: Multiple Independent Branches");
+            $display("-------------------------------------------");
+            repeat(5) begin
+                execute_branch(32'h00005000, 32'h00005100, 1'b1);
+                execute_branch(32'h00005040, 32'h00005140, 1'b0);
+                execute_branch(32'h00005080, 32'h00005180, 1'b1);
+            end
         end
         
         repeat(10) @(posedge clk);
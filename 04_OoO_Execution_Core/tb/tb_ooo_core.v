@@ -87,11 +87,28 @@ module tb_ooo_core;
         .cdb_data       (cdb_data)
     );
     
-    // VCD dump
-    initial begin
-        $dumpfile("ooo_core.vcd");
-        $dumpvars(0, tb_ooo_core);
-    end
+    // VCD control: +novcd, +vcd=<file>, +dumpdepth=<n>, +dump=top (common/vcd_dump.vh)
+    //   +dump=rob       issue, ROB allocate/commit, RS dispatch and CDB
+    //                   handshakes (no ROB or station entries)
+    task dump_subset(input [8*32-1:0] name, output found);
+        begin
+            found = 1;
+            if (name == "rob") begin
+                $dumpvars(1, tb_ooo_core);
+                $dumpvars(0, dut.rob_alloc_tag, dut.rob_alloc_ack, dut.rob_commit_tag,
+                          dut.rs_issue_ack, dut.rs_full, dut.rs_dispatch_valid,
+                          dut.rs_dispatch_op, dut.rs_dispatch_tag,
+                          dut.alu_dispatch_ack, dut.alu_result_valid, dut.alu_result_tag,
+                          dut.alu_busy);
+            end else
+                found = 0;
+        end
+    endtask
+    
+    `define VCD_DEFAULT_FILE "ooo_core.vcd"
+    `define VCD_TOP tb_ooo_core
+    `define VCD_SUBSETS
+    `include "vcd_dump.vh"
     
     // Provide register values
     always @(*) begin
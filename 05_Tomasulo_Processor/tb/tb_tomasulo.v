@@ -57,11 +57,10 @@ module tb_tomasulo;
         .mul_rs2_busy(mul_rs2_busy)
     );
     
-    // VCD dump
-    initial begin
-        $dumpfile("tomasulo.vcd");
-        $dumpvars(0, tb_tomasulo);
-    end
+    // VCD control: +novcd, +vcd=<file>, +dumpdepth=<n>, +dump=top (common/vcd_dump.vh)
+    `define VCD_DEFAULT_FILE "tomasulo.vcd"
+    `define VCD_TOP tb_tomasulo
+    `include "vcd_dump.vh"
     
     // Task: Issue instruction
     task issue_inst;
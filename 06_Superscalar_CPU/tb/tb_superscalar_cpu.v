@@ -17,10 +17,10 @@ module tb_superscalar_cpu;
         .rst_n (rst_n)
     );
     
-    initial begin
-        $dumpfile("superscalar.vcd");
-        $dumpvars(0, tb_superscalar_cpu);
-    end
+    // VCD control: +novcd, +vcd=<file>, +dumpdepth=<n>, +dump=top (common/vcd_dump.vh)
+    `define VCD_DEFAULT_FILE "superscalar.vcd"
+    `define VCD_TOP tb_superscalar_cpu
+    `include "vcd_dump.vh"
     
     initial begin
         $display("===========================================");
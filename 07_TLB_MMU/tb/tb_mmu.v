@@ -205,10 +205,12 @@ module tb_mmu;
     integer test_passed;
     integer test_failed;
     
+    // VCD control: +novcd, +vcd=<file>, +dumpdepth=<n>, +dump=top (common/vcd_dump.vh)
+    `define VCD_DEFAULT_FILE "mmu_tb.vcd"
+    `define VCD_TOP tb_mmu
+    `include "vcd_dump.vh"
+    
     initial begin
-        $dumpfile("mmu_tb.vcd");
-        $dumpvars(0, tb_mmu);
-        
         test_passed = 0;
         test_failed = 0;
         
@@ -0,0 +1,718 @@
+#!/usr/bin/env python3
+"""
+Transaction-level MESI Coherence Model
+Python model of mesi_cache.v / snoop_bus.v for any number of CPUs: private
+direct-mapped caches kept coherent by BusRd, BusRdX and BusUpgr on one
+serialising snoop bus with round-robin arbitration.
+
+A run has two passes. The coherence pass applies the accesses in trace
+order (the trace is the global interleaving) and yields the bus
+transaction each access needs plus protocol statistics. The timing pass
+then replays each CPU's stream against the shared bus to get cycles, bus
+utilization and arbitration wait. Cache sets never interact, so the
+coherence pass can be sharded by set index across processes and gives the
+same result as a single process.
+
+Trace files are packed little-endian records (TRACE_DTYPE, 8 bytes):
+    addr u32, cpu u8, write u8, gap u16 (compute cycles before the access)
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools')
+
+TRACE_DTYPE = np.dtype([('addr', '<u4'), ('cpu', 'u1'), ('write', 'u1'), ('gap', '<u2')])
+
+# RTL configuration (coherent_cache_system.v)
+NUM_CPUS = 4
+CACHE_LINES = 64
+LINE_SIZE = 32
+
+# MESI encoding of mesi_cache_line.v
+INVALID, SHARED, EXCLUSIVE, MODIFIED = range(4)
+STATE_NAMES = 'ISEM'
+
+# Bus operation per access; WRITEBACK is or'ed in when a dirty victim is
+# written back first
+HIT, BUS_RD, BUS_RD_C2C, BUS_RDX, BUS_RDX_C2C, BUS_UPGR = range(6)
+WRITEBACK = 8
+OP_NAMES = ['hit', 'BusRd', 'BusRd (cache)', 'BusRdX', 'BusRdX (cache)', 'BusUpgr']
+
+# snoop_bus.v: IDLE, ARBITRATE, SNOOP, RESPONSE and COMPLETE take a cycle
+# each; MEM_READ / MEM_WRITE wait for the memory
+BUS_OVERHEAD = 5
+MEM_LATENCY = 2
+HIT_CYCLES = 1
+
+MESI_RE = re.compile(r'^MESI cpu=(\d+) line=(\d+) tag=([0-9a-fA-FxX]+) state=(\d)->(\d)')
+TEST_RE = re.compile(r'^Test (\d+):')
+
+
+def log2(n):
+    bits = int(n).bit_length() - 1
+    if n <= 0 or 1 << bits != n:
+        raise ValueError(f"{n} is not a power of two")
+    return bits
+
+
+class MesiSystem:
+    """Coherence state of num_cpus direct-mapped caches on one snoop bus
+
+    `holders` maps a line address to the bitmask of caches holding it, so a
+    snoop only visits the caches that would answer it. With log=[] every
+    (cpu, set, old (tag, state), new (tag, state)) change is recorded.
+    """
+
+    def __init__(self, num_cpus=NUM_CPUS, lines=CACHE_LINES, line_size=LINE_SIZE, log=None):
+        self.num_cpus, self.lines, self.line_size = num_cpus, lines, line_size
+        self.offset_bits = log2(line_size)
+        self.index_bits = log2(lines)
+        self.tag = [[-1] * lines for _ in range(num_cpus)]
+        self.state = [[INVALID] * lines for _ in range(num_cpus)]
+        self.holders = {}
+        self.log = log
+        self.transitions = np.zeros((4, 4), dtype=np.int64)
+        self.counts = dict.fromkeys((
+            'reads', 'writes', 'read_hits', 'write_hits', 'read_misses', 'write_misses',
+            'bus_rd', 'bus_rdx', 'bus_upgr', 'cache_to_cache', 'mem_reads', 'mem_writes',
+            'writebacks', 'invalidations', 'm_to_s', 'e_to_s'), 0)
+        # Per line address: [bus transactions, invalidations, downgrades, max sharers]
+        self.line_stats = {}
+
+    def _set(self, cpu, index, line, new):
+        old_state = self.state[cpu][index]
+        old_line = self.tag[cpu][index]
+        self.transitions[old_state, new] += 1
+        if self.log is not None:
+            self.log.append((cpu, index, (old_line, old_state), (line, new)))
+        self.state[cpu][index] = new
+        self.tag[cpu][index] = line
+
+    def _line(self, line):
+        stats = self.line_stats.get(line)
+        if stats is None:
+            stats = self.line_stats[line] = [0, 0, 0, 0]
+        return stats
+
+    def access(self, cpu, addr, write):
+        """Apply one access; returns its bus operation (HIT, BUS_*, | WRITEBACK)"""
+        c = self.counts
+        line = addr >> self.offset_bits
+        index = line & (self.lines - 1)
+        bit = 1 << cpu
+        state = self.state[cpu][index]
+        if write:
+            c['writes'] += 1
+        else:
+            c['reads'] += 1
+
+        if self.tag[cpu][index] == line and state != INVALID:
+            if not write:
+                c['read_hits'] += 1
+                return HIT
+            c['write_hits'] += 1
+            if state == EXCLUSIVE:
+                self._set(cpu, index, line, MODIFIED)
+            if state != SHARED:
+                return HIT
+            # Write hit in Shared: BusUpgr invalidates the other copies
+            c['bus_upgr'] += 1
+            stats = self._line(line)
+            stats[0] += 1
+            stats[1] += self._invalidate(line, bit, index)
+            self.holders[line] = bit
+            self._set(cpu, index, line, MODIFIED)
+            return BUS_UPGR
+
+        # Miss: evict the current occupant of the set
+        op = 0
+        if state != INVALID:
+            victim = self.tag[cpu][index]
+            self.holders[victim] &= ~bit
+            if not self.holders[victim]:
+                del self.holders[victim]
+            if state == MODIFIED:
+                c['writebacks'] += 1
+                c['mem_writes'] += 1
+                op = WRITEBACK
+            self._set(cpu, index, -1, INVALID)
+
+        others = self.holders.get(line, 0) & ~bit
+        supplied = False
+        stats = self._line(line)
+        stats[0] += 1
+        if write:
+            c['write_misses'] += 1
+            c['bus_rdx'] += 1
+            for other in _cpus(others):
+                supplied |= self.state[other][index] in (MODIFIED, EXCLUSIVE)
+            stats[1] += self._invalidate(line, bit, index)
+            self.holders[line] = bit
+            self._set(cpu, index, line, MODIFIED)
+            op |= BUS_RDX_C2C if supplied else BUS_RDX
+        else:
+            c['read_misses'] += 1
+            c['bus_rd'] += 1
+            for other in _cpus(others):
+                other_state = self.state[other][index]
+                if other_state == MODIFIED:
+                    # Owner supplies the line and memory picks it up
+                    supplied = True
+                    c['m_to_s'] += 1
+                    c['mem_writes'] += 1
+                    stats[2] += 1
+                    self._set(other, index, line, SHARED)
+                elif other_state == EXCLUSIVE:
+                    supplied = True
+                    c['e_to_s'] += 1
+                    stats[2] += 1
+                    self._set(other, index, line, SHARED)
+            holders = self.holders.get(line, 0) | bit
+            self.holders[line] = holders
+            self._set(cpu, index, line, SHARED if others else EXCLUSIVE)
+            sharers = bin(holders).count('1')
+            if sharers > stats[3]:
+                stats[3] = sharers
+            op |= BUS_RD_C2C if supplied else BUS_RD
+        if supplied:
+            c['cache_to_cache'] += 1
+        else:
+            c['mem_reads'] += 1
+        return op
+
+    def _invalidate(self, line, keep, index):
+        """Invalidate every copy of line except the requester's; returns the count"""
+        others = self.holders.get(line, 0) & ~keep
+        count = 0
+        for other in _cpus(others):
+            self._set(other, index, -1, INVALID)
+            count += 1
+        self.counts['invalidations'] += count
+        return count
+
+    def run(self, cpu, addr, write):
+        """Apply a batch of accesses; returns their bus operations (uint8)"""
+        access = self.access
+        ops = [access(c, a, w) for c, a, w in zip(np.asarray(cpu).tolist(),
+                                                  np.asarray(addr).tolist(),
+                                                  np.asarray(write).tolist())]
+        return np.array(ops, dtype=np.uint8)
+
+    def state_of(self, cpu, addr):
+        line = addr >> self.offset_bits
+        index = line & (self.lines - 1)
+        return self.state[cpu][index] if self.tag[cpu][index] == line else INVALID
+
+
+def _cpus(mask):
+    cpu = 0
+    while mask:
+        if mask & 1:
+            yield cpu
+        mask >>= 1
+        cpu += 1
+
+
+# ---------------------------------------------------------------------------
+# Timing
+# ---------------------------------------------------------------------------
+
+def op_costs(mem_latency=MEM_LATENCY):
+    """Bus cycles per operation code (index 0..15)"""
+    base = [0,
+            BUS_OVERHEAD + mem_latency,     # BusRd from memory
+            BUS_OVERHEAD,                   # BusRd supplied by a cache
+            BUS_OVERHEAD + mem_latency,     # BusRdX from memory
+            BUS_OVERHEAD,                   # BusRdX supplied by a cache
+            BUS_OVERHEAD,                   # BusUpgr
+            0, 0]
+    writeback = BUS_OVERHEAD + mem_latency
+    return np.array(base + [b + writeback for b in base], dtype=np.int64)
+
+
+def bus_timing(cpu, ops, gap, num_cpus, mem_latency=MEM_LATENCY):
+    """Replay every CPU's stream against one round-robin bus
+
+    Hits cost HIT_CYCLES locally; a bus operation is requested once the
+    CPU's preceding work is done and completes when the bus finishes it.
+    Only bus transactions are visited one by one.
+    """
+    cpu = np.asarray(cpu)
+    cost = op_costs(mem_latency)[np.asarray(ops)]
+    on_bus = cost > 0
+    local = np.asarray(gap, dtype=np.int64) + np.where(on_bus, 0, HIT_CYCLES)
+
+    offsets, costs, trailing = [], [], []
+    for c in range(num_cpus):
+        mine = np.flatnonzero(cpu == c)
+        elapsed = np.cumsum(local[mine])
+        bus_pos = np.flatnonzero(on_bus[mine])
+        at = elapsed[bus_pos]
+        offsets.append(np.diff(at, prepend=0).tolist())
+        costs.append(cost[mine[bus_pos]].tolist())
+        total = int(elapsed[-1]) if len(elapsed) else 0
+        trailing.append(total - (int(at[-1]) if len(at) else 0))
+
+    inf = float('inf')
+    pos = [0] * num_cpus
+    next_req = [offsets[c][0] if offsets[c] else inf for c in range(num_cpus)]
+    finish = [0] * num_cpus
+    stall = [0] * num_cpus
+    bus_free = busy = total_wait = max_wait = transactions = 0
+    rr = 0
+    while True:
+        earliest = min(next_req)
+        if earliest == inf:
+            break
+        grant = max(bus_free, earliest)
+        for i in range(num_cpus):
+            c = (rr + i) % num_cpus
+            if next_req[c] <= grant:
+                break
+        k = pos[c]
+        wait = grant - next_req[c]
+        done = grant + costs[c][k]
+        total_wait += wait
+        max_wait = max(max_wait, wait)
+        stall[c] += done - next_req[c]
+        busy += costs[c][k]
+        transactions += 1
+        bus_free = finish[c] = done
+        rr = (c + 1) % num_cpus
+        pos[c] = k + 1
+        next_req[c] = done + offsets[c][k + 1] if k + 1 < len(offsets[c]) else inf
+
+    end = [finish[c] + trailing[c] for c in range(num_cpus)]
+    cycles = max(end) if end else 0
+    return {
+        'cycles': int(cycles),
+        'bus_transactions': transactions,
+        'bus_busy_cycles': int(busy),
+        'bus_utilization': round(busy / cycles, 6) if cycles else 0.0,
+        'avg_bus_wait': round(total_wait / transactions, 3) if transactions else 0.0,
+        'max_bus_wait': int(max_wait),
+        'cpu_stall_cycles': [int(s) for s in stall],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Runs and sharding
+# ---------------------------------------------------------------------------
+
+def shard_of(addr, shards, lines=CACHE_LINES, line_size=LINE_SIZE):
+    """Shard number of each address: cache sets are dealt round-robin"""
+    index = (np.asarray(addr) >> log2(line_size)) & (lines - 1)
+    return index % shards
+
+
+def coherence_pass(trace, num_cpus, lines=CACHE_LINES, line_size=LINE_SIZE):
+    """(bus ops, counts, transition matrix, line_stats) of a trace in one process"""
+    system = MesiSystem(num_cpus, lines, line_size)
+    ops = system.run(trace['cpu'], trace['addr'], trace['write'])
+    return ops, system.counts, system.transitions, system.line_stats
+
+
+def _shard_job(args):
+    path, shard, shards, num_cpus, lines, line_size = args
+    trace = read_trace(path)
+    mine = np.flatnonzero(shard_of(trace['addr'], shards, lines, line_size) == shard)
+    ops, counts, transitions, line_stats = coherence_pass(trace[mine], num_cpus, lines, line_size)
+    return mine, ops, counts, transitions, line_stats
+
+
+def sharded_pass(path, num_cpus, shards, lines=CACHE_LINES, line_size=LINE_SIZE):
+    """coherence_pass over a trace file, split by cache set across processes"""
+    length = len(read_trace(path))
+    ops = np.zeros(length, dtype=np.uint8)
+    counts, transitions, line_stats = None, np.zeros((4, 4), dtype=np.int64), {}
+    jobs = [(path, s, shards, num_cpus, lines, line_size) for s in range(shards)]
+    with ProcessPoolExecutor(max_workers=shards) as pool:
+        for mine, shard_ops, shard_counts, shard_transitions, shard_lines in pool.map(_shard_job, jobs):
+            ops[mine] = shard_ops
+            if counts is None:
+                counts = dict(shard_counts)
+            else:
+                for key, value in shard_counts.items():
+                    counts[key] += value
+            transitions += shard_transitions
+            line_stats.update(shard_lines)
+    return ops, counts, transitions, line_stats
+
+
+def hotspots(line_stats, line_size=LINE_SIZE, top=10):
+    """Lines with the most coherence traffic (invalidations + downgrades)"""
+    ranked = sorted(line_stats.items(), key=lambda kv: (kv[1][1] + kv[1][2], kv[1][0]), reverse=True)
+    return [{'addr': line * line_size, 'transactions': s[0], 'invalidations': s[1],
+             'downgrades': s[2], 'max_sharers': s[3]} for line, s in ranked[:top]]
+
+
+def simulate(trace, num_cpus=None, lines=CACHE_LINES, line_size=LINE_SIZE,
+             mem_latency=MEM_LATENCY, shards=1, trace_path=None, top=10):
+    """Coherence and timing statistics of a trace
+
+    shards > 1 needs trace_path (a trace file the workers can memory-map).
+    """
+    if num_cpus is None:
+        num_cpus = int(trace['cpu'].max()) + 1 if len(trace) else NUM_CPUS
+    if shards > 1:
+        ops, counts, transitions, line_stats = sharded_pass(trace_path, num_cpus, shards,
+                                                            lines, line_size)
+    else:
+        ops, counts, transitions, line_stats = coherence_pass(trace, num_cpus, lines, line_size)
+    stats = {'cpus': num_cpus, 'accesses': len(trace)}
+    stats.update(counts)
+    accesses = len(trace)
+    hits = counts['read_hits'] + counts['write_hits']
+    stats['hit_rate'] = round(hits / accesses, 6) if accesses else None
+    stats['transitions'] = {f"{STATE_NAMES[a]}->{STATE_NAMES[b]}": int(transitions[a, b])
+                            for a in range(4) for b in range(4) if a != b and transitions[a, b]}
+    stats.update(bus_timing(trace['cpu'], ops, trace['gap'], num_cpus, mem_latency))
+    stats['hotspots'] = hotspots(line_stats, line_size, top)
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Traces
+# ---------------------------------------------------------------------------
+
+def make_trace(cpu, addr, write, gap=0):
+    trace = np.zeros(len(addr), dtype=TRACE_DTYPE)
+    trace['cpu'] = cpu
+    trace['addr'] = addr
+    trace['write'] = write
+    trace['gap'] = gap
+    return trace
+
+
+def read_trace(path):
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=TRACE_DTYPE)
+    return np.memmap(path, dtype=TRACE_DTYPE, mode='r')
+
+
+def write_trace(path, trace):
+    np.asarray(trace, dtype=TRACE_DTYPE).tofile(path)
+
+
+def merge_cpu_traces(paths):
+    """Interleave per-CPU traces (CPU i = paths[i]) by their issue times
+
+    Each file uses TRACE_DTYPE; its cpu field is overwritten.
+    """
+    parts, times = [], []
+    for c, path in enumerate(paths):
+        part = np.array(read_trace(path))
+        part['cpu'] = c
+        parts.append(part)
+        times.append(np.cumsum(part['gap'].astype(np.int64) + HIT_CYCLES))
+    merged = np.concatenate(parts)
+    return merged[np.argsort(np.concatenate(times), kind='stable')]
+
+
+# Synthetic workload: (share of accesses, write fraction)
+WORKLOAD = {
+    'private':     (0.60, 0.30),    # per-CPU working set, no sharing
+    'read_shared': (0.20, 0.02),    # shared lookup table
+    'migratory':   (0.12, 0.50),    # shared buffer passed between CPUs
+    'lock':        (0.04, 0.50),    # a few contended lock lines
+    'false_share': (0.04, 0.90),    # per-CPU counters packed into lines
+}
+
+
+def synthetic_trace(n, num_cpus=NUM_CPUS, seed=None, mean_gap=4, workload=None):
+    """Interleaved multi-CPU trace mixing private, read-shared, migratory,
+    lock and falsely-shared accesses"""
+    workload = dict(WORKLOAD, **(workload or {}))
+    rng = np.random.default_rng(seed)
+    names = list(workload)
+    share = np.array([workload[k][0] for k in names])
+    kind = rng.choice(len(names), size=n, p=share / share.sum())
+    cpu = rng.integers(0, num_cpus, size=n)
+
+    # Regions are placed in disjoint parts of the 2KB index space of the RTL
+    # cache, so misses come from sharing rather than conflicts between them
+    private = 0x100000 * (cpu + 1) + rng.integers(0, 1024 // 4, size=n) * 4
+    read_shared = 0x10400 + rng.integers(0, 512 // 4, size=n) * 4
+    migratory = 0x20600 + (np.arange(n) // 64 % 8) * LINE_SIZE + rng.integers(0, 8, size=n) * 4
+    lock = 0x30700 + rng.integers(0, 4, size=n) * LINE_SIZE
+    false_share = 0x40780 + cpu * 4
+    addr = np.choose(kind, [private, read_shared, migratory, lock, false_share])
+
+    write_frac = np.array([workload[k][1] for k in names])[kind]
+    write = rng.random(n) < write_frac
+    gap = np.minimum(rng.geometric(1.0 / (mean_gap + 1), size=n) - 1, 0xFFFF)
+    return make_trace(cpu, addr, write, gap)
+
+
+# tb_cache_coherence.v scenarios: test number -> [(cpu, write, addr)]
+TESTBENCH_SCENARIOS = [
+    (1, [(0, 0, 0x1000)]),
+    (2, [(0, 0, 0x1000)]),
+    (3, [(1, 0, 0x1000)]),
+    (4, [(0, 1, 0x1000)]),
+    (5, [(1, 0, 0x1000)]),
+    (6, [(0, 0, 0x2000), (1, 0, 0x3000), (2, 0, 0x4000), (3, 0, 0x5000)]),
+    (7, [(2, 1, 0x6000)]),
+    (8, [(3, 0, 0x6000)]),
+    (9, [(0, 1, 0x7000), (1, 1, 0x7004)]),
+    (10, [(2, 0, 0x7000), (3, 0, 0x7004)]),
+]
+
+
+def testbench_trace():
+    rows = [access for _, accesses in TESTBENCH_SCENARIOS for access in accesses]
+    cpu, write, addr = zip(*rows)
+    return make_trace(cpu, addr, write)
+
+
+def load_source(spec, num_cpus=NUM_CPUS, length=1_000_000, seed=1):
+    """A trace from a file path, comma-separated per-CPU files, 'synthetic' or 'testbench'"""
+    if spec == 'testbench':
+        return testbench_trace()
+    if spec == 'synthetic':
+        return synthetic_trace(length, num_cpus, seed)
+    if ',' in spec:
+        return merge_cpu_traces(spec.split(','))
+    return read_trace(spec)
+
+
+# ---------------------------------------------------------------------------
+# RTL validation
+# ---------------------------------------------------------------------------
+
+def _normalise(entry):
+    """(tag, state) with the tag of an Invalid line ignored"""
+    tag, state = entry
+    return (None, INVALID) if state == INVALID else (tag, state)
+
+
+def net_changes(events):
+    """{(cpu, set): (before, after)} from an ordered list of
+    (cpu, set, before, after) changes, dropping lines that end where they began"""
+    changes = {}
+    for cpu, index, before, after in events:
+        key = (cpu, index)
+        first = changes[key][0] if key in changes else _normalise(before)
+        changes[key] = (first, _normalise(after))
+    return {k: v for k, v in changes.items() if v[0] != v[1]}
+
+
+def expected_changes(lines=CACHE_LINES, line_size=LINE_SIZE):
+    """{test: net changes} the model predicts for TESTBENCH_SCENARIOS; tags as the RTL stores them"""
+    tag_shift = log2(lines)
+    log = []
+    system = MesiSystem(NUM_CPUS, lines, line_size, log)
+    expected = {}
+    for test, accesses in TESTBENCH_SCENARIOS:
+        del log[:]
+        for cpu, write, addr in accesses:
+            system.access(cpu, addr, write)
+        events = [(c, i, (b[0] >> tag_shift, b[1]), (a[0] >> tag_shift, a[1]))
+                  for c, i, b, a in log]
+        expected[test] = net_changes(events)
+    return expected
+
+
+def parse_rtl_output(output):
+    """{test: net changes} from the +mesitrace lines of tb_cache_coherence.v"""
+    current = {}
+    events = {}
+    test = 0
+    for text in output.splitlines():
+        m = TEST_RE.match(text)
+        if m:
+            test = int(m.group(1))
+            continue
+        m = MESI_RE.match(text)
+        if m:
+            cpu, index = int(m.group(1)), int(m.group(2))
+            after = (int(m.group(3), 16), int(m.group(5)))
+            before = current.get((cpu, index), (0, INVALID))
+            current[(cpu, index)] = after
+            events.setdefault(test, []).append((cpu, index, before, after))
+    return {t: net_changes(e) for t, e in events.items()}
+
+
+def validate(timeout=120):
+    """Run tb_cache_coherence.v with +mesitrace; returns (rtl, expected) per test"""
+    sys.path.insert(0, TOOLS_DIR)
+    from sim_cache import compile_project, run_binary
+    from sim_projects import find_project
+
+    binary = compile_project(find_project('08'))
+    with tempfile.TemporaryDirectory(prefix='mesi-validate-') as scratch:
+        returncode, output, timed_out = run_binary(binary, scratch, ['+novcd', '+mesitrace'], timeout)
+    if timed_out or returncode != 0:
+        raise RuntimeError(f"RTL simulation failed ({'timeout' if timed_out else returncode})")
+    return parse_rtl_output(output), expected_changes()
+
+
+def format_change(key, change):
+    (cpu, index), ((tag0, s0), (tag1, s1)) = key, change
+    fmt = lambda tag, s: STATE_NAMES[s] if tag is None else f"{STATE_NAMES[s]}[tag {tag:x}]"
+    return f"CPU{cpu} line {index}: {fmt(tag0, s0)} -> {fmt(tag1, s1)}"
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_list(text):
+    return [int(v, 0) for v in text.split(',')]
+
+
+def _scale_job(args):
+    cpus, per_cpu, seed, lines, line_size, mem_latency = args
+    trace = synthetic_trace(per_cpu * cpus, cpus, seed)
+    start = time.perf_counter()
+    stats = simulate(trace, cpus, lines, line_size, mem_latency)
+    stats['elapsed'] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def print_report(stats):
+    print(f"CPUs:             {stats['cpus']}")
+    print(f"Accesses:         {stats['accesses']} ({stats['reads']} reads, {stats['writes']} writes)")
+    print(f"Hit rate:         {stats['hit_rate'] * 100:.2f}%")
+    print(f"Bus transactions: {stats['bus_transactions']} (BusRd {stats['bus_rd']}, "
+          f"BusRdX {stats['bus_rdx']}, BusUpgr {stats['bus_upgr']}, writebacks {stats['writebacks']})")
+    print(f"Bus utilization:  {stats['bus_utilization'] * 100:.2f}% "
+          f"({stats['bus_busy_cycles']} of {stats['cycles']} cycles)")
+    print(f"Bus wait:         avg {stats['avg_bus_wait']} max {stats['max_bus_wait']} cycles")
+    print(f"Invalidations:    {stats['invalidations']}")
+    print(f"Downgrades:       M->S {stats['m_to_s']}, E->S {stats['e_to_s']}")
+    print(f"Cache-to-cache:   {stats['cache_to_cache']}")
+    print(f"Memory:           {stats['mem_reads']} line reads, {stats['mem_writes']} line writes")
+    print("Transitions:      " + ", ".join(f"{k} {v}" for k, v in stats['transitions'].items()))
+    print("\nSharing hot spots:")
+    print(f"  {'Address':>10s} {'Txns':>8s} {'Inval':>8s} {'Downgr':>8s} {'Sharers':>8s}")
+    for h in stats['hotspots']:
+        print(f"  0x{h['addr']:08x} {h['transactions']:8d} {h['invalidations']:8d} "
+              f"{h['downgrades']:8d} {h['max_sharers']:8d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transaction-level MESI coherence model")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    def add_config(p):
+        p.add_argument('--lines', type=int, default=CACHE_LINES, help="cache lines per CPU")
+        p.add_argument('--line-size', type=int, default=LINE_SIZE)
+        p.add_argument('--mem-latency', type=int, default=MEM_LATENCY)
+        p.add_argument('-s', '--seed', type=int, default=1)
+
+    p = sub.add_parser('gen', help="write a synthetic trace file")
+    p.add_argument('output')
+    p.add_argument('--cpus', type=int, default=NUM_CPUS)
+    p.add_argument('-n', '--length', type=int, default=1_000_000)
+    p.add_argument('-s', '--seed', type=int, default=1)
+
+    p = sub.add_parser('run', help="replay one trace")
+    p.add_argument('source', help="trace file, per-CPU files a,b,..., 'synthetic' or 'testbench'")
+    p.add_argument('--cpus', type=int, help="default: highest cpu in the trace + 1")
+    p.add_argument('-n', '--length', type=int, default=1_000_000)
+    p.add_argument('-j', '--jobs', type=int, default=1, help="shard the coherence pass by cache set")
+    p.add_argument('--top', type=int, default=10)
+    p.add_argument('--json', help="write statistics here")
+    add_config(p)
+
+    p = sub.add_parser('scale', help="synthetic workload from 4 to 64 CPUs, in parallel")
+    p.add_argument('--cpus', type=parse_list, default=[4, 8, 16, 32, 64])
+    p.add_argument('--per-cpu', type=int, default=50_000, help="accesses per CPU")
+    p.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+    p.add_argument('--json', help="write results here")
+    add_config(p)
+
+    sub.add_parser('validate', help="compare MESI transitions with tb_cache_coherence.v")
+    args = parser.parse_args()
+
+    if args.cmd == 'gen':
+        trace = synthetic_trace(args.length, args.cpus, args.seed)
+        write_trace(args.output, trace)
+        print(f"✓ Wrote {len(trace)} accesses from {args.cpus} CPUs to {args.output}")
+        return 0
+
+    if args.cmd == 'run':
+        num_cpus = args.cpus or NUM_CPUS
+        trace = load_source(args.source, num_cpus, args.length, args.seed)
+        path, tmp = args.source, None
+        if args.jobs > 1 and not os.path.isfile(args.source):
+            fd, tmp = tempfile.mkstemp(suffix='.mtr')
+            os.close(fd)
+            write_trace(tmp, trace)
+            path = tmp
+        try:
+            start = time.perf_counter()
+            stats = simulate(trace, args.cpus, args.lines, args.line_size, args.mem_latency,
+                             args.jobs, path, args.top)
+            elapsed = time.perf_counter() - start
+        finally:
+            if tmp:
+                os.unlink(tmp)
+        print("=" * 80)
+        print(f"MESI MODEL - {stats['cpus']} CPUs, {args.lines} x {args.line_size}B lines")
+        print("=" * 80)
+        print_report(stats)
+        print(f"\n{len(trace) / elapsed:,.0f} accesses/s ({args.jobs} shard(s))")
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(stats, f, indent=2)
+            print(f"Wrote {args.json}")
+        return 0
+
+    if args.cmd == 'scale':
+        jobs = [(cpus, args.per_cpu, args.seed, args.lines, args.line_size, args.mem_latency)
+                for cpus in args.cpus]
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(_scale_job, jobs))
+        print("=" * 80)
+        print(f"MESI SCALING - {args.per_cpu} accesses per CPU")
+        print("=" * 80)
+        print(f"{'CPUs':>4s} {'Hit rate':>9s} {'Bus txns':>9s} {'Bus util':>9s} {'Avg wait':>9s} "
+              f"{'Inval':>8s} {'M->S':>7s} {'C2C':>8s} {'Cycles':>11s}")
+        print("-" * 80)
+        for r in results:
+            print(f"{r['cpus']:4d} {r['hit_rate'] * 100:8.2f}% {r['bus_transactions']:9d} "
+                  f"{r['bus_utilization'] * 100:8.2f}% {r['avg_bus_wait']:9.1f} "
+                  f"{r['invalidations']:8d} {r['m_to_s']:7d} {r['cache_to_cache']:8d} {r['cycles']:11d}")
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Wrote {args.json}")
+        return 0
+
+    # validate
+    rtl, expected = validate()
+    print("=" * 80)
+    print("MESI VALIDATION - tb_cache_coherence.v scenarios")
+    print("=" * 80)
+    failures = 0
+    for test, _ in TESTBENCH_SCENARIOS:
+        want, got = expected.get(test, {}), rtl.get(test, {})
+        if want == got:
+            print(f"✓ Test {test}: {len(want)} line change(s) match")
+            continue
+        failures += 1
+        print(f"✗ Test {test}:")
+        for key in sorted(set(want) | set(got)):
+            if want.get(key) != got.get(key):
+                print(f"    model: {format_change(key, want[key]) if key in want else '-'}")
+                print(f"    RTL:   {format_change(key, got[key]) if key in got else '-'}")
+    if failures:
+        print(f"✗ {failures} of {len(TESTBENCH_SCENARIOS)} tests differ")
+        return 1
+    print("✓ RTL and model agree")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -147,13 +147,63 @@ module tb_cache_coherence;
         end
     endtask
     
+    // MESI state trace: +mesitrace prints every line state/tag change
+    // (consumed by coherence_model.py validate)
+    reg mesi_trace;
+    initial mesi_trace = $test$plusargs("mesitrace");
+
+    genvar mc, ml;
+    generate
+        for (mc = 0; mc < NUM_CPUS; mc = mc + 1) begin : gen_mesi_cpu
+            for (ml = 0; ml < CACHE_LINES; ml = ml + 1) begin : gen_mesi_line
+                wire [1:0] st = u_dut.gen_caches[mc].u_cache.gen_cache_lines[ml].u_line.state_reg;
+                wire [31:0] tg = u_dut.gen_caches[mc].u_cache.gen_cache_lines[ml].u_line.tag_reg;
+                reg [1:0] last_st;
+                reg [31:0] last_tg;
+
+                initial begin
+                    last_st = 2'b00;
+                    last_tg = 0;
+                end
+
+                always @(posedge clk) begin
+                    if (mesi_trace && rst_n && (st !== last_st || tg !== last_tg))
+                        $display("MESI cpu=%0d line=%0d tag=%h state=%0d->%0d",
+                                 mc, ml, tg, last_st, st);
+                    last_st <= st;
+                    last_tg <= tg;
+                end
+            end
+        end
+    endgenerate
+
     // Test sequence
     integer test_num;
     
+    // VCD control: +novcd, +vcd=<file>, +dumpdepth=<n>, +dump=top (common/vcd_dump.vh)
+    //   +dump=bus       CPU requests, bus arbitration, snoop transactions,
+    //                   memory handshakes and line states (no line data)
+    task dump_subset(input [8*32-1:0] name, output found);
+        begin
+            found = 1;
+            if (name == "bus")
+                $dumpvars(0, clk, rst_n, cpu_addr, cpu_read, cpu_write, cpu_ready, cpu_hit,
+                          mem_read, mem_write, mem_addr, mem_ready, cache_state_dbg,
+                          u_dut.cache_bus_req, u_dut.cache_bus_op, u_dut.cache_bus_addr,
+                          u_dut.cache_bus_grant, u_dut.snoop_op, u_dut.snoop_addr,
+                          u_dut.snoop_data_ready, u_dut.snoop_shared,
+                          u_dut.snoop_hit, u_dut.snoop_supply);
+            else
+                found = 0;
+        end
+    endtask
+    
+    `define VCD_DEFAULT_FILE "cache_coherence_tb.vcd"
+    `define VCD_TOP tb_cache_coherence
+    `define VCD_SUBSETS
+    `include "vcd_dump.vh"
+    
     initial begin
-        $dumpfile("cache_coherence_tb.vcd");
-        $dumpvars(0, tb_cache_coherence);
-        
         $display("========================================");
         $display("Cache Coherence (MESI) Testbench");
         $display("========================================\n");
@@ -122,14 +122,24 @@ module tb_virtual_memory;
         end
     endtask
     
+    // Stimulus replay: +stim=<file> replays accesses from a $readmemh file
+    // (written by vm_trace.py reduce) instead of the built-in tests. One
+    // access per line, {flags, vaddr} with flags[0] = write.
+    localparam STIM_MAX = 65536;
+    reg [35:0] stim_mem [0:STIM_MAX-1];
+    reg [8*256-1:0] stim_file;
+    integer stim_idx;
+    
     // Test sequence
     integer test_num;
     integer i;
     
+    // VCD control: +novcd, +vcd=<file>, +dumpdepth=<n>, +dump=top (common/vcd_dump.vh)
+    `define VCD_DEFAULT_FILE "virtual_memory_tb.vcd"
+    `define VCD_TOP tb_virtual_memory
+    `include "vcd_dump.vh"
+    
     initial begin
-        $dumpfile("virtual_memory_tb.vcd");
-        $dumpvars(0, tb_virtual_memory);
-        
         $display("========================================");
         $display("Virtual Memory Simulator Testbench");
         $display("========================================\n");
@@ -137,65 +147,75 @@ module tb_virtual_memory;
         reset_system();
         test_num = 0;
         
-        // Test 1: First access (TLB miss, page table walk)
-        test_num = 1;
-        $display("Test %0d: First Access (Cold TLB Miss)", test_num);
-        access_address(32'h00001000, 0);
-        #20;
+        if ($value$plusargs("stim=%s", stim_file)) begin
+            $display("Stimulus Replay: %0s", stim_file);
+            $readmemh(stim_file, stim_mem);
+            for (stim_idx = 0; stim_idx < STIM_MAX && stim_mem[stim_idx][0] !== 1'bx;
+                 stim_idx = stim_idx + 1) begin
+                access_address(stim_mem[stim_idx][31:0], stim_mem[stim_idx][32]);
+            end
+            $display("Replayed %0d accesses", stim_idx);
+        end else begin
+            // Test 1: First access (TLB miss, page table walk)
+            test_num = 1;
+            $display("Test %0d: First Access (Cold TLB Miss)", test_num);
+            access_address(32'h00001000, 0);
+            #20;
         
-        // Test 2: Same page access (TLB hit)
-        test_num = 2;
-        $display("\nTest %0d: Same Page Access (TLB Hit)", test_num);
-        access_address(32'h00001004, 0);
-        #20;
+            // Test 2: Same page access (TLB hit)
+            test_num = 2;
+            $display("\nTest %0d: Same Page Access (TLB Hit)", test_num);
+            access_address(32'h00001004, 0);
+            #20;
         
-        // Test 3: Different page (TLB miss)
-        test_num = 3;
-        $display("\nTest %0d: Different Page (TLB Miss)", test_num);
-        access_address(32'h00002000, 0);
-        #20;
+            // Test 3: Different page (TLB miss)
+            test_num = 3;
+            $display("\nTest %0d: Different Page (TLB Miss)", test_num);
+            access_address(32'h00002000, 0);
+            #20;
         
-        // Test 4: Write access
-        test_num = 4;
-        $display("\nTest %0d: Write Access", test_num);
-        access_address(32'h00003000, 1);
-        #20;
+            // Test 4: Write access
+            test_num = 4;
+            $display("\nTest %0d: Write Access", test_num);
+            access_address(32'h00003000, 1);
+            #20;
         
-        // Test 5: Multiple pages (stress TLB)
-        test_num = 5;
-        $display("\nTest %0d: Multiple Page Accesses", test_num);
-        for (i = 0; i < 10; i = i + 1) begin
-            access_address(32'h00010000 + (i * 32'h1000), 0);
-            #10;
-        end
-        #20;
+            // Test 5: Multiple pages (stress TLB)
+            test_num = 5;
+            $display("\nTest %0d: Multiple Page Accesses", test_num);
+            for (i = 0; i < 10; i = i + 1) begin
+                access_address(32'h00010000 + (i * 32'h1000), 0);
+                #10;
+            end
+            #20;
         
-        // Test 6: Re-access earlier pages (check TLB)
-        test_num = 6;
-        $display("\nTest %0d: Re-access Earlier Pages", test_num);
-        access_address(32'h00001000, 0);
-        access_address(32'h00002000, 0);
-        #20;
+            // Test 6: Re-access earlier pages (check TLB)
+            test_num = 6;
+            $display("\nTest %0d: Re-access Earlier Pages", test_num);
+            access_address(32'h00001000, 0);
+            access_address(32'h00002000, 0);
+            #20;
         
-        // Test 7: Change replacement policy to LRU
-        test_num = 7;
-        $display("\nTest %0d: LRU Replacement Policy", test_num);
-        replacement_policy = 2'b01;
-        for (i = 0; i < 5; i = i + 1) begin
-            access_address(32'h00020000 + (i * 32'h1000), 0);
-            #10;
-        end
-        #20;
+            // Test 7: Change replacement policy to LRU
+            test_num = 7;
+            $display("\nTest %0d: LRU Replacement Policy", test_num);
+            replacement_policy = 2'b01;
+            for (i = 0; i < 5; i = i + 1) begin
+                access_address(32'h00020000 + (i * 32'h1000), 0);
+                #10;
+            end
+            #20;
         
-        // Test 8: Clock replacement policy
-        test_num = 8;
-        $display("\nTest %0d: Clock Replacement Policy", test_num);
-        replacement_policy = 2'b10;
-        for (i = 0; i < 5; i = i + 1) begin
-            access_address(32'h00030000 + (i * 32'h1000), 0);
-            #10;
+            // Test 8: Clock replacement policy
+            test_num = 8;
+            $display("\nTest %0d: Clock Replacement Policy", test_num);
+            replacement_policy = 2'b10;
+            for (i = 0; i < 5; i = i + 1) begin
+                access_address(32'h00030000 + (i * 32'h1000), 0);
+                #10;
+            end
+            #20;
         end
-        #20;
         
         // Print statistics
         $display("\n========================================");
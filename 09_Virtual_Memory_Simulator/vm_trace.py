@@ -0,0 +1,660 @@
+#!/usr/bin/env python3
+"""
+Streaming Virtual-Address Trace Engine
+Replays virtual-address traces through bit-exact models of the translation
+and paging hardware:
+  - 07_TLB_MMU tlb.v (16-entry fully associative, 4-bit LRU counters,
+    ASID/global match) or the 32-entry direct-mapped TLB of
+    virtual_memory_controller.v
+  - 07_TLB_MMU page_table_walker.v (Sv32 two-level walk)
+  - page_frame_allocator.v (first free frame) and page_replacement.v
+    (FIFO / LRU / Clock) for demand paging into NUM_FRAMES frames
+
+Traces are memory-mapped and streamed in fixed-size chunks; consecutive
+accesses to the same page are collapsed into one run (exact for every
+model: repeated hits only age the other TLB counters and the frame's
+recency), so multi-GB files run in bounded memory. A reduce step writes a
+short $readmemh stimulus file that tb_virtual_memory.v replays with
++stim=<file>.
+
+Trace files are packed little-endian records (TRACE_DTYPE, 6 bytes):
+    vaddr u32, asid u8, write u8
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools')
+
+TRACE_DTYPE = np.dtype([('vaddr', '<u4'), ('asid', 'u1'), ('write', 'u1')])
+CHUNK = 1 << 22
+
+# RTL configuration
+PAGE_BITS = 12
+NUM_FRAMES = 256                # page_frame_allocator.v / page_replacement.v
+PAGE_TABLE_ENTRIES = 1024       # PTEs per Sv32 table level
+MMU_TLB_ENTRIES = 16            # tlb.v
+VMC_TLB_ENTRIES = 32            # virtual_memory_controller.v
+STIM_MAX = 65536                # tb_virtual_memory.v
+
+# page_replacement.v policy encodings
+POLICIES = {'fifo': 0, 'lru': 1, 'clock': 2}
+
+# Sv32 PTE bits
+PTE_V, PTE_R, PTE_W, PTE_X, PTE_U, PTE_G, PTE_A, PTE_D = (1 << i for i in range(8))
+DEFAULT_PTE_FLAGS = PTE_V | PTE_R | PTE_W | PTE_U | PTE_A
+
+STAT_RE = re.compile(r'^(Page Faults|TLB Hits|TLB Misses):\s+(\d+)', re.M)
+
+
+# ---------------------------------------------------------------------------
+# TLBs
+# ---------------------------------------------------------------------------
+
+class CounterTLB:
+    """tlb.v: fully associative, 4-bit counters, victim by ordered scan"""
+
+    has_asid = True
+
+    def __init__(self, entries=MMU_TLB_ENTRIES):
+        self.entries = entries
+        self.valid = [False] * entries
+        self.vpn = [0] * entries
+        self.asid = [0] * entries
+        self.glob = [False] * entries
+        self.ppn = [0] * entries
+        self.counter = [i & 0xF for i in range(entries)]
+        self.index = {}             # (vpn, asid or None if global) -> entry
+
+    def lookup(self, vpn, asid, count=1):
+        """count consecutive lookups of one page; returns the ppn or None"""
+        i = self.index.get((vpn, asid))
+        if i is None:
+            i = self.index.get((vpn, None))
+            if i is None:
+                return None
+        if count:
+            self.counter = [c - count if c > count else 0 for c in self.counter]
+            self.counter[i] = 0xF
+        return self.ppn[i]
+
+    def victim(self):
+        c, valid = self.counter, self.valid
+        min_idx, min_val = 0, c[0]
+        for i in range(1, self.entries):
+            if c[i] < min_val or not valid[i]:
+                min_idx, min_val = i, c[i]
+        return min_idx
+
+    def refill(self, vpn, ppn, asid, glob=False):
+        i = self.victim()
+        if self.valid[i]:
+            self.index.pop((self.vpn[i], None if self.glob[i] else self.asid[i]), None)
+        self.valid[i] = True
+        self.vpn[i], self.ppn[i], self.asid[i], self.glob[i] = vpn, ppn, asid, glob
+        self.counter[i] = 0xF
+        self.index[(vpn, None if glob else asid)] = i
+
+    def invalidate(self, vpn, asid):
+        """sfence.vma vpn, asid; returns the number of entries dropped"""
+        dropped = 0
+        for i in range(self.entries):
+            if self.valid[i] and self.vpn[i] == vpn and (self.glob[i] or self.asid[i] == asid):
+                self.valid[i] = False
+                self.index.pop((vpn, None if self.glob[i] else self.asid[i]), None)
+                dropped += 1
+        return dropped
+
+
+class DirectTLB:
+    """virtual_memory_controller.v: direct-mapped on vpn[4:0], no ASID"""
+
+    has_asid = False
+
+    def __init__(self, entries=VMC_TLB_ENTRIES):
+        self.entries = entries
+        self.tag = [-1] * entries
+        self.ppn = [0] * entries
+
+    def lookup(self, vpn, asid, count=1):
+        i = vpn & (self.entries - 1)
+        return self.ppn[i] if self.tag[i] == vpn else None
+
+    def refill(self, vpn, ppn, asid, glob=False):
+        i = vpn & (self.entries - 1)
+        self.tag[i], self.ppn[i] = vpn, ppn
+
+    def invalidate(self, vpn, asid):
+        i = vpn & (self.entries - 1)
+        if self.tag[i] == vpn:
+            self.tag[i] = -1
+            return 1
+        return 0
+
+
+TLBS = {'mmu': CounterTLB, 'vmc': DirectTLB}
+
+
+# ---------------------------------------------------------------------------
+# Frame allocation and replacement
+# ---------------------------------------------------------------------------
+
+class PageReplacement:
+    """page_replacement.v; time advances one tick per access"""
+
+    def __init__(self, policy='fifo', frames=NUM_FRAMES):
+        self.policy = POLICIES[policy]
+        self.frames = frames
+        self.fifo = deque()
+        self.timestamp = [0] * frames
+        self.time = 0
+        self.ref = [False] * frames
+        self.hand = 0
+        self.valid = [False] * frames
+
+    def allocated(self, frame):
+        self.valid[frame] = True
+        self.fifo.append(frame)
+        self.timestamp[frame] = self.time
+        self.ref[frame] = True
+        self.time = (self.time + 1) & 0xFFFF
+
+    def accessed(self, frame, count=1):
+        if self.valid[frame]:
+            self.timestamp[frame] = (self.time + count - 1) & 0xFFFF
+            self.ref[frame] = True
+        self.time = (self.time + count) & 0xFFFF
+
+    def _lru_victim(self):
+        victim, lowest = 0, 0xFFFF
+        for i in range(self.frames):
+            if self.valid[i] and self.timestamp[i] < lowest:
+                victim, lowest = i, self.timestamp[i]
+        return victim
+
+    def _clock_victim(self):
+        for i in range(self.frames):
+            f = (self.hand + i) % self.frames
+            if self.valid[f] and not self.ref[f]:
+                return f
+        return self.hand
+
+    def select_victim(self):
+        if self.policy == 0:
+            victim = self.fifo[0]
+        elif self.policy == 1:
+            victim = self._lru_victim()
+        else:
+            victim = self._clock_victim()
+        self.valid[victim] = False
+        if self.policy == 0:
+            self.fifo.popleft()
+        elif self.policy == 2:
+            # Reference bits between the hand and the victim are cleared; when
+            # every frame was referenced the scan finds nothing and the hand
+            # frame is taken without clearing any bits
+            for i in range((victim - self.hand) % self.frames):
+                self.ref[(self.hand + i) % self.frames] = False
+            self.hand = (victim + 1) % self.frames
+        return victim
+
+
+class FrameAllocator:
+    """page_frame_allocator.v: lowest free frame first"""
+
+    def __init__(self, frames=NUM_FRAMES):
+        self.free = [True] * frames
+        self.next_free = 0
+        self.frames = frames
+
+    def alloc(self):
+        while self.next_free < self.frames and not self.free[self.next_free]:
+            self.next_free += 1
+        if self.next_free == self.frames:
+            return None
+        frame = self.next_free
+        self.free[frame] = False
+        return frame
+
+    def dealloc(self, frame):
+        self.free[frame] = True
+        self.next_free = min(self.next_free, frame)
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+class VmEngine:
+    """TLB -> Sv32 walk -> demand paging into a fixed pool of frames
+
+    Page tables are per ASID, PAGE_TABLE_ENTRIES PTEs per level; only
+    mapped pages hold a PTE, so memory stays bounded by the frame count and
+    the number of level-0 tables touched.
+    """
+
+    def __init__(self, tlb='mmu', frames=NUM_FRAMES, policy='fifo', tlb_entries=None):
+        tlb_class = TLBS[tlb]
+        self.tlb = tlb_class(tlb_entries) if tlb_entries else tlb_class()
+        self.frames = frames
+        self.allocator = FrameAllocator(frames)
+        self.replacement = PageReplacement(policy, frames)
+        self.page_tables = {}               # (asid, vpn[19:10]) -> {vpn[9:0]: pte}
+        self.owner = [None] * frames        # frame -> (asid, vpn)
+        self.counts = dict.fromkeys((
+            'accesses', 'runs', 'tlb_hits', 'tlb_misses', 'walks', 'walk_reads',
+            'page_faults', 'victims', 'dirty_victims', 'shootdowns'), 0)
+
+    def walk(self, vpn, asid):
+        """page_table_walker.v: returns the leaf PTE or None on a fault"""
+        c = self.counts
+        c['walks'] += 1
+        c['walk_reads'] += 1
+        table = self.page_tables.get((asid, vpn >> 10))
+        if table is None:
+            return None                     # Level-1 PTE invalid
+        c['walk_reads'] += 1
+        return table.get(vpn & (PAGE_TABLE_ENTRIES - 1))
+
+    def page_fault(self, vpn, asid):
+        """Map vpn to a free frame, or to the replacement victim's"""
+        c = self.counts
+        c['page_faults'] += 1
+        frame = self.allocator.alloc()
+        if frame is None:
+            frame = self.replacement.select_victim()
+            c['victims'] += 1
+            old_asid, old_vpn = self.owner[frame]
+            table = self.page_tables[(old_asid, old_vpn >> 10)]
+            pte = table.pop(old_vpn & (PAGE_TABLE_ENTRIES - 1))
+            if not table:
+                del self.page_tables[(old_asid, old_vpn >> 10)]
+            if pte & PTE_D:
+                c['dirty_victims'] += 1
+            c['shootdowns'] += self.tlb.invalidate(old_vpn, old_asid)
+        self.owner[frame] = (asid, vpn)
+        pte = (frame << 10) | DEFAULT_PTE_FLAGS
+        self.page_tables.setdefault((asid, vpn >> 10), {})[vpn & (PAGE_TABLE_ENTRIES - 1)] = pte
+        self.replacement.allocated(frame)
+        return pte
+
+    def run_pages(self, vpns, asids, writes, counts):
+        """Process runs of `count` consecutive accesses to one page"""
+        c = self.counts
+        tlb = self.tlb
+        replacement = self.replacement
+        if not tlb.has_asid:
+            # One address space: the controller has no ASID to tell them apart
+            asids = itertools.repeat(0)
+        for vpn, asid, write, count in zip(vpns, asids, writes, counts):
+            c['runs'] += 1
+            c['accesses'] += count
+            ppn = tlb.lookup(vpn, asid, count)
+            if ppn is None:
+                c['tlb_misses'] += 1
+                c['tlb_hits'] += count - 1
+                pte = self.walk(vpn, asid)
+                if pte is None:
+                    pte = self.page_fault(vpn, asid)
+                ppn = pte >> 10
+                tlb.refill(vpn, ppn, asid)
+                if count > 1:
+                    tlb.lookup(vpn, asid, count - 1)
+            else:
+                c['tlb_hits'] += count
+            if write:
+                table = self.page_tables[(asid, vpn >> 10)]
+                table[vpn & (PAGE_TABLE_ENTRIES - 1)] |= PTE_D
+            replacement.accessed(ppn, count)
+
+    def run(self, trace, chunk=CHUNK):
+        """Stream a trace (array or memmap of TRACE_DTYPE)"""
+        for start in range(0, len(trace), chunk):
+            vpns, asids, writes, counts = page_runs(trace[start:start + chunk])
+            self.run_pages(vpns.tolist(), asids.tolist(), writes.tolist(), counts.tolist())
+
+    def stats(self):
+        c = dict(self.counts)
+        n = c['accesses']
+        per_million = lambda v: round(v * 1e6 / n, 3) if n else 0.0  # noqa: E731
+        c['tlb_hit_rate'] = round(c['tlb_hits'] / n, 6) if n else None
+        for key in ('tlb_misses', 'walks', 'page_faults', 'victims'):
+            c[f'{key}_per_million'] = per_million(c[key])
+        c['resident_pages'] = sum(owner is not None for owner in self.owner)
+        return c
+
+
+def page_runs(trace):
+    """(vpn, asid, any write, length) of each run of same-page accesses"""
+    if len(trace) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty
+    vaddr = np.asarray(trace['vaddr'])
+    asid = np.asarray(trace['asid'])
+    vpn = (vaddr >> PAGE_BITS).astype(np.int64)
+    key = vpn | (asid.astype(np.int64) << 20)
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    counts = np.diff(np.r_[starts, len(key)])
+    writes = np.maximum.reduceat(np.asarray(trace['write']), starts)
+    return vpn[starts], asid[starts].astype(np.int64), writes.astype(np.int64), counts
+
+
+def simulate(trace, tlb='mmu', frames=NUM_FRAMES, policy='fifo', tlb_entries=None, chunk=CHUNK):
+    engine = VmEngine(tlb, frames, policy, tlb_entries)
+    engine.run(trace, chunk)
+    return engine.stats()
+
+
+# ---------------------------------------------------------------------------
+# Traces
+# ---------------------------------------------------------------------------
+
+def make_trace(vaddr, write, asid=0):
+    trace = np.zeros(len(vaddr), dtype=TRACE_DTYPE)
+    trace['vaddr'] = vaddr
+    trace['asid'] = asid
+    trace['write'] = write
+    return trace
+
+
+def read_trace(path):
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=TRACE_DTYPE)
+    return np.memmap(path, dtype=TRACE_DTYPE, mode='r')
+
+
+def write_trace(path, trace):
+    np.asarray(trace, dtype=TRACE_DTYPE).tofile(path)
+
+
+def synthetic_chunk(rng, n, processes=4, pages=512, write_fraction=0.25):
+    """Page-local accesses from several address spaces: each burst stays on
+    one page, chosen from a skewed hot set, a sequential scan or at random"""
+    bursts = n // 32 + 1
+    asid = rng.integers(0, processes, size=bursts)
+    kind = rng.choice(3, size=bursts, p=[0.7, 0.2, 0.1])
+    hot = np.minimum(rng.zipf(1.3, size=bursts) - 1, pages - 1)
+    scan = (np.arange(bursts) + rng.integers(0, pages)) % pages
+    anywhere = rng.integers(0, pages * 4, size=bursts)
+    page = np.choose(kind, [hot, scan, anywhere]) + 0x10 * (asid + 1)
+    length = rng.geometric(1 / 32, size=bursts)
+    page = np.repeat(page, length)[:n]
+    asid = np.repeat(asid, length)[:n]
+    offset = rng.integers(0, 1024, size=len(page)) * 4
+    vaddr = (page.astype(np.int64) << PAGE_BITS) | offset
+    return make_trace(vaddr, rng.random(len(page)) < write_fraction, asid)
+
+
+def synthetic_trace(n, seed=None, **knobs):
+    rng = np.random.default_rng(seed)
+    parts, total = [], 0
+    while total < n:
+        part = synthetic_chunk(rng, min(CHUNK, n - total), **knobs)
+        parts.append(part)
+        total += len(part)
+    return np.concatenate(parts)[:n]
+
+
+def write_synthetic(path, n, seed=None, **knobs):
+    """Write a synthetic trace of any size, one chunk in memory at a time"""
+    rng = np.random.default_rng(seed)
+    written = 0
+    with open(path, 'wb') as f:
+        while written < n:
+            part = synthetic_chunk(rng, min(CHUNK, n - written), **knobs)
+            part = part[:n - written]
+            part.tofile(f)
+            written += len(part)
+    return written
+
+
+def load_source(spec, length=1_000_000, seed=1):
+    if spec == 'synthetic':
+        return synthetic_trace(length, seed)
+    return read_trace(spec)
+
+
+# ---------------------------------------------------------------------------
+# Reduced stimulus for the RTL
+# ---------------------------------------------------------------------------
+
+def reduce_trace(trace, max_accesses=4096, chunk=CHUNK):
+    """One access per same-page run, up to max_accesses
+
+    Dropped accesses are guaranteed TLB hits on the direct-mapped TLB of
+    virtual_memory_controller.v, so its misses are preserved exactly.
+    Returns (reduced trace, number of original accesses it covers).
+    """
+    parts, covered, kept, last = [], 0, 0, None
+    for start in range(0, len(trace), chunk):
+        piece = trace[start:start + chunk]
+        key = ((np.asarray(piece['vaddr']) >> PAGE_BITS).astype(np.int64)
+               | (np.asarray(piece['asid']).astype(np.int64) << 20))
+        starts = np.flatnonzero(np.r_[key[0] != last, key[1:] != key[:-1]])
+        last = int(key[-1])
+        # The head of this chunk may continue the run kept at the end of the
+        # previous one: fold its write flags into that record
+        head = int(starts[0]) if len(starts) else len(piece)
+        if head and kept:
+            parts[-1]['write'][-1] |= np.asarray(piece['write'][:head]).max()
+        writes = np.maximum.reduceat(np.asarray(piece['write']), starts) if len(starts) else []
+        take = min(len(starts), max_accesses - kept)
+        runs = np.array(piece[starts[:take]])
+        runs['write'] = writes[:take]
+        if take:
+            parts.append(runs)
+        kept += take
+        if take < len(starts):
+            covered += int(starts[take])
+            break
+        covered += len(piece)
+    reduced = np.concatenate(parts) if parts else np.zeros(0, dtype=TRACE_DTYPE)
+    return reduced, covered
+
+
+def stim_hex(trace):
+    """+stim= file contents: {flags, vaddr} per line"""
+    return ''.join(f"{w:X}{a:08X}\n" for w, a in zip(np.asarray(trace['write']).tolist(),
+                                                      np.asarray(trace['vaddr']).tolist()))
+
+
+def expected_rtl_stats(trace):
+    """What tb_virtual_memory.v prints for a +stim replay
+
+    Hits and misses follow the controller's direct-mapped TLB. Page faults
+    are not modelled: PT_L1_READ tests the previous walk's latched pte_l1,
+    which is 0 after reset, so the first walk faults even though the
+    simulated page table always returns a valid RWX PTE, and the printed
+    count is the number of cycles spent in PAGE_FAULT_STATE, which depends
+    on the testbench's fault handshake.
+    """
+    tlb = DirectTLB()
+    hits = misses = 0
+    for vpn in (np.asarray(trace['vaddr']) >> PAGE_BITS).tolist():
+        if tlb.lookup(vpn, 0) is None:
+            misses += 1
+            tlb.refill(vpn, 1, 0)
+        else:
+            hits += 1
+    return {'tlb_hits': hits, 'tlb_misses': misses}
+
+
+def parse_rtl_output(output):
+    names = {'Page Faults': 'page_faults', 'TLB Hits': 'tlb_hits', 'TLB Misses': 'tlb_misses'}
+    return {names[m.group(1)]: int(m.group(2)) for m in STAT_RE.finditer(output)}
+
+
+def replay(stim_path, timeout=600):
+    """Run tb_virtual_memory.v on a stimulus file; returns (rtl, expected)"""
+    sys.path.insert(0, TOOLS_DIR)
+    from sim_cache import compile_project, run_binary
+    from sim_projects import find_project
+
+    with open(stim_path) as f:
+        rows = [line.strip() for line in f if line.strip()]
+    trace = make_trace([int(r[-8:], 16) for r in rows], [int(r[:-8], 16) & 1 for r in rows])
+    binary = compile_project(find_project('09'))
+    with tempfile.TemporaryDirectory(prefix='vm-replay-') as scratch:
+        returncode, output, timed_out = run_binary(
+            binary, scratch, ['+novcd', f'+stim={os.path.abspath(stim_path)}'], timeout)
+    if timed_out or returncode != 0:
+        raise RuntimeError(f"RTL simulation failed ({'timeout' if timed_out else returncode})")
+    return parse_rtl_output(output), expected_rtl_stats(trace)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _run_job(args):
+    path, tlb, frames, policy, tlb_entries = args
+    start = time.perf_counter()
+    stats = simulate(read_trace(path), tlb, frames, policy, tlb_entries)
+    stats.update(tlb=tlb, frames=frames, policy=policy, elapsed=round(time.perf_counter() - start, 3))
+    return stats
+
+
+def parse_names(choices):
+    def parse(text):
+        names = text.split(',')
+        for name in names:
+            if name not in choices:
+                raise argparse.ArgumentTypeError(f"unknown '{name}' (use {', '.join(choices)})")
+        return names
+    return parse
+
+
+def print_report(stats):
+    n = stats['accesses']
+    print(f"Accesses:          {n} in {stats['runs']} same-page runs")
+    print(f"TLB hit rate:      {stats['tlb_hit_rate'] * 100:.4f}%")
+    print(f"{'':19s}{'total':>12s} {'per million':>12s}")
+    for key, label in (('tlb_misses', 'TLB misses'), ('walks', 'Walks'),
+                       ('page_faults', 'Page faults'), ('victims', 'Victims')):
+        print(f"{label + ':':19s}{stats[key]:12d} "
+              f"{stats[key + '_per_million']:12.1f}")
+    print(f"Walk PTE reads:    {stats['walk_reads']}")
+    print(f"Dirty victims:     {stats['dirty_victims']}")
+    print(f"TLB shootdowns:    {stats['shootdowns']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming virtual-address trace engine")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p = sub.add_parser('gen', help="write a synthetic trace file (any size)")
+    p.add_argument('output')
+    p.add_argument('-n', '--length', type=int, default=10_000_000)
+    p.add_argument('-s', '--seed', type=int, default=1)
+    p.add_argument('--processes', type=int, default=4, help="number of ASIDs")
+    p.add_argument('--pages', type=int, default=512, help="hot pages per process")
+
+    p = sub.add_parser('run', help="replay a trace through the models")
+    p.add_argument('source', help="trace file or 'synthetic'")
+    p.add_argument('--tlb', type=parse_names(list(TLBS)), default=['mmu'],
+                   help="mmu (07 tlb.v) and/or vmc (09 controller TLB)")
+    p.add_argument('--tlb-entries', type=int)
+    p.add_argument('--policy', type=parse_names(list(POLICIES)), default=['fifo'],
+                   help="comma-separated: fifo, lru, clock")
+    p.add_argument('--frames', type=int, default=NUM_FRAMES)
+    p.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+    p.add_argument('-n', '--length', type=int, default=10_000_000)
+    p.add_argument('-s', '--seed', type=int, default=1)
+    p.add_argument('--json', help="write statistics here")
+
+    p = sub.add_parser('reduce', help="write a +stim file for tb_virtual_memory.v")
+    p.add_argument('source', help="trace file or 'synthetic'")
+    p.add_argument('output')
+    p.add_argument('--max', type=int, default=4096, help=f"accesses to keep (max {STIM_MAX})")
+    p.add_argument('-n', '--length', type=int, default=1_000_000)
+    p.add_argument('-s', '--seed', type=int, default=1)
+
+    p = sub.add_parser('replay', help="run a +stim file on the RTL and compare")
+    p.add_argument('stim')
+    args = parser.parse_args()
+
+    if args.cmd == 'gen':
+        start = time.perf_counter()
+        n = write_synthetic(args.output, args.length, args.seed,
+                            processes=args.processes, pages=args.pages)
+        print(f"✓ Wrote {n} accesses ({n * TRACE_DTYPE.itemsize / 1e6:.1f} MB) to {args.output} "
+              f"in {time.perf_counter() - start:.1f}s")
+        return 0
+
+    if args.cmd == 'run':
+        path, tmp = args.source, None
+        if not os.path.isfile(args.source):
+            fd, tmp = tempfile.mkstemp(suffix='.vat')
+            os.close(fd)
+            write_trace(tmp, load_source(args.source, args.length, args.seed))
+            path = tmp
+        jobs = [(path, tlb, args.frames, policy, args.tlb_entries)
+                for tlb, policy in itertools.product(args.tlb, args.policy)]
+        try:
+            start = time.perf_counter()
+            if len(jobs) == 1:
+                results = [_run_job(jobs[0])]
+            else:
+                with ProcessPoolExecutor(max_workers=min(args.jobs, len(jobs))) as pool:
+                    results = list(pool.map(_run_job, jobs))
+            elapsed = time.perf_counter() - start
+        finally:
+            if tmp:
+                os.unlink(tmp)
+        for stats in results:
+            print("=" * 80)
+            print(f"VM TRACE - {stats['tlb']} TLB, {stats['frames']} frames, {stats['policy']} replacement")
+            print("=" * 80)
+            print_report(stats)
+            print(f"\n{stats['accesses'] / max(stats['elapsed'], 1e-9):,.0f} accesses/s\n")
+        print(f"Wall time {elapsed:.2f}s")
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Wrote {args.json}")
+        return 0
+
+    if args.cmd == 'reduce':
+        if args.max > STIM_MAX:
+            parser.error(f"--max is limited to {STIM_MAX} (STIM_MAX in tb_virtual_memory.v)")
+        reduced, covered = reduce_trace(load_source(args.source, args.length, args.seed), args.max)
+        with open(args.output, 'w') as f:
+            f.write(stim_hex(reduced))
+        expected = expected_rtl_stats(reduced)
+        print(f"✓ Wrote {len(reduced)} accesses covering {covered} trace accesses to {args.output}")
+        print(f"  Expected RTL: {expected['tlb_hits']} TLB hits, {expected['tlb_misses']} misses")
+        print(f"  Replay: vvp virtual_memory_sim +stim={args.output}")
+        return 0
+
+    # replay
+    rtl, expected = replay(args.stim)
+    print("=" * 80)
+    print(f"VM STIMULUS REPLAY - {args.stim}")
+    print("=" * 80)
+    failures = 0
+    for key, value in expected.items():
+        got = rtl.get(key)
+        ok = got == value
+        failures += not ok
+        print(f"{'✓' if ok else '✗'} {key:12s} RTL={got} model={value}")
+    print(f"  page_faults  RTL={rtl.get('page_faults')} (not compared: the first walk "
+          f"after reset faults on the stale L1 PTE)")
+    if failures:
+        print(f"✗ {failures} mismatches")
+        return 1
+    print("✓ RTL and model agree")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
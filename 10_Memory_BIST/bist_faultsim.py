@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Bit-parallel March/BIST Fault Simulator
+Runs the March element sequences enumerated by march_generator.v and the
+LFSR write/verify test of memory_bist.v against bulk-injected memory
+faults:
+  - SAF   stuck-at-0/1
+  - TF    transition (cannot rise / cannot fall)
+  - CFin  inversion coupling (aggressor transition inverts the victim)
+  - CFid  idempotent coupling (aggressor transition forces the victim)
+  - CFst  state coupling (victim forced while the aggressor holds a value)
+  - AF    address decoder (no cell / wrong cell / two cells)
+
+Each fault instance only involves one or two words, and operations on
+every other word cannot change them, so instead of simulating the whole
+2^ADDR_WIDTH x DATA_WIDTH array per fault, the engine keeps just the
+involved words of every instance in a packed uint32 array and replays each
+March element as a visit to them in the element's address order. Bit-level
+faults are 32-bit masks inside those words, so one NumPy operation applies
+a March operation to thousands of fault instances at once and the cost is
+independent of memory depth. Test lengths are counted in memory_bist.v
+cycles (one cycle per operation with mem_ready tied high).
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+# RTL configuration
+DATA_WIDTH = 32
+MEM_DEPTH = 1024                # memory_bist.v default (the testbench uses 256)
+ONES = (1 << DATA_WIDTH) - 1
+LFSR_SEED = 0xDEADBEEF          # memory_bist.v seed_value on bist_start
+RUN_OVERHEAD = 2                # IDLE -> RUN_* and COMPLETE -> PASS/FAIL
+AF_FLOAT = 0                    # read value of an address that selects no cell
+
+# Algorithms in march_generator.v march_type order, plus memory_bist.v
+# TEST_LFSR_RANDOM. Data: 0/1 solid, c/~c the generator's checker_pattern
+# (addr[0] ? ones : zeros), p/~p the LFSR sequence.
+MARCH_NOTATION = {
+    'march_c_minus':  "⇑(w0); ⇑(r0,w1); ⇑(r1,w0); ⇓(r0,w1); ⇓(r1,w0); ⇓(r0)",
+    'march_c_plus':   "⇑(w0); ⇑(r0,w1,r1); ⇑(r1,w0,r0); ⇓(r0,w1,r1); ⇓(r1,w0,r0); ⇓(r0)",
+    'march_b':        "⇑(w0); ⇑(r0,w1,r1,w0,r0,w1); ⇑(r1,w0,w1); ⇓(r1,w0,w1,w0); ⇓(r0,w1,w0)",
+    'march_lr':       "⇑(w0); ⇓(r0,w1); ⇑(r1,w0,r0,w1); ⇑(r1,w0); ⇑(r0,w1,r1,w0); ⇑(r0)",
+    'checkerboard':   "⇑(wc); ⇑(rc); ⇑(w~c); ⇑(r~c)",
+    'walking_ones':   None,
+    'walking_zeros':  None,
+    'all_zeros_ones': "⇑(w0); ⇑(r0); ⇑(w1); ⇑(r1)",
+    'lfsr':           "⇑(wp); ⇑(rp)",
+}
+
+# The march_generator.v FSM executes March C- (M0..M5) for every march_type
+RTL_EXECUTES = 'march_c_minus'
+
+# memory_bist.v RUN_LFSR issues the verify reads but never compares them
+# (lfsr_error is never set), so on the RTL this test detects nothing; its
+# row is what the test would cover with the compare added
+RTL_NO_COMPARE = ('lfsr',)
+
+FAULT_GROUPS = ('SAF', 'TF', 'CFin', 'CFid', 'CFst', 'AF')
+
+
+# ---------------------------------------------------------------------------
+# Algorithms
+# ---------------------------------------------------------------------------
+
+def parse_march(text):
+    """'⇑(r0,w1); ⇓(r1)' -> [(ascending, ((is_write, data), ...)), ...]"""
+    elements = []
+    for element in text.split(';'):
+        element = element.strip()
+        if element[0] not in '⇑⇓⇕' or element[1] != '(' or element[-1] != ')':
+            raise ValueError(f"bad March element '{element}'")
+        ops = []
+        for op in element[2:-1].split(','):
+            op = op.strip()
+            if op[0] not in 'rw':
+                raise ValueError(f"bad March operation '{op}'")
+            data = op[1:]
+            ops.append((op[0] == 'w', int(data) * ONES if data in ('0', '1') else data))
+        elements.append((element[0] != '⇓', tuple(ops)))
+    return elements
+
+
+def walking(ones):
+    """one write/verify pass per bit position: ⇑(w 1<<b); ⇑(r 1<<b)"""
+    elements = []
+    for bit in range(DATA_WIDTH):
+        data = 1 << bit if ones else ONES ^ (1 << bit)
+        elements += [(True, ((True, data),)), (True, ((False, data),))]
+    return elements
+
+
+def algorithm(name):
+    text = MARCH_NOTATION[name]
+    if text is None:
+        return walking(name == 'walking_ones')
+    return parse_march(text)
+
+
+def ops_per_word(elements):
+    return sum(len(ops) for _, ops in elements)
+
+
+def test_cycles(ops, op_cycles=1):
+    return ops * op_cycles + RUN_OVERHEAD
+
+
+@lru_cache(maxsize=4)
+def lfsr_patterns(words, seed=LFSR_SEED):
+    """lfsr_generator.v state written to each address during the write phase"""
+    out = np.empty(words, np.uint32)
+    s = seed
+    for i in range(words):
+        out[i] = s
+        feedback = ((s >> 31) ^ (s >> 21) ^ (s >> 1) ^ s) & 1
+        s = ((s << 1) | feedback) & ONES
+    return out
+
+
+def pattern_data(data, addr, words):
+    """expected word for each address in addr"""
+    if isinstance(data, int):
+        return np.full(len(addr), data, np.uint32)
+    if data in ('c', '~c'):
+        word = np.where(addr & 1, np.uint32(ONES), np.uint32(0))
+    elif data in ('p', '~p'):
+        word = lfsr_patterns(words)[addr]
+    else:
+        raise ValueError(f"unknown data pattern '{data}'")
+    return ~word if data[0] == '~' else word
+
+
+# ---------------------------------------------------------------------------
+# Fault sets: packed involved words of every instance
+# ---------------------------------------------------------------------------
+
+class FaultSet:
+    """n instances of one fault group; cells[i, s] is the word behind addrs[i, s]"""
+
+    fields = ()
+
+    def __init__(self, group, addrs):
+        self.group = group
+        self.addrs = addrs
+        self.count = len(addrs)
+        self.rows = np.arange(self.count)
+        self.cells = np.zeros(addrs.shape, np.uint32)
+
+    def subset(self, idx):
+        other = copy.copy(self)
+        for name in ('addrs',) + self.fields:
+            setattr(other, name, getattr(self, name)[idx])
+        other.count = len(other.addrs)
+        other.rows = np.arange(other.count)
+        other.cells = self.cells[idx].copy()
+        return other
+
+    def reset(self):
+        """power-up: every word 0 (as tb_memory_bist.v), then static faults"""
+        self.cells[:] = 0
+
+    def write(self, slot, data):
+        self.cells[self.rows, slot] = data
+
+    def read(self, slot):
+        return self.cells[self.rows, slot]
+
+
+class CellFaults(FaultSet):
+    """SAF (value = stuck value) or TF (value 1 = cannot rise, 0 = cannot fall)"""
+
+    fields = ('mask', 'value')
+
+    def __init__(self, group, addr, mask, value):
+        super().__init__(group, addr[:, None])
+        self.mask, self.value = mask, value
+
+    def _force(self, word):
+        return np.where(self.value, word | self.mask, word & ~self.mask)
+
+    def reset(self):
+        super().reset()
+        if self.group == 'SAF':
+            self.cells[:, 0] = self._force(self.cells[:, 0])
+
+    def write(self, slot, data):
+        old = self.cells[:, 0]
+        if self.group == 'SAF':
+            new = self._force(data)
+        else:
+            blocked_rise = ~old & data & self.mask
+            blocked_fall = old & ~data & self.mask
+            new = np.where(self.value, data & ~blocked_rise, data | blocked_fall)
+        self.cells[:, 0] = new
+
+
+class CouplingFaults(FaultSet):
+    """victim bit in word 0, aggressor bit in word 1.
+    CFin/CFid: trigger = aggressor rise (1) or fall (0); CFid forces value.
+    CFst: while the aggressor bit equals trigger the victim bit is value."""
+
+    fields = ('vmask', 'amask', 'trigger', 'value')
+
+    def __init__(self, group, victim, aggressor, vmask, amask, trigger, value):
+        super().__init__(group, np.stack([victim, aggressor], axis=1))
+        self.vmask, self.amask = vmask, amask
+        self.trigger, self.value = trigger, value
+
+    def _force_victim(self, hit):
+        v = self.cells[:, 0]
+        forced = np.where(self.value, v | self.vmask, v & ~self.vmask)
+        self.cells[:, 0] = np.where(hit, forced, v)
+
+    def _state_hit(self):
+        return ((self.cells[:, 1] & self.amask) != 0) == self.trigger.astype(bool)
+
+    def reset(self):
+        super().reset()
+        if self.group == 'CFst':
+            self._force_victim(self._state_hit())
+
+    def write(self, slot, data):
+        old = self.cells[:, 1].copy()
+        super().write(slot, data)
+        if self.group == 'CFst':
+            self._force_victim(self._state_hit())
+            return
+        new = self.cells[:, 1]
+        rose = (~old & new & self.amask) != 0
+        fell = (old & ~new & self.amask) != 0
+        hit = (slot == 1) & np.where(self.trigger, rose, fell)
+        if self.group == 'CFin':
+            self.cells[:, 0] ^= np.where(hit, self.vmask, 0).astype(np.uint32)
+        else:
+            self._force_victim(hit)
+
+
+AF_NONE, AF_ALIAS, AF_MULTI = 0, 1, 2
+
+
+class DecoderFaults(FaultSet):
+    """address 0 selects no cell, the cell of address 1, or both cells
+    (reads wired-AND); address 1 always selects its own cell"""
+
+    fields = ('kind',)
+
+    def __init__(self, addr, other, kind):
+        super().__init__('AF', np.stack([addr, other], axis=1))
+        self.kind = kind
+
+    def write(self, slot, data):
+        to1 = (slot == 1) | (self.kind != AF_NONE)
+        to0 = (slot == 0) & (self.kind == AF_MULTI)
+        self.cells[:, 1] = np.where(to1, data, self.cells[:, 1])
+        self.cells[:, 0] = np.where(to0, data, self.cells[:, 0])
+
+    def read(self, slot):
+        c0, c1 = self.cells[:, 0], self.cells[:, 1]
+        own = np.where(self.kind == AF_ALIAS, c1,
+                       np.where(self.kind == AF_MULTI, c0 & c1, np.uint32(AF_FLOAT)))
+        return np.where(slot == 1, c1, own)
+
+
+def make_faults(count, words, seed=1, groups=FAULT_GROUPS):
+    """count random instances per group; deterministic in seed"""
+    rng = np.random.default_rng(seed)
+
+    def addr():
+        return rng.integers(0, words, count)
+
+    def other(a):
+        return (a + rng.integers(1, words, count)) % words
+
+    def bit():
+        return (np.uint32(1) << rng.integers(0, DATA_WIDTH, count).astype(np.uint32)).astype(np.uint32)
+
+    def flag():
+        return rng.integers(0, 2, count).astype(np.uint32)
+
+    sets = []
+    for group in groups:
+        if group in ('SAF', 'TF'):
+            sets.append(CellFaults(group, addr(), bit(), flag()))
+        elif group in ('CFin', 'CFid', 'CFst'):
+            victim = addr()
+            sets.append(CouplingFaults(group, victim, other(victim), bit(), bit(), flag(), flag()))
+        elif group == 'AF':
+            a = addr()
+            sets.append(DecoderFaults(a, other(a), rng.integers(0, 3, count)))
+        else:
+            raise ValueError(f"unknown fault group '{group}'")
+    return sets
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+def run_faults(elements, faults, words):
+    """first failing operation index per instance (-1 if undetected)"""
+    faults.reset()
+    n, naddr = faults.addrs.shape
+    first = np.full(n, -1, np.int64)
+    base = 0
+    for ascending, ops in elements:
+        if naddr == 1:
+            order = [np.zeros(n, np.int64)]
+        else:
+            lead = np.where((faults.addrs[:, 0] < faults.addrs[:, 1]) == ascending, 0, 1)
+            order = [lead, 1 - lead]
+        for slot in order:
+            addr = faults.addrs[faults.rows, slot]
+            pos = addr if ascending else words - 1 - addr
+            for k, (is_write, data) in enumerate(ops):
+                expected = pattern_data(data, addr, words)
+                if is_write:
+                    faults.write(slot, expected)
+                    continue
+                fail = (faults.read(slot) != expected) & (first < 0)
+                first[fail] = base + pos[fail] * len(ops) + k
+        base += words * len(ops)
+    return first
+
+
+def reference_first_fail(elements, faults, index, words):
+    """operation-by-operation run of one instance over every address"""
+    one = faults.subset(np.array([index]))
+    one.reset()
+    good = np.zeros(words, np.uint32)
+    slots = {int(a): s for s, a in enumerate(one.addrs[0])}
+    op = 0
+    for ascending, ops in elements:
+        for a in (range(words) if ascending else range(words - 1, -1, -1)):
+            slot = slots.get(a)
+            for is_write, data in ops:
+                expected = pattern_data(data, np.array([a]), words)
+                if slot is None:
+                    if is_write:
+                        good[a] = expected[0]
+                    elif good[a] != expected[0]:
+                        return op
+                elif is_write:
+                    one.write(np.array([slot]), expected)
+                elif one.read(np.array([slot]))[0] != expected[0]:
+                    return op
+                op += 1
+    return -1
+
+
+def simulate(name, words=MEM_DEPTH, count=2000, seed=1, groups=FAULT_GROUPS, op_cycles=1):
+    """coverage of one algorithm over a fresh fault population"""
+    start = time.perf_counter()
+    elements = algorithm(name)
+    ops = ops_per_word(elements)
+    stats = {'algorithm': name, 'words': words, 'ops_per_word': ops,
+             'cycles': test_cycles(ops * words, op_cycles), 'groups': {},
+             'rtl': ('executed' if name == RTL_EXECUTES else
+                     'no compare' if name in RTL_NO_COMPARE else 'model only')}
+    detected_total = injected = 0
+    detect_cycles = []
+    for faults in make_faults(count, words, seed, groups):
+        first = run_faults(elements, faults, words)
+        hit = first >= 0
+        stats['groups'][faults.group] = {'injected': faults.count, 'detected': int(hit.sum()),
+                                         'coverage': float(hit.mean())}
+        detected_total += int(hit.sum())
+        injected += faults.count
+        detect_cycles.append(test_cycles(first[hit] + 1, op_cycles))
+    detect_cycles = np.concatenate(detect_cycles)
+    stats.update(injected=injected, detected=detected_total,
+                 coverage=detected_total / injected,
+                 mean_detect_cycles=float(detect_cycles.mean()) if len(detect_cycles) else None,
+                 elapsed=round(time.perf_counter() - start, 3))
+    return stats
+
+
+def verify(name, words=64, count=200, seed=1):
+    """engine vs reference; returns the number of disagreeing instances"""
+    elements = algorithm(name)
+    bad = 0
+    for faults in make_faults(count, words, seed):
+        first = run_faults(elements, faults, words)
+        for i in range(faults.count):
+            bad += reference_first_fail(elements, faults, i, words) != first[i]
+    return bad
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _run_job(args):
+    return simulate(*args)
+
+
+def parse_names(choices):
+    def parse(text):
+        names = text.split(',')
+        for name in names:
+            if name not in choices:
+                raise argparse.ArgumentTypeError(f"unknown '{name}' (use {', '.join(choices)})")
+        return names
+    return parse
+
+
+def format_table(results, groups):
+    lines = [f"{'Algorithm':16s}{'Ops':>5s}{'Cycles':>11s}"
+             + ''.join(f"{g:>7s}" for g in groups) + f"{'All':>8s}{'Detect':>10s}"]
+    for r in results:
+        detect = f"{r['mean_detect_cycles']:10.0f}" if r['mean_detect_cycles'] is not None else f"{'-':>10s}"
+        mark = {'executed': '*', 'no compare': '!'}.get(r['rtl'], ' ')
+        lines.append(f"{r['algorithm'] + mark:16s}{str(r['ops_per_word']) + 'N':>5s}{r['cycles']:11d}"
+                     + ''.join(f"{r['groups'][g]['coverage'] * 100:6.1f}%" for g in groups)
+                     + f"{r['coverage'] * 100:7.2f}%{detect}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bit-parallel March/BIST fault simulator")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p = sub.add_parser('run', help="fault coverage and test length per algorithm")
+    p.add_argument('--alg', type=parse_names(list(MARCH_NOTATION)), default=list(MARCH_NOTATION),
+                   help="comma-separated algorithms (default: all)")
+    p.add_argument('--groups', type=parse_names(list(FAULT_GROUPS)), default=list(FAULT_GROUPS),
+                   help="comma-separated fault groups (default: all)")
+    p.add_argument('-w', '--words', type=int, default=MEM_DEPTH, help="memory depth")
+    p.add_argument('-n', '--faults', type=int, default=2000, help="instances per fault group")
+    p.add_argument('-s', '--seed', type=int, default=1)
+    p.add_argument('--op-cycles', type=int, default=1, help="cycles per memory operation")
+    p.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+    p.add_argument('--json', help="write results here")
+
+    p = sub.add_parser('verify', help="check the engine against an op-by-op reference")
+    p.add_argument('--alg', type=parse_names(list(MARCH_NOTATION)), default=list(MARCH_NOTATION))
+    p.add_argument('-w', '--words', type=int, default=64)
+    p.add_argument('-n', '--faults', type=int, default=200)
+    p.add_argument('-s', '--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.words < 2:
+        parser.error("--words must be at least 2")
+
+    if args.cmd == 'verify':
+        failures = 0
+        for name in args.alg:
+            bad = verify(name, args.words, args.faults, args.seed)
+            failures += bad
+            print(f"{'✓' if not bad else '✗'} {name:16s} {bad} mismatches")
+        return 1 if failures else 0
+
+    jobs = [(name, args.words, args.faults, args.seed, args.groups, args.op_cycles) for name in args.alg]
+    start = time.perf_counter()
+    if len(jobs) == 1:
+        results = [_run_job(jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(jobs))) as pool:
+            results = list(pool.map(_run_job, jobs))
+    elapsed = time.perf_counter() - start
+
+    instances = results[0]['injected']
+    print("=" * 80)
+    print(f"BIST FAULT SIMULATION - {args.words} x {DATA_WIDTH} memory, "
+          f"{instances} faults ({args.faults} per group)")
+    print("=" * 80)
+    print(format_table(results, args.groups))
+    print("\n* executed by march_generator.v for every march_type; unmarked: model only")
+    if any(r['rtl'] == 'no compare' for r in results):
+        print("! memory_bist.v never compares the verify reads: 0% on the RTL, "
+              "coverage shown as if it did")
+    print(f"Cycles: full test at {args.op_cycles} cycle(s)/op; "
+          f"Detect: mean cycles to first failing read")
+    print(f"\n{instances * len(results) / elapsed:,.0f} fault runs/s, wall time {elapsed:.2f}s")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
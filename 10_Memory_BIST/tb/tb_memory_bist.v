@@ -160,10 +160,12 @@ module tb_memory_bist;
     // Test sequence
     integer test_num;
     
+    // VCD control: +novcd, +vcd=<file>, +dumpdepth=<n>, +dump=top (common/vcd_dump.vh)
+    `define VCD_DEFAULT_FILE "memory_bist_tb.vcd"
+    `define VCD_TOP tb_memory_bist
+    `include "vcd_dump.vh"
+    
     initial begin
-        $dumpfile("memory_bist_tb.vcd");
-        $dumpvars(0, tb_memory_bist);
-        
         $display("========================================");
         $display("Memory BIST Testbench");
         $display("========================================");
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Interrupt Latency Benchmark for the Interrupt-Enabled Pipeline
+Generates long interrupt arrival streams (Poisson or bursty, with a
+configurable mix over the 16 external lines, the timer and the software
+interrupt), runs them through the testbench's benchmark mode
+(+stimulus=<file>) and measures, per source:
+  - latency   assertion to the fetch of the mtvec target
+  - wait      assertion to acceptance (queued behind other traps or MIE=0)
+  - entry     acceptance to the mtvec fetch (pipeline drain and flush)
+  - flushed   instructions killed by the trap flush
+  - cost      acceptance to the first fetch back in main code
+Independent seeds run in parallel; percentiles are over all of them, and
+throughput lost to traps is measured against an interrupt-free run.
+
+Stimulus files are $readmemh images of {cycle[26:0], source[4:0]} words
+in cycle order, ended by ffffffff. Sources 0-15 are the external lines,
+16 the timer and 17 the software interrupt.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools')
+
+SOURCE_NAMES = [f"ext{n}" for n in range(16)] + ['timer', 'sw']
+NUM_SOURCES = len(SOURCE_NAMES)
+# Taken in this order when several are pending (interrupt_pipeline.v)
+PRIORITY_ORDER = [16, 17] + list(range(16))
+
+STIM_WORDS = 65536       # tb_interrupt_pipeline.v: reg [31:0] stim [0:65535]
+MAX_CYCLE = (1 << 27) - 1
+END_MARK = 0xFFFFFFFF
+
+MIXES = {
+    'uniform': {name: 1.0 for name in SOURCE_NAMES},
+    'high': dict({name: 0.25 for name in SOURCE_NAMES}, timer=4.0, sw=2.0,
+                 ext0=4.0, ext1=2.0),
+    'low': dict({name: 0.25 for name in SOURCE_NAMES}, ext12=2.0, ext13=2.0,
+                ext14=4.0, ext15=4.0),
+    'external': dict({name: 1.0 for name in SOURCE_NAMES}, timer=0.0, sw=0.0),
+}
+
+TRAP_RE = re.compile(r'^TRAP' + r'\s+(-?\d+)' * 7)
+PENDING_RE = re.compile(r'^PENDING\s+(\d+)\s+(\d+)')
+MERGE_RE = re.compile(r'^MERGE\s+(\d+)\s+(\d+)')
+SUMMARY_RE = re.compile(r'^SUMMARY\s+(.*)')
+
+TRAP_FIELDS = ('source', 'assert', 'accept', 'taken', 'fetch', 'resume', 'flushed')
+METRICS = ('latency', 'wait', 'entry', 'flushed', 'cost')
+
+
+# ----------------------------------------------------------------------------
+# Stimulus
+# ----------------------------------------------------------------------------
+
+def parse_mix(text):
+    """'uniform'/'high'/'low'/'external' or source weights, e.g. timer=2,ext3=1"""
+    if text in MIXES:
+        return dict(MIXES[text])
+    mix = {name: 0.0 for name in SOURCE_NAMES}
+    for item in filter(None, text.split(',')):
+        name, value = item.split('=')
+        if name not in mix:
+            raise argparse.ArgumentTypeError(f"unknown source '{name}' "
+                                             f"(use {', '.join(SOURCE_NAMES)})")
+        mix[name] = float(value)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("mix has no weight on any source")
+    return mix
+
+
+def arrival_times(rng, pattern, cycles, rate, burst=8.0, burst_gap=4.0):
+    """Event cycles for one stream; rate is events per 1000 cycles
+
+    poisson: exponential inter-arrival times.
+    bursty:  geometric bursts (mean `burst` events, mean `burst_gap` cycles
+             apart) separated by exponential idle periods, at the same
+             long-run rate as poisson.
+    """
+    mean_gap = 1000.0 / rate
+    if pattern == 'bursty':
+        idle = burst * mean_gap - (burst - 1) * burst_gap
+        if idle <= 0:
+            raise ValueError(f"rate {rate}/kcycle cannot be reached with bursts of "
+                             f"{burst} events {burst_gap} cycles apart")
+    elif pattern != 'poisson':
+        raise ValueError(f"unknown pattern '{pattern}'")
+
+    def gaps(n):
+        if pattern == 'poisson':
+            return rng.exponential(mean_gap, n)
+        sizes = rng.geometric(1.0 / burst, max(1, int(n / burst)))
+        out = rng.exponential(burst_gap, sizes.sum())
+        out[np.cumsum(sizes) - sizes] = rng.exponential(idle, len(sizes))
+        return out
+
+    n = int(cycles / mean_gap * 1.2) + 16
+    times = np.cumsum(gaps(n))
+    while times[-1] < cycles:
+        times = np.r_[times, times[-1] + np.cumsum(gaps(n))]
+    times = times[times < cycles]
+    return times.astype(np.int64)
+
+
+def generate(seed, pattern='poisson', cycles=100_000, rate=5.0, mix=None, burst=8.0,
+             burst_gap=4.0):
+    """(cycle, source) arrays for one seed"""
+    rng = np.random.default_rng(seed)
+    mix = mix or MIXES['uniform']
+    weights = np.array([mix[name] for name in SOURCE_NAMES], dtype=float)
+    times = arrival_times(rng, pattern, cycles, rate, burst, burst_gap)
+    sources = rng.choice(NUM_SOURCES, size=len(times), p=weights / weights.sum())
+    return times, sources
+
+
+def write_stimulus(path, times, sources):
+    if len(times) >= STIM_WORDS:
+        raise ValueError(f"{len(times)} events; the testbench holds {STIM_WORDS - 1}")
+    if len(times) and times[-1] > MAX_CYCLE:
+        raise ValueError(f"event at cycle {times[-1]} beyond the 27-bit stimulus field")
+    words = (times.astype(np.uint64) << np.uint64(5)) | sources.astype(np.uint64)
+    with open(path, 'w') as f:
+        f.write(f"// {len(times)} interrupt events: {{cycle[26:0], source[4:0]}}\n")
+        f.write(''.join(f"{w:08x}\n" for w in words.tolist()))
+        f.write(f"{END_MARK:08x}\n")
+
+
+# ----------------------------------------------------------------------------
+# Simulation
+# ----------------------------------------------------------------------------
+
+def parse_output(lines):
+    """Collect TRAP/MERGE/PENDING/SUMMARY lines of one benchmark run"""
+    traps, pending = [], []
+    merged = [0] * NUM_SOURCES
+    summary = None
+    for line in lines:
+        m = TRAP_RE.match(line)
+        if m:
+            traps.append(tuple(int(v) for v in m.groups()))
+            continue
+        m = MERGE_RE.match(line)
+        if m:
+            merged[int(m.group(2))] += 1
+            continue
+        m = PENDING_RE.match(line)
+        if m:
+            pending.append((int(m.group(1)), int(m.group(2))))
+            continue
+        m = SUMMARY_RE.match(line)
+        if m:
+            summary = {k: int(v) for k, v in (item.split('=') for item in m.group(1).split())}
+    return {'traps': traps, 'merged': merged, 'pending': pending, 'summary': summary}
+
+
+def _run_job(binary, job):
+    """Simulate one seed (seed None: the interrupt-free baseline)"""
+    with tempfile.TemporaryDirectory(prefix='irq-latency-') as scratch:
+        stim = os.path.join(scratch, 'stimulus.hex')
+        if job['seed'] is None:
+            times = sources = np.zeros(0, dtype=np.int64)
+        else:
+            times, sources = generate(job['seed'], job['pattern'], job['cycles'], job['rate'],
+                                      job['mix'], job['burst'], job['burst_gap'])
+        write_stimulus(stim, times, sources)
+        cmd = ['vvp', '-n', binary, f"+stimulus={stim}", f"+cycles={job['cycles']}",
+               f"+handler={job['handler']}", '+novcd']
+        result = subprocess.run(cmd, cwd=scratch, capture_output=True, text=True,
+                                timeout=job['timeout'])
+    run = parse_output(result.stdout.splitlines())
+    if result.returncode != 0 or run['summary'] is None:
+        raise RuntimeError(f"seed {job['seed']}: no SUMMARY line (vvp exited with "
+                           f"{result.returncode})\n{result.stdout[-2000:]}{result.stderr}")
+    run['seed'] = job['seed']
+    return run
+
+
+def run_seeds(seeds, workers=None, **config):
+    """Baseline plus one run per seed, in parallel; returns (baseline, runs)"""
+    sys.path.insert(0, TOOLS_DIR)
+    from sim_cache import compile_project
+    from sim_projects import find_project
+
+    binary = compile_project(find_project('11'))
+    jobs = [dict(config, seed=seed) for seed in [None] + list(seeds)]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        runs = list(pool.map(_run_job, [binary] * len(jobs), jobs))
+    return runs[0], runs[1:]
+
+
+# ----------------------------------------------------------------------------
+# Analysis
+# ----------------------------------------------------------------------------
+
+def trap_metrics(traps):
+    """Per-trap metric arrays from TRAP records"""
+    t = np.array(traps, dtype=np.int64).reshape(-1, len(TRAP_FIELDS))
+    col = {name: t[:, i] for i, name in enumerate(TRAP_FIELDS)}
+    return col['source'], {
+        'latency': col['fetch'] - col['assert'],
+        'wait': col['accept'] - col['assert'],
+        'entry': col['fetch'] - col['accept'],
+        'flushed': col['flushed'],
+        'cost': col['resume'] - col['accept'],
+    }
+
+
+def percentiles(values):
+    if not len(values):
+        return None
+    return {'p50': int(np.percentile(values, 50, method='higher')),
+            'p99': int(np.percentile(values, 99, method='higher')),
+            'max': int(values.max()), 'mean': round(float(values.mean()), 2)}
+
+
+def analyze(baseline, runs):
+    """Combine all seeds into per-source and overall statistics"""
+    sources, metrics = trap_metrics([t for run in runs for t in run['traps']])
+    cycles = sum(run['summary']['cycles'] for run in runs)
+    base_ipc = baseline['summary']['retired'] / baseline['summary']['cycles']
+
+    per_source = {}
+    for src in PRIORITY_ORDER:
+        mask = sources == src
+        waits = [run['summary']['cycles'] - c for run in runs
+                 for s, c in run['pending'] if s == src]
+        entry = {'traps': int(mask.sum()),
+                 'merged': sum(run['merged'][src] for run in runs),
+                 'pending': len(waits),
+                 'oldest_pending': max(waits) if waits else None}
+        for name in METRICS:
+            entry[name] = percentiles(metrics[name][mask])
+        per_source[SOURCE_NAMES[src]] = entry
+
+    losses = [1 - run['summary']['retired'] / (base_ipc * run['summary']['cycles'])
+              for run in runs]
+    worst = max(runs, key=lambda run: max((t[4] - t[1] for t in run['traps']), default=-1))
+    overall = {name: percentiles(metrics[name]) for name in METRICS}
+    overall.update({
+        'seeds': len(runs),
+        'cycles': cycles,
+        'events': sum(run['summary']['events'] for run in runs),
+        'traps': len(sources),
+        'merged': sum(run['summary']['merged'] for run in runs),
+        'pending': sum(len(run['pending']) for run in runs),
+        'traps_per_kcycle': round(1000 * len(sources) / cycles, 3) if cycles else 0,
+        'baseline_ipc': round(base_ipc, 4),
+        'throughput_loss': round(float(np.mean(losses)), 4) if losses else None,
+        'throughput_loss_max': round(float(np.max(losses)), 4) if losses else None,
+        'worst_seed': worst['seed'],
+    })
+    return {'overall': overall, 'sources': per_source}
+
+
+# ----------------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------------
+
+def format_pct(p):
+    return f"{p['p50']:6d}{p['p99']:6d}{p['max']:6d}" if p else f"{'-':>6s}" * 3
+
+
+def print_report(result, config):
+    o = result['overall']
+    print("=" * 80)
+    print(f"INTERRUPT LATENCY - {config['pattern']}, {config['rate']}/kcycle, "
+          f"{o['seeds']} seeds x {config['cycles']} cycles, "
+          f"{config['handler']}-instruction handler")
+    print("=" * 80)
+    print(f"{'':8s}{'Traps':>7s}{'Merged':>7s}{'Pend':>5s}  "
+          f"{'Latency p50/p99/max':>18s}  {'Wait p99':>8s}{'Entry p50':>10s}"
+          f"{'Flush':>7s}{'Cost':>7s}")
+    for name, s in result['sources'].items():
+        if not (s['traps'] or s['merged'] or s['pending']):
+            continue
+        wait = f"{s['wait']['p99']:8d}" if s['wait'] else f"{'-':>8s}"
+        entry = f"{s['entry']['p50']:10d}" if s['entry'] else f"{'-':>10s}"
+        flush = f"{s['flushed']['mean']:7.2f}" if s['flushed'] else f"{'-':>7s}"
+        cost = f"{s['cost']['mean']:7.1f}" if s['cost'] else f"{'-':>7s}"
+        print(f"{name:8s}{s['traps']:7d}{s['merged']:7d}{s['pending']:5d}  "
+              f"{format_pct(s['latency'])}  {wait}{entry}{flush}{cost}")
+    print()
+    print(f"Events:              {o['events']} ({o['traps']} traps, {o['merged']} merged "
+          f"into a held line, {o['pending']} still pending)")
+    print(f"Trap rate:           {o['traps_per_kcycle']} per 1000 cycles")
+    if o['latency']:
+        print(f"Latency (cycles):    p50 {o['latency']['p50']}, p99 {o['latency']['p99']}, "
+              f"max {o['latency']['max']} (seed {o['worst_seed']})")
+        print(f"Flushed per trap:    {o['flushed']['mean']:.2f} instructions")
+        print(f"Cycles per trap:     {o['cost']['mean']:.1f} (acceptance to return)")
+    print(f"Throughput lost:     {o['throughput_loss']:.2%} mean, "
+          f"{o['throughput_loss_max']:.2%} worst seed "
+          f"(baseline IPC {o['baseline_ipc']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statistical interrupt latency benchmark")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    for cmd, text in (('gen', "write one stimulus file for a manual vvp run"),
+                      ('run', "simulate many seeds in parallel and report latency")):
+        p = sub.add_parser(cmd, help=text)
+        p.add_argument('-p', '--pattern', choices=('poisson', 'bursty'), default='poisson')
+        p.add_argument('-r', '--rate', type=float, default=5.0,
+                       help="mean interrupts per 1000 cycles")
+        p.add_argument('-c', '--cycles', type=int, default=100_000)
+        p.add_argument('--mix', type=parse_mix, default='uniform',
+                       help=f"{'/'.join(MIXES)} or source weights, e.g. timer=4,ext0=2,ext15=1")
+        p.add_argument('--burst', type=float, default=8.0, help="bursty: mean events per burst")
+        p.add_argument('--burst-gap', type=float, default=4.0,
+                       help="bursty: mean cycles between events in a burst")
+        p.add_argument('-s', '--seed', type=int, default=1, help="first seed")
+        if cmd == 'gen':
+            p.add_argument('-o', '--output', default='stimulus.hex')
+        else:
+            p.add_argument('-n', '--seeds', type=int, default=16)
+            p.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+            p.add_argument('--handler', type=int, default=8,
+                           help="handler instructions before mret (max 255)")
+            p.add_argument('--timeout', type=int, default=600, help="seconds per seed")
+            p.add_argument('--max-latency', type=int,
+                           help="exit 1 if any latency exceeds this or a source starves")
+            p.add_argument('--json', help="write the results here")
+    args = parser.parse_args()
+    mix = args.mix
+
+    if args.cmd == 'gen':
+        times, sources = generate(args.seed, args.pattern, args.cycles, args.rate, mix,
+                                  args.burst, args.burst_gap)
+        write_stimulus(args.output, times, sources)
+        print(f"✓ {len(times)} events over {args.cycles} cycles in {args.output}")
+        print(f"  vvp interrupt_pipeline_sim +stimulus={args.output} +cycles={args.cycles} +novcd")
+        return 0
+
+    if not 0 <= args.handler <= 255:
+        parser.error("--handler must be 0-255 (imem[768:1023] holds the handler and mret)")
+    config = {'pattern': args.pattern, 'cycles': args.cycles, 'rate': args.rate, 'mix': mix,
+              'burst': args.burst, 'burst_gap': args.burst_gap, 'handler': args.handler,
+              'timeout': args.timeout}
+    seeds = range(args.seed, args.seed + args.seeds)
+    baseline, runs = run_seeds(seeds, args.jobs, **config)
+    result = analyze(baseline, runs)
+    print_report(result, config)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': config, 'result': result}, f, indent=2)
+        print(f"Wrote {args.json}")
+
+    if args.max_latency is not None:
+        o = result['overall']
+        worst = o['latency']['max'] if o['latency'] else 0
+        if worst > args.max_latency or o['pending']:
+            print(f"✗ worst-case latency {worst} cycles, {o['pending']} unserved "
+                  f"(limit {args.max_latency})")
+            return 1
+        print(f"✓ worst-case latency {worst} cycles within {args.max_latency}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,6 +16,7 @@ module interrupt_controller #(
     // CPU interface
     input  wire        irq_ack,          // CPU acknowledges interrupt
     input  wire [3:0]  irq_ack_num,      // Which interrupt to acknowledge
+    input  wire        irq_eoi,          // End of interrupt (MRET): leave service
     output wire        irq_pending,       // Interrupt pending
     output wire [3:0]  irq_num,          // Highest priority interrupt number
     output wire [VECTOR_WIDTH-1:0] irq_vector, // Interrupt vector address
@@ -102,6 +103,11 @@ module interrupt_controller #(
                 end
             end
             
+            // End of interrupt: no nesting, so at most one line is in service
+            if (irq_eoi) begin
+                in_service <= 0;
+            end
+            
             // Handle acknowledgment
             if (irq_ack) begin
                 // Move to in-service
@@ -111,9 +117,5 @@ module interrupt_controller #(
             end
         end
     end
-    
-    // End of interrupt (EOI) - would be handled by software write
-    // For simplicity, auto-clear in_service after some cycles
-    // In real implementation, software sends EOI command
 
 endmodule
@@ -95,9 +95,25 @@ module interrupt_pipeline #(
     // Interrupt controller signals
     wire irq_pending;
     wire [3:0] irq_num;
-    wire [7:0] irq_vector;
     wire irq_ack;
     
+    // Interrupt sources: timer (cause 7) and software (cause 3) ahead of
+    // the external lines, which use the platform causes 16+n; mie bit n
+    // enables cause n
+    wire timer_pending = timer_irq && mie[7];
+    wire sw_pending = sw_irq && mie[3];
+    wire any_irq_pending = timer_pending || sw_pending || irq_pending;
+    wire [4:0] irq_cause = timer_pending ? 5'd7 :
+                           sw_pending ? 5'd3 :
+                           {1'b1, irq_num};
+    reg  [4:0] trap_cause;     // Cause of the interrupt being taken
+    wire irq_accept;
+    wire [XLEN-1:0] irq_target;
+    
+    // MRET
+    wire mret;
+    reg  mret_q;
+    
     // Exception signals
     wire exc_illegal;
     wire exc_ecall;
@@ -137,11 +153,12 @@ module interrupt_pipeline #(
         .rst_n(rst_n),
         .irq_lines(irq_lines),
         .irq_ack(irq_ack),
-        .irq_ack_num(irq_num),
+        .irq_ack_num(trap_cause[3:0]),
+        .irq_eoi(mret),
         .irq_pending(irq_pending),
         .irq_num(irq_num),
-        .irq_vector(irq_vector),
-        .irq_enable(mie[NUM_IRQS-1:0]),
+        .irq_vector(),
+        .irq_enable(mie[16 +: NUM_IRQS]),
         .irq_edge({NUM_IRQS{1'b0}}),  // All level-triggered
         .irq_priority(default_irq_priority),
         .vector_base(mtvec[7:0]),
@@ -185,8 +202,8 @@ module interrupt_pipeline #(
     ) u_flush_ctrl (
         .clk(clk),
         .rst_n(rst_n),
-        .interrupt_pending(irq_pending),
-        .interrupt_vector({24'b0, irq_vector}),
+        .interrupt_pending(any_irq_pending),
+        .interrupt_vector(irq_target),
         .exception_valid(exception_valid),
         .exception_vector(trap_vector),
         .if_pc(pc),
@@ -231,8 +248,20 @@ module interrupt_pipeline #(
     // Memory stall
     assign stall = (id_ex_mem_read || id_ex_mem_write) && !dmem_ready;
     
+    // Interrupt entry (mirrors can_take_interrupt in pipeline_flush_ctrl):
+    // mtvec direct mode jumps to BASE, vectored mode to BASE + 4*cause
+    assign irq_accept = !pipeline_flush_busy && any_irq_pending && interrupt_enable &&
+                        !exception_valid && !stall;
+    assign irq_target = {mtvec[XLEN-1:2], 2'b00} +
+                        (mtvec[0] ? {{(XLEN-7){1'b0}}, irq_cause, 2'b00} : {XLEN{1'b0}});
+    
+    // MRET in ID returns to mepc; the two fetches behind it are wrong-path
+    assign mret = if_id_valid && (if_id_instr == 32'h30200073) &&
+                  !stall && !pipeline_flush_busy && !exception_valid;
+    
     // PC logic
     assign next_pc = pc_redirect ? redirect_pc :
+                     mret ? mepc :
                      stall ? pc :
                      pc + 4;
     
@@ -247,7 +276,7 @@ module interrupt_pipeline #(
     assign pc_out = pc;
     assign halted = 1'b0;
     
-    assign irq_ack = irq_taken;
+    assign irq_ack = irq_taken && trap_cause[4];  // External lines only
     
     // Sequential logic
     always @(posedge clk or negedge rst_n) begin
@@ -265,6 +294,8 @@ module interrupt_pipeline #(
             medeleg <= 0;
             mideleg <= 0;
             stvec <= 0;
+            trap_cause <= 0;
+            mret_q <= 0;
             
             // Pipeline registers
             if_id_valid <= 0;
@@ -283,8 +314,13 @@ module interrupt_pipeline #(
             // PC update
             pc <= next_pc;
             
+            mret_q <= mret;
+            if (irq_accept) begin
+                trap_cause <= irq_cause;
+            end
+            
             // IF/ID stage
-            if (flush_if) begin
+            if (flush_if || mret || mret_q) begin
                 if_id_valid <= 0;
             end else if (!stall) begin
                 if_id_pc <= pc;
@@ -339,10 +375,18 @@ module interrupt_pipeline #(
                 regfile[mem_wb_rd] <= mem_wb_result;
             end
             
+            // MRET: restore the interrupt enable and privilege saved on trap entry
+            if (mret) begin
+                mstatus[3] <= mstatus[7];         // MIE <= MPIE
+                mstatus[7] <= 1'b1;               // MPIE <= 1
+                mstatus[12:11] <= 2'b00;          // MPP <= U
+                priv_mode_reg <= mstatus[12:11];
+            end
+            
             // CSR updates on trap
             if (irq_taken || exc_taken) begin
                 mepc <= mepc_save;
-                mcause <= irq_taken ? {1'b1, 31'd0} | {28'b0, irq_num} : exception_cause;
+                mcause <= irq_taken ? {1'b1, {(XLEN-6){1'b0}}, trap_cause} : exception_cause;
                 mtval <= exception_tval;
                 // Save and update mstatus
                 mstatus[7] <= mstatus[3];  // MPIE <= MIE
@@ -70,11 +70,24 @@ module tb_interrupt_pipeline;
         forever #5 clk = ~clk;
     end
     
+    // Latency benchmark mode (+stimulus=<file>), see below
+    localparam HANDLER_BASE = 32'h90000000;  // mtvec (direct) in benchmark mode
+    localparam HANDLER_WORD = 768;           // imem[768:1023] holds the handler
+    localparam MAIN_WORDS = 512;             // imem[0:511] repeats as main code
+    reg bench;
+    
+    // Benchmark code is an endless stream: main code wraps, the handler
+    // sits apart from it at HANDLER_BASE
+    wire [31:0] imem_index = !bench ? (imem_addr - 32'h80000000) >> 2 :
+                             imem_addr >= HANDLER_BASE ?
+                                 HANDLER_WORD + ((imem_addr - HANDLER_BASE) >> 2) :
+                                 ((imem_addr - 32'h80000000) >> 2) % MAIN_WORDS;
+    
     // Memory model
     always @(posedge clk) begin
         // Instruction memory
         if (imem_req) begin
-            imem_rdata <= imem[(imem_addr - 32'h80000000) >> 2];
+            imem_rdata <= imem[imem_index];
             imem_ready <= 1;
         end else begin
             imem_ready <= 0;
@@ -151,18 +164,210 @@ module tb_interrupt_pipeline;
         end
     endtask
     
+    // ------------------------------------------------------------------
+    // Interrupt latency benchmark, driven by irq_latency.py
+    // ------------------------------------------------------------------
+    // +stimulus=<file> holds {cycle[26:0], source[4:0]} words in cycle
+    // order, ended by ffffffff. Sources 0-15 are the external lines, 16 the
+    // timer and 17 the software interrupt; an event asserts its line at
+    // that cycle and the device holds it until its interrupt is taken
+    // (an event for a line already held is merged). +cycles=<n> sets the
+    // run length and +handler=<n> the handler size (n addi, then mret).
+    // Per trap the monitor prints
+    //   TRAP <source> <assert> <accept> <taken> <fetch> <resume> <flushed>
+    // (cycles of assertion, acceptance, irq_taken, fetch of the mtvec
+    // target and the first fetch back in main code; instructions killed
+    // by the flush), then PENDING lines for unserved sources and a SUMMARY.
+    localparam STIM_WORDS = 65536;
+    localparam NUM_SOURCES = 18;
+    localparam SRC_TIMER = 16;
+    localparam SRC_SW = 17;
+    
+    reg [8*256-1:0] stim_file;
+    reg [31:0] stim [0:STIM_WORDS-1];
+    integer stim_ptr;
+    integer bench_cycles;
+    integer handler_len;
+    integer mon_cycle;
+    reg bench_running;
+    integer src_asserted [0:NUM_SOURCES-1];  // Assertion cycle, -1 when idle
+    integer retired_main, retired_handler, traps, merged, events;
+    
+    // Trap in progress
+    reg trap_active, trap_fetched;
+    reg [XLEN-1:0] trap_target;
+    integer trap_src, trap_assert, trap_accept, trap_taken, trap_fetch, trap_flushed;
+    
+    function integer cause_source(input [4:0] cause);
+        begin
+            cause_source = cause[4] ? cause[3:0] :
+                           (cause == 5'd7) ? SRC_TIMER : SRC_SW;
+        end
+    endfunction
+    
+    task set_source(input integer src, input value);
+        begin
+            if (src == SRC_TIMER) timer_irq = value;
+            else if (src == SRC_SW) sw_irq = value;
+            else irq_lines[src] = value;
+        end
+    endtask
+    
+    task raise_source(input integer src);
+        begin
+            events = events + 1;
+            if (src_asserted[src] >= 0) begin
+                merged = merged + 1;
+                $display("MERGE %0d %0d", mon_cycle, src);
+            end else begin
+                src_asserted[src] = mon_cycle;
+                set_source(src, 1'b1);
+            end
+        end
+    endtask
+    
+    task finish_trap(input integer resume);
+        begin
+            $display("TRAP %0d %0d %0d %0d %0d %0d %0d", trap_src, trap_assert,
+                     trap_accept, trap_taken, trap_fetch, resume, trap_flushed);
+            traps = traps + 1;
+            trap_active = 0;
+        end
+    endtask
+    
+    task load_bench_program;
+        integer i;
+        begin
+            for (i = 0; i < MAIN_WORDS; i = i + 1)
+                imem[i] = 32'h00108093;                 // addi x1, x1, 1
+            for (i = 0; i < handler_len; i = i + 1)
+                imem[HANDLER_WORD + i] = 32'h00128293;  // addi x5, x5, 1
+            imem[HANDLER_WORD + handler_len] = 32'h30200073;  // mret
+            
+            // No CSR instructions: enable timer, software and all external
+            // interrupts and point mtvec at the handler directly
+            u_dut.mtvec = HANDLER_BASE;
+            u_dut.mie = 32'hFFFF0088;
+            u_dut.mstatus[3] = 1'b1;
+        end
+    endtask
+    
+    task run_benchmark;
+        integer i;
+        begin
+            for (i = 0; i < STIM_WORDS; i = i + 1)
+                stim[i] = 32'hFFFFFFFF;
+            $readmemh(stim_file, stim);
+            if (!$value$plusargs("cycles=%d", bench_cycles))
+                bench_cycles = 10000;
+            if (!$value$plusargs("handler=%d", handler_len))
+                handler_len = 8;
+            for (i = 0; i < NUM_SOURCES; i = i + 1)
+                src_asserted[i] = -1;
+            load_bench_program();
+            stim_ptr = 0;
+            mon_cycle = 0;
+            retired_main = 0;
+            retired_handler = 0;
+            traps = 0;
+            merged = 0;
+            events = 0;
+            trap_active = 0;
+            trap_fetched = 0;
+            $display("INFO: latency benchmark, %0d cycles, %0d-instruction handler",
+                     bench_cycles, handler_len);
+            
+            @(negedge clk);
+            bench_running = 1;
+            while (mon_cycle < bench_cycles) begin
+                while (stim_ptr < STIM_WORDS && stim[stim_ptr] !== 32'hFFFFFFFF &&
+                       stim[stim_ptr][31:5] <= mon_cycle) begin
+                    raise_source(stim[stim_ptr][4:0]);
+                    stim_ptr = stim_ptr + 1;
+                end
+                @(negedge clk);
+            end
+            bench_running = 0;
+            
+            for (i = 0; i < NUM_SOURCES; i = i + 1)
+                if (src_asserted[i] >= 0)
+                    $display("PENDING %0d %0d", i, src_asserted[i]);
+            $display("SUMMARY cycles=%0d retired=%0d handler=%0d traps=%0d merged=%0d events=%0d",
+                     mon_cycle, retired_main, retired_handler, traps, merged, events);
+        end
+    endtask
+    
+    // Benchmark monitor: samples the pipeline at each edge
+    initial bench_running = 0;
+    always @(posedge clk) begin
+        if (bench_running) begin
+            if (u_dut.mem_wb_valid) begin
+                if (u_dut.mem_wb_pc >= HANDLER_BASE)
+                    retired_handler = retired_handler + 1;
+                else
+                    retired_main = retired_main + 1;
+            end
+            
+            // Interrupt accepted: the pipeline starts draining
+            if (u_dut.irq_accept) begin
+                if (trap_active)
+                    finish_trap(mon_cycle);  // Re-entered before main code resumed
+                trap_active = 1;
+                trap_fetched = 0;
+                trap_flushed = 0;
+                trap_taken = -1;
+                trap_src = cause_source(u_dut.irq_cause);
+                trap_assert = src_asserted[trap_src];
+                trap_accept = mon_cycle;
+            end
+            
+            // Trap taken: the device sees the acknowledge and drops its line
+            if (u_dut.irq_taken && trap_active) begin
+                trap_taken = mon_cycle;
+                trap_target = u_dut.redirect_pc;
+                src_asserted[trap_src] = -1;
+                if (trap_src == SRC_TIMER) timer_irq <= 1'b0;
+                else if (trap_src == SRC_SW) sw_irq <= 1'b0;
+                else irq_lines[trap_src] <= 1'b0;
+            end
+            
+            if (trap_active && !trap_fetched && u_dut.flush_if)
+                trap_flushed = trap_flushed + imem_ready + u_dut.if_id_valid +
+                               u_dut.id_ex_valid + (u_dut.flush_mem && u_dut.ex_mem_valid);
+            
+            if (trap_active && trap_taken >= 0 && imem_req) begin
+                if (!trap_fetched && imem_addr == trap_target) begin
+                    trap_fetch = mon_cycle;
+                    trap_fetched = 1;
+                end else if (trap_fetched && imem_addr < HANDLER_BASE) begin
+                    finish_trap(mon_cycle);
+                end
+            end
+            
+            mon_cycle = mon_cycle + 1;
+        end
+    end
+    
     // Test sequence
     integer cycle_count;
     
+    // VCD control: +novcd, +vcd=<file>, +dumpdepth=<n>, +dump=top (common/vcd_dump.vh)
+    `define VCD_DEFAULT_FILE "interrupt_pipeline_tb.vcd"
+    `define VCD_TOP tb_interrupt_pipeline
+    `include "vcd_dump.vh"
+    
     initial begin
-        $dumpfile("interrupt_pipeline_tb.vcd");
-        $dumpvars(0, tb_interrupt_pipeline);
+        bench = $value$plusargs("stimulus=%s", stim_file);
         
         $display("========================================");
         $display("Interrupt-Enabled Pipeline Testbench");
         $display("========================================\n");
         
         reset_system();
+        if (bench) begin
+            run_benchmark();
+            $finish;
+        end
         load_test_program();
         cycle_count = 0;
         
@@ -245,8 +450,10 @@ module tb_interrupt_pipeline;
     // Timeout
     initial begin
         #50000;
-        $display("SIMULATION TIMEOUT");
-        $finish;
+        if (!bench) begin
+            $display("SIMULATION TIMEOUT");
+            $finish;
+        end
     end
     
     // Monitor PC changes
@@ -83,11 +83,10 @@ module tb_scoreboard;
             cycle_count <= cycle_count + 1;
     end
     
-    // VCD dump
-    initial begin
-        $dumpfile("scoreboard.vcd");
-        $dumpvars(0, tb_scoreboard);
-    end
+    // VCD control: +novcd, +vcd=<file>, +dumpdepth=<n>, +dump=top (common/vcd_dump.vh)
+    `define VCD_DEFAULT_FILE "scoreboard.vcd"
+    `define VCD_TOP tb_scoreboard
+    `include "vcd_dump.vh"
     
     // Task: Issue instruction
     task issue_instruction;
@@ -0,0 +1,53 @@
+// Shared VCD dump control for the project testbenches
+//
+// `include inside the testbench module after defining
+//   `define VCD_DEFAULT_FILE "name.vcd"   dump file unless +vcd=<file>
+//   `define VCD_TOP tb_module             testbench module name
+// and optionally `define VCD_SUBSETS when the testbench provides
+//   task dump_subset(input [8*32-1:0] name, output found);
+// which calls $dumpvars on the signals of each named subset.
+//
+// Plusargs:
+//   +novcd            no dump at all
+//   +vcd=<file>       dump file name
+//   +dumpdepth=<n>    $dumpvars depth of the full dump (0 = whole hierarchy)
+//   +dump=top         testbench-level signals only (DUT ports)
+//   +dump=<subset>    one of the testbench's named subsets
+
+reg [8*256-1:0] vcd_file;
+reg [8*32-1:0]  dump_mode;
+integer         dump_depth;
+reg             dump_found;
+
+initial begin
+    if (!$value$plusargs("vcd=%s", vcd_file))
+        vcd_file = `VCD_DEFAULT_FILE;
+    if (!$value$plusargs("dumpdepth=%d", dump_depth))
+        dump_depth = 0;
+    if (!$value$plusargs("dump=%s", dump_mode))
+        dump_mode = "all";
+
+    if (!$test$plusargs("novcd")) begin
+        $dumpfile(vcd_file);
+        dump_found = 0;
+        if (dump_mode == "top") begin
+            $dumpvars(1, `VCD_TOP);
+            dump_found = 1;
+        end
+`ifdef VCD_SUBSETS
+        else if (dump_mode != "all")
+            dump_subset(dump_mode, dump_found);
+`endif
+        if (!dump_found) begin
+            if (dump_mode != "all")
+                $display("WARNING: unknown +dump=%0s, dumping the whole hierarchy", dump_mode);
+            $dumpvars(dump_depth, `VCD_TOP);
+        end
+    end
+end
+
+`undef VCD_DEFAULT_FILE
+`undef VCD_TOP
+`ifdef VCD_SUBSETS
+`undef VCD_SUBSETS
+`endif
@@ -0,0 +1,664 @@
+#!/usr/bin/env python3
+"""
+Cycle-approximate Performance Models
+Trace-driven timing models of the three dynamically scheduled cores, for
+sizing their queues and functional units without editing RTL:
+  - ooo         04_OoO_Execution_Core: reorder_buffer.v (ROB_SIZE),
+                reservation_station.v (NUM_ENTRIES per ALU/MUL/MEM station,
+                freed at dispatch), cdb_arbiter.v (one broadcast per cycle)
+  - tomasulo    05_Tomasulo_Processor: tomasulo_rs.v stations (freed at
+                the CDB broadcast), common_data_bus.v, fp_adder.v and
+                fp_multiplier.v pipelines, no ROB
+  - scoreboard  12_Scoreboard: scoreboard_issue.v (structural and WAW
+                issue stalls), fu_status.v (read operands on Rj/Rk),
+                functional_unit.v latencies, one register write per cycle
+
+Instead of stepping every cycle, each model walks the trace in program
+order and computes every instruction's issue, dispatch, result-bus and
+retire cycles from the recurrences the hardware implies: in-order single
+issue, queue entries freed by older instructions (kept in heaps), operand
+wakeup one cycle after the producer's broadcast, and reservation calendars
+for the pipelined units and the single result bus. Occupancy histograms
+come from the per-instruction intervals, accumulated per chunk with NumPy.
+
+Trace files are packed records (TRACE_DTYPE, 4 bytes):
+    op u8 (OP_ALU/OP_MUL/OP_DIV/OP_LOAD/OP_STORE), rd u8, rs1 u8, rs2 u8
+with register 0 meaning "no register".
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+TRACE_DTYPE = np.dtype([('op', 'u1'), ('rd', 'u1'), ('rs1', 'u1'), ('rs2', 'u1')])
+CHUNK = 1 << 18
+
+OP_ALU, OP_MUL, OP_DIV, OP_LOAD, OP_STORE = range(5)
+OP_NAMES = ('alu', 'mul', 'div', 'load', 'store')
+
+CPU_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '01_Pipelined_RISCV_CPU')
+
+
+# ---------------------------------------------------------------------------
+# Traces
+# ---------------------------------------------------------------------------
+
+def make_trace(op, rd, rs1, rs2):
+    trace = np.zeros(len(op), dtype=TRACE_DTYPE)
+    trace['op'], trace['rd'], trace['rs1'], trace['rs2'] = op, rd, rs1, rs2
+    return trace
+
+
+def read_trace(path):
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=TRACE_DTYPE)
+    return np.memmap(path, dtype=TRACE_DTYPE, mode='r')
+
+
+def write_trace(path, trace):
+    np.asarray(trace, dtype=TRACE_DTYPE).tofile(path)
+
+
+def synthetic_trace(n, seed=None, mix=(0.55, 0.1, 0.02, 0.23, 0.1), dep_mean=4.0, regs=32):
+    """Random instruction mix; sources read the destination of an
+    instruction a geometric distance back (mean dep_mean), so a smaller
+    dep_mean means longer dependence chains and less ILP."""
+    rng = np.random.default_rng(seed)
+    op = rng.choice(len(mix), size=n, p=np.asarray(mix) / sum(mix)).astype(np.uint8)
+    rd = rng.integers(1, regs, n, dtype=np.uint8)
+    rd[op == OP_STORE] = 0
+    idx = np.arange(n)
+    sources = []
+    for _ in range(2):
+        back = idx - rng.geometric(1.0 / dep_mean, n)
+        src = np.where(back >= 0, rd[np.maximum(back, 0)], 0)
+        # A store or a cold start has no producer: read an arbitrary register
+        src = np.where(src == 0, rng.integers(1, regs, n), src).astype(np.uint8)
+        sources.append(src)
+    rs2 = np.where((op == OP_LOAD), 0, sources[1]).astype(np.uint8)
+    return make_trace(op, rd, sources[0], rs2)
+
+
+def iss_trace(hexfile, max_steps=1_000_000):
+    """Instructions executed by a program on the 01 CPU's ISS (RV32I: no MUL/DIV)"""
+    sys.path.insert(0, CPU_DIR)
+    from riscv_iss import (OP_AUIPC, OP_BRANCH, OP_IMM, OP_JAL, OP_JALR, OP_LOAD as RV_LOAD,
+                           OP_LUI, OP_REG, OP_STORE as RV_STORE, RV32ISim, load_hex)
+
+    sim = RV32ISim(load_hex(hexfile))
+    records = []
+    for _ in range(max_steps):
+        pc = sim.pc
+        slot = (pc >> 2) % sim.imem_words
+        instr = sim.program[slot] if slot < len(sim.program) else 0
+        if not sim.step():
+            break
+        opcode = instr & 0x7F
+        rd, rs1, rs2 = (instr >> 7) & 31, (instr >> 15) & 31, (instr >> 20) & 31
+        if opcode == RV_LOAD:
+            records.append((OP_LOAD, rd, rs1, 0))
+        elif opcode == RV_STORE:
+            records.append((OP_STORE, 0, rs1, rs2))
+        elif opcode == OP_BRANCH:
+            records.append((OP_ALU, 0, rs1, rs2))
+        elif opcode == OP_REG:
+            records.append((OP_ALU, rd, rs1, rs2))
+        elif opcode in (OP_JALR, OP_IMM):
+            records.append((OP_ALU, rd, rs1, 0))
+        elif opcode in (OP_JAL, OP_LUI, OP_AUIPC):
+            records.append((OP_ALU, rd, 0, 0))
+        else:
+            records.append((OP_ALU, 0, 0, 0))
+        if sim.pc == pc:
+            break
+    if not records:
+        return np.zeros(0, dtype=TRACE_DTYPE)
+    return make_trace(*zip(*records))
+
+
+def load_source(spec, length=1_000_000, seed=1):
+    """A trace from a file path or 'synthetic' or 'iss:<program.hex>'"""
+    if spec == 'synthetic':
+        return synthetic_trace(length, seed)
+    if spec.startswith('iss:'):
+        return iss_trace(spec[4:])
+    return read_trace(spec)
+
+
+def chunks(trace, chunk=CHUNK):
+    for start in range(0, len(trace), chunk):
+        part = trace[start:start + chunk]
+        yield (part['op'].tolist(), part['rd'].tolist(),
+               part['rs1'].tolist(), part['rs2'].tolist())
+
+
+# ---------------------------------------------------------------------------
+# Occupancy and reservation calendars
+# ---------------------------------------------------------------------------
+
+class Occupancy:
+    """live-interval count per cycle, folded into a histogram chunk by chunk
+
+    Interval starts must not decrease from one add() to the next (in-order
+    issue), so every cycle before the latest start is final: it goes into
+    the histogram and only the still-open tail of the diff array is kept.
+    Memory is O(chunk span), not O(cycles).
+    """
+
+    def __init__(self):
+        self.base = 0                        # first cycle not yet folded in
+        self.live = 0                        # live count just before base
+        self.diff = np.zeros(0, np.int64)    # diff[i]: count change at base + i
+        self.hist = np.zeros(1, np.int64)
+
+    def _extend(self, size):
+        if size > len(self.diff):
+            grown = np.zeros(max(size, 2 * len(self.diff)), np.int64)
+            grown[:len(self.diff)] = self.diff
+            self.diff = grown
+
+    def _fold(self, upto):
+        """move cycles [base, upto) into the histogram"""
+        k = upto - self.base
+        if k <= 0:
+            return
+        self._extend(k)
+        counts = self.live + np.cumsum(self.diff[:k])
+        h = np.bincount(counts)
+        if len(h) > len(self.hist):
+            self.hist = np.concatenate([self.hist, np.zeros(len(h) - len(self.hist), np.int64)])
+        self.hist[:len(h)] += h
+        self.live = int(counts[-1])
+        self.diff = self.diff[k:].copy()
+        self.base = upto
+
+    def add(self, start, end):
+        """intervals [start, end] (inclusive cycles)"""
+        start = np.asarray(start, np.int64)
+        end = np.asarray(end, np.int64)
+        if not len(start):
+            return
+        if int(start.min()) < self.base:
+            raise ValueError("interval starts must not decrease between add() calls")
+        self._extend(int(end.max()) + 2 - self.base)
+        n = len(self.diff)
+        self.diff += np.bincount(start - self.base, minlength=n)
+        self.diff -= np.bincount(end + 1 - self.base, minlength=n)
+        self._fold(int(start.max()))
+
+    def histogram(self, cycles):
+        """cycles spent at each occupancy 0, 1, 2, ..."""
+        if cycles <= 0:
+            return [0]
+        self._fold(cycles)
+        return np.trim_zeros(self.hist, 'b').tolist() or [0]
+
+
+def reserve(taken, cycle):
+    """first free cycle >= cycle in a single-slot calendar; claims it"""
+    while cycle in taken:
+        cycle += 1
+    taken.add(cycle)
+    return cycle
+
+
+def prune(calendars, before):
+    """drop reservations no future request can reach"""
+    for i, taken in enumerate(calendars):
+        calendars[i] = {c for c in taken if c >= before}
+
+
+def summarize(stats, occupancies, cycles, n):
+    stats['instructions'] = n
+    stats['cycles'] = cycles
+    stats['ipc'] = n / cycles if cycles else 0.0
+    stats['histograms'] = {name: occ.histogram(cycles) for name, occ in occupancies.items()}
+    stats['mean_occupancy'] = {
+        name: (sum(i * c for i, c in enumerate(h)) / cycles if cycles else 0.0)
+        for name, h in stats['histograms'].items()}
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# 04_OoO_Execution_Core
+# ---------------------------------------------------------------------------
+
+# Station per op: cdb_arbiter.v units 0 ALU, 1 MUL (MUL/DIV), 2 MEM (LOAD)
+OOO_UNIT = (0, 1, 1, 2, 2)
+OOO_UNITS = ('alu', 'mul', 'mem')
+OOO_PARAMS = {'rob': 16, 'rs_alu': 4, 'rs_mul': 2, 'rs_mem': 4,   # ooo_pkg.v
+              'alu': 1, 'mul': 3, 'div': 8, 'load': 2}            # unit LATENCY
+
+
+def run_ooo(trace, rob=16, rs_alu=4, rs_mul=2, rs_mem=4, alu=1, mul=3, div=8, load=2):
+    """issue -> RS (freed at dispatch) -> pipelined unit -> CDB -> in-order commit.
+    A result is broadcast LATENCY + 1 cycles after dispatch (alu_unit.v
+    output register); the ROB commits one completed head entry per cycle."""
+    unit_of = OOO_UNIT
+    lat = (alu + 1, mul + 1, div + 1, load + 1, load + 1)
+    rs_size = (rs_alu, rs_mul, rs_mem)
+    ready = [0] * 32
+    ring = [-1] * rob
+    head = 0
+    heaps = ([], [], [])
+    units = [set(), set(), set()]
+    cdb = [set()]
+    last_issue = last_commit = -1
+    rob_stall = 0
+    rs_stall = [0, 0, 0]
+    fu_wait = cdb_conflicts = cdb_delay = 0
+    occ = {'rob': Occupancy(), **{f'rs_{u}': Occupancy() for u in OOO_UNITS}}
+    heappush, heappop = heapq.heappush, heapq.heappop
+    n = 0
+
+    for ops, rds, r1s, r2s in chunks(trace):
+        issued, dispatched, committed, unit_log = [], [], [], []
+        for op, rd, a, b in zip(ops, rds, r1s, r2s):
+            u = unit_of[op]
+            base = last_issue + 1
+            t = ring[head] + 1
+            if t > base:
+                rob_stall += t - base
+            else:
+                t = base
+            h = heaps[u]
+            while h and h[0] < t:
+                heappop(h)
+            if len(h) >= rs_size[u]:
+                free = heappop(h) + 1
+                if free > t:
+                    rs_stall[u] += free - t
+                    t = free
+            d = t + 1
+            if ready[a] > d:
+                d = ready[a]
+            if ready[b] > d:
+                d = ready[b]
+            slot = reserve(units[u], d)
+            fu_wait += slot - d
+            done = slot + lat[op]
+            c = reserve(cdb[0], done)
+            if c != done:
+                cdb_conflicts += 1
+                cdb_delay += c - done
+            if rd:
+                ready[rd] = c + 1
+            heappush(h, slot)
+            commit = c + 1 if c >= last_commit else last_commit + 1
+            ring[head] = commit
+            head = head + 1 if head + 1 < rob else 0
+            last_issue, last_commit = t, commit
+            issued.append(t)
+            dispatched.append(slot)
+            committed.append(commit)
+            unit_log.append(u)
+        n += len(ops)
+        issued = np.asarray(issued, np.int64)
+        dispatched = np.asarray(dispatched, np.int64)
+        occ['rob'].add(issued + 1, committed)
+        unit_log = np.asarray(unit_log)
+        for u, name in enumerate(OOO_UNITS):
+            sel = unit_log == u
+            occ[f'rs_{name}'].add(issued[sel] + 1, dispatched[sel])
+        prune(units, last_issue)
+        prune(cdb, last_issue)
+
+    stats = {'model': 'ooo',
+             'structural_stalls': {'rob_full': rob_stall,
+                                   **{f'rs_{u}_full': s for u, s in zip(OOO_UNITS, rs_stall)}},
+             'fu_busy_wait': fu_wait,
+             'cdb_conflicts': cdb_conflicts, 'cdb_delay': cdb_delay}
+    return summarize(stats, occ, last_commit + 1, n)
+
+
+# ---------------------------------------------------------------------------
+# 05_Tomasulo_Processor
+# ---------------------------------------------------------------------------
+
+# Station group per op: adder (ADD/SUB), multiplier (MUL/DIV), load, store
+TOMASULO_GROUP = (0, 1, 1, 2, 3)
+TOMASULO_GROUPS = ('add', 'mul', 'load', 'store')
+TOMASULO_REGS = 16
+TOMASULO_PARAMS = {'rs_add': 2, 'rs_mul': 2, 'rs_load': 2, 'rs_store': 2,  # tomasulo_pkg.v tags
+                   'add': 2, 'mul': 4, 'div': 4, 'load': 2}                # *_LATENCY
+
+
+def run_tomasulo(trace, rs_add=2, rs_mul=2, rs_load=2, rs_store=2, add=2, mul=4, div=4, load=2):
+    """issue -> station (held until its CDB broadcast) -> pipelined unit -> CDB.
+    fp_adder.v/fp_multiplier.v raise cdb_request LATENCY + 2 cycles after
+    dispatch; DIV shares the multiplier pipeline (the RTL instantiates it
+    with MUL_LATENCY). Stores leave their station when they execute and
+    never use the CDB. Registers are folded to the 16 FP registers."""
+    group_of = TOMASULO_GROUP
+    lat = (add + 2, mul + 2, div + 2, load + 2, load)
+    rs_size = (rs_add, rs_mul, rs_load, rs_store)
+    mask = TOMASULO_REGS - 1
+    ready = [0] * TOMASULO_REGS
+    heaps = ([], [], [], [])
+    units = [set(), set(), set(), set()]
+    cdb = [set()]
+    last_issue = -1
+    end = 0
+    rs_stall = [0, 0, 0, 0]
+    fu_wait = cdb_conflicts = cdb_delay = 0
+    occ = {f'rs_{g}': Occupancy() for g in TOMASULO_GROUPS}
+    heappush, heappop = heapq.heappush, heapq.heappop
+    n = 0
+
+    for ops, rds, r1s, r2s in chunks(trace):
+        issued, freed, group_log = [], [], []
+        for op, rd, a, b in zip(ops, rds, r1s, r2s):
+            g = group_of[op]
+            t = last_issue + 1
+            h = heaps[g]
+            while h and h[0] < t:
+                heappop(h)
+            if len(h) >= rs_size[g]:
+                free = heappop(h) + 1
+                if free > t:
+                    rs_stall[g] += free - t
+                    t = free
+            d = t + 1
+            ra, rb = ready[a & mask] if a else 0, ready[b & mask] if b else 0
+            if ra > d:
+                d = ra
+            if rb > d:
+                d = rb
+            slot = reserve(units[g], d)
+            fu_wait += slot - d
+            done = slot + lat[op]
+            if op == OP_STORE:
+                c = done
+            else:
+                c = reserve(cdb[0], done)
+                if c != done:
+                    cdb_conflicts += 1
+                    cdb_delay += c - done
+                if rd:
+                    ready[rd & mask] = c + 1
+            heappush(h, c)
+            if c > end:
+                end = c
+            last_issue = t
+            issued.append(t)
+            freed.append(c)
+            group_log.append(g)
+        n += len(ops)
+        issued = np.asarray(issued, np.int64)
+        freed = np.asarray(freed, np.int64)
+        group_log = np.asarray(group_log)
+        for g, name in enumerate(TOMASULO_GROUPS):
+            sel = group_log == g
+            occ[f'rs_{name}'].add(issued[sel] + 1, freed[sel])
+        prune(units, last_issue)
+        prune(cdb, last_issue)
+
+    stats = {'model': 'tomasulo',
+             'structural_stalls': {f'rs_{g}_full': s for g, s in zip(TOMASULO_GROUPS, rs_stall)},
+             'fu_busy_wait': fu_wait,
+             'cdb_conflicts': cdb_conflicts, 'cdb_delay': cdb_delay}
+    return summarize(stats, occ, end + 1 if n else 0, n)
+
+
+# ---------------------------------------------------------------------------
+# 12_Scoreboard
+# ---------------------------------------------------------------------------
+
+# scoreboard_issue.v fu_type per op: 0 ALU (also loads/stores), 2 MUL, 3 DIV
+SCOREBOARD_TYPE = (0, 1, 2, 0, 0)
+SCOREBOARD_TYPES = ('alu', 'mul', 'div')
+SCOREBOARD_PARAMS = {'alus': 2, 'muls': 1, 'divs': 1,       # FUs per type
+                     'alu': 1, 'mul': 3, 'div': 8}          # functional_unit LATENCY
+
+
+def run_scoreboard(trace, alus=2, muls=1, divs=1, alu=1, mul=3, div=8):
+    """issue (stalls on no free FU of the type, or a busy FU writing rd) ->
+    read operands when no FU still owes them -> LATENCY cycles -> one
+    register write per cycle (priority encoder). An FU is busy from issue
+    until its write; as in fu_status.v there is no WAR check on write."""
+    type_of = SCOREBOARD_TYPE
+    counts = (alus, muls, divs)
+    lat = (alu, mul, div)
+    fu_free = [[0] * c for c in counts]
+    ready = [0] * 32
+    written = [0] * 32
+    port = [set()]
+    last_issue = -1
+    end = 0
+    struct_stall = [0, 0, 0]
+    waw_stall = write_conflicts = write_delay = 0
+    occ = {f'fu_{k}': Occupancy() for k in SCOREBOARD_TYPES}
+    n = 0
+
+    for ops, rds, r1s, r2s in chunks(trace):
+        issued, wrote, type_log = [], [], []
+        for op, rd, a, b in zip(ops, rds, r1s, r2s):
+            k = type_of[op]
+            base = last_issue + 1
+            t = base
+            if rd and written[rd] > t:
+                t = written[rd]
+                waw_stall += t - base
+            frees = fu_free[k]
+            f = frees.index(min(frees))
+            if frees[f] > t:
+                struct_stall[k] += frees[f] - t
+                t = frees[f]
+            r = t + 1
+            if ready[a] > r:
+                r = ready[a]
+            if ready[b] > r:
+                r = ready[b]
+            done = r + lat[k] + 1
+            w = reserve(port[0], done)
+            if w != done:
+                write_conflicts += 1
+                write_delay += w - done
+            frees[f] = w + 1
+            if rd:
+                ready[rd] = written[rd] = w + 1
+            if w > end:
+                end = w
+            last_issue = t
+            issued.append(t)
+            wrote.append(w)
+            type_log.append(k)
+        n += len(ops)
+        issued = np.asarray(issued, np.int64)
+        wrote = np.asarray(wrote, np.int64)
+        type_log = np.asarray(type_log)
+        for k, name in enumerate(SCOREBOARD_TYPES):
+            sel = type_log == k
+            occ[f'fu_{name}'].add(issued[sel] + 1, wrote[sel])
+        prune(port, last_issue)
+
+    stats = {'model': 'scoreboard',
+             'structural_stalls': {f'no_free_{k}': s for k, s in zip(SCOREBOARD_TYPES, struct_stall)},
+             'waw_stalls': waw_stall,
+             'cdb_conflicts': write_conflicts, 'cdb_delay': write_delay}
+    return summarize(stats, occ, end + 1 if n else 0, n)
+
+
+MODELS = {
+    'ooo': (run_ooo, OOO_PARAMS),
+    'tomasulo': (run_tomasulo, TOMASULO_PARAMS),
+    'scoreboard': (run_scoreboard, SCOREBOARD_PARAMS),
+}
+
+
+def simulate(trace, model, **params):
+    run, defaults = MODELS[model]
+    config = dict(defaults)
+    for key, value in params.items():
+        if key == 'rs':
+            config.update({k: value for k in defaults if k.startswith('rs_')})
+        elif key not in defaults:
+            raise ValueError(f"{model} has no parameter '{key}' (use {', '.join(defaults)}, rs)")
+        else:
+            config[key] = value
+    start = time.perf_counter()
+    stats = run(trace, **config)
+    stats['config'] = config
+    stats['params'] = dict(params)
+    stats['elapsed'] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Sweep and reporting
+# ---------------------------------------------------------------------------
+
+def _sweep_job(args):
+    path, model, params = args
+    return simulate(read_trace(path), model, **params)
+
+
+def sweep(trace_path, model, grid, workers=None):
+    """Evaluate every combination in grid ({param: [values]}); workers memory-map the trace"""
+    names = list(grid)
+    jobs = [(trace_path, model, dict(zip(names, values)))
+            for values in itertools.product(*(grid[k] for k in names))]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_sweep_job, jobs))
+
+
+def parse_param(text):
+    """'rob=8,16,32' -> ('rob', [8, 16, 32])"""
+    name, _, values = text.partition('=')
+    try:
+        return name, [int(v) for v in values.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected name=v1,v2,... got '{text}'")
+
+
+def format_histogram(hist, cycles, width=40):
+    lines = []
+    peak = max(hist) if hist else 0
+    for value, count in enumerate(hist):
+        if not count:
+            continue
+        bar = '#' * max(1, round(width * count / peak)) if peak else ''
+        lines.append(f"  {value:4d} {count / cycles * 100:6.2f}% {bar}")
+    return '\n'.join(lines)
+
+
+def print_report(stats):
+    cycles = stats['cycles']
+    print(f"Config:        {' '.join(f'{k}={v}' for k, v in stats['config'].items())}")
+    print(f"Instructions:  {stats['instructions']}")
+    print(f"Cycles:        {cycles}")
+    print(f"IPC:           {stats['ipc']:.4f}")
+    print("Structural stalls (issue cycles lost):")
+    for key, value in stats['structural_stalls'].items():
+        print(f"  {key + ':':15s}{value:12d}")
+    if 'waw_stalls' in stats:
+        print(f"WAW stalls:    {stats['waw_stalls']}")
+    if 'fu_busy_wait' in stats:
+        print(f"FU busy wait:  {stats['fu_busy_wait']} dispatch cycles")
+    bus = 'Write-port' if stats['model'] == 'scoreboard' else 'CDB'
+    print(f"{bus} conflicts: {stats['cdb_conflicts']} results delayed "
+          f"{stats['cdb_delay']} cycles in total")
+    for name, hist in stats['histograms'].items():
+        print(f"\n{name} occupancy (mean {stats['mean_occupancy'][name]:.2f}):")
+        print(format_histogram(hist, cycles))
+
+
+def format_table(results, names):
+    stall_keys = list(results[0]['structural_stalls'])
+    occ_keys = list(results[0]['mean_occupancy'])
+    lines = ['  '.join(f"{k:>6s}" for k in names)
+             + f"{'IPC':>8s}{'Stalls':>10s}{'BusConf':>9s}"
+             + ''.join(f"{k:>9s}" for k in occ_keys)]
+    for r in results:
+        stalls = sum(r['structural_stalls'][k] for k in stall_keys) + r.get('waw_stalls', 0)
+        lines.append('  '.join(f"{r['params'][k]:6d}" for k in names)
+                     + f"{r['ipc']:8.4f}{stalls:10d}{r['cdb_conflicts']:9d}"
+                     + ''.join(f"{r['mean_occupancy'][k]:9.2f}" for k in occ_keys))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cycle-approximate OoO/Tomasulo/Scoreboard models")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p = sub.add_parser('gen', help="write a synthetic instruction trace")
+    p.add_argument('output')
+    p.add_argument('-n', '--length', type=int, default=10_000_000)
+    p.add_argument('-s', '--seed', type=int, default=1)
+    p.add_argument('--dep-mean', type=float, default=4.0,
+                   help="mean producer distance of source operands")
+
+    for cmd, text in (('run', "simulate one configuration"),
+                      ('sweep', "simulate every parameter combination in parallel")):
+        p = sub.add_parser(cmd, help=text)
+        p.add_argument('model', choices=list(MODELS))
+        p.add_argument('source', help="trace file, 'synthetic' or 'iss:<program.hex>'")
+        p.add_argument('-P', '--param', type=parse_param, action='append', default=[],
+                       help="name=v1,v2,... (rs= sets every station size)")
+        p.add_argument('-n', '--length', type=int, default=1_000_000)
+        p.add_argument('-s', '--seed', type=int, default=1)
+        p.add_argument('--json', help="write results here")
+        if cmd == 'sweep':
+            p.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    if args.cmd == 'gen':
+        start = time.perf_counter()
+        trace = synthetic_trace(args.length, args.seed, dep_mean=args.dep_mean)
+        write_trace(args.output, trace)
+        print(f"✓ Wrote {len(trace)} instructions to {args.output} in {time.perf_counter() - start:.1f}s")
+        return 0
+
+    grid = dict(args.param)
+    if args.cmd == 'run':
+        if any(len(v) != 1 for v in grid.values()):
+            parser.error("run takes one value per parameter (use sweep for lists)")
+        stats = simulate(load_source(args.source, args.length, args.seed), args.model,
+                         **{k: v[0] for k, v in grid.items()})
+        print("=" * 80)
+        print(f"{args.model.upper()} MODEL - {args.source}")
+        print("=" * 80)
+        print_report(stats)
+        print(f"\n{stats['instructions'] / max(stats['elapsed'], 1e-9):,.0f} instructions/s")
+        results = [stats]
+    else:
+        if not grid:
+            parser.error("sweep needs at least one -P name=v1,v2,...")
+        path, tmp = args.source, None
+        if not os.path.isfile(args.source):
+            fd, tmp = tempfile.mkstemp(suffix='.itr')
+            os.close(fd)
+            write_trace(tmp, load_source(args.source, args.length, args.seed))
+            path = tmp
+        try:
+            start = time.perf_counter()
+            results = sweep(path, args.model, grid, args.jobs)
+            elapsed = time.perf_counter() - start
+        finally:
+            if tmp:
+                os.unlink(tmp)
+        print("=" * 80)
+        print(f"{args.model.upper()} SWEEP - {args.source}, {results[0]['instructions']} instructions")
+        print("=" * 80)
+        print(format_table(results, list(grid)))
+        best = max(results, key=lambda r: r['ipc'])
+        setting = ' '.join(f"{k}={best['params'][k]}" for k in grid)
+        print(f"\nBest IPC {best['ipc']:.4f}: {setting}")
+        print(f"{len(results)} configurations in {elapsed:.1f}s")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Parallel Regression Runner
+Runs every project testbench and every RISC-V CPU test suite/program in
+its own scratch directory, fanned out over a process pool, and collects a
+structured pass/fail result per job.
+
+Each job gets a private directory because every testbench writes a
+fixed-name VCD, so two simulations can never share a working directory.
+Project and program jobs compile each project once through sim_cache.py
+and pass the program image and cycle budget as plusargs.
+
+Runs are incremental: every verdict is stored with the content hashes of
+the inputs that produced it (RTL and testbench sources plus the files
+they `include, the Makefile, program image, generator/verify scripts, the
+ISS, assembler and verify_iss modules for program jobs, and this harness
+with sim_cache.py and sim_projects.py). A job whose inputs are unchanged
+is not run again; its cached verdict and log are replayed instead.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from sim_cache import (CACHE_DIR, compile_flags, compile_project, dependency_files, file_digest,
+                       iverilog_version, run_binary)
+from sim_projects import REPO_ROOT, discover_projects, find_project
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+CPU_PROJECT = '01'
+
+# Shared testbench includes. Suite jobs run `make` in a copy of the project,
+# where the Makefiles' default COMMON_DIR (../common) does not exist.
+COMMON_DIR = os.path.join(REPO_ROOT, 'common')
+
+# Test suites of the pipelined CPU: (name, generator, verify script).
+# verify_tests.py is not listed: its program is not in the tree and it
+# runs `make sim` in a hard-coded absolute directory.
+CPU_SUITES = [
+    ('suite_new', 'generate_test.py', 'verify_tests_new.py'),
+    ('suite3', 'generate_test3.py', 'verify_tests3.py'),
+]
+
+# Output that marks a failing project testbench. "Result: FAIL" is not
+# listed because the BIST testbench expects it for its injected faults.
+FAIL_PATTERNS = [
+    re.compile(r'\bFAIL:'),
+    re.compile(r'TIMEOUT'),
+    re.compile(r'\bERROR\b'),
+    re.compile(r'STATUS: \d+ ERRORS'),
+]
+
+# Verdicts of finished jobs, keyed by job identity (see ResultCache)
+RESULT_CACHE_DIR = os.environ.get('REGRESS_CACHE_DIR', os.path.join(CACHE_DIR, 'results'))
+
+# Verdicts that say nothing about the design and are never cached
+TRANSIENT_REASONS = ('timed out', 'harness error', 'compile failed')
+
+
+def cpu_dir():
+    """Directory of the pipelined CPU, made importable for its Python modules"""
+    path = find_project(CPU_PROJECT).path
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return path
+
+
+def make_scratch(project, work_root, name):
+    """Copy a project into a fresh scratch directory, minus build outputs"""
+    scratch = tempfile.mkdtemp(prefix=f"{name}-", dir=work_root)
+    ignore = shutil.ignore_patterns('*.vcd', '*.vvp', '__pycache__', project.sim_out or '')
+    shutil.copytree(project.path, scratch, ignore=ignore, dirs_exist_ok=True)
+    return scratch
+
+
+def check_program(expected_regs, output):
+    """Compare the RTL register dump with the ISS; returns a failure reason"""
+    cpu_dir()
+    from verify_iss import parse_register_values
+
+    registers = parse_register_values(output)
+    if not registers:
+        return "no register values found in simulation output"
+    mismatches = [f"x{i}={registers.get(f'x{i}', 0):08x} (expected {expected_regs[i]:08x})"
+                  for i in range(1, 32) if registers.get(f'x{i}') != expected_regs[i]]
+    if mismatches:
+        return f"{len(mismatches)} register mismatches: " + ', '.join(mismatches[:4])
+    return None
+
+
+def run_command(cmd, cwd, timeout, env=None):
+    """Run a command, returning (returncode, combined output, timed_out)"""
+    try:
+        result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, timeout=timeout,
+                                env=env)
+        return result.returncode, result.stdout + result.stderr, False
+    except subprocess.TimeoutExpired as e:
+        out = (e.stdout or b'') + (e.stderr or b'')
+        if isinstance(out, bytes):
+            out = out.decode(errors='replace')
+        return None, out, True
+
+
+def check_output(output):
+    """Return the first failure marker found in testbench output, if any"""
+    for pattern in FAIL_PATTERNS:
+        m = pattern.search(output)
+        if m:
+            line_start = output.rfind('\n', 0, m.start()) + 1
+            line_end = output.find('\n', m.end())
+            return output[line_start:line_end if line_end != -1 else None].strip()
+    return None
+
+
+def run_job(job, work_root, timeout, keep, binary=None):
+    """Execute one job in its own scratch directory (runs in a worker process)"""
+    project = find_project(job['project'])
+    start = time.perf_counter()
+    reason = None
+    output = ''
+
+    if job['kind'] in ('project', 'program'):
+        scratch = tempfile.mkdtemp(prefix=f"{job['name']}-", dir=work_root)
+        plusargs = {}
+        if job['kind'] == 'program':
+            cpu_dir()
+            from riscv_iss import RV32ISim, cycle_budget, load_hex
+
+            sim = RV32ISim(load_hex(job['hexfile']))
+            plusargs['program'] = job['hexfile']
+            plusargs['cycles'] = job.get('cycles') or cycle_budget(sim.run())
+        elif os.path.isfile(os.path.join(project.path, 'program.hex')):
+            plusargs['program'] = os.path.join(project.path, 'program.hex')
+        returncode, output, timed_out = run_binary(binary, scratch, plusargs, timeout)
+        if timed_out:
+            reason = f"timed out after {timeout}s"
+        elif returncode != 0:
+            reason = f"vvp exited with {returncode}"
+        elif job['kind'] == 'program':
+            reason = check_program(sim.regs, output)
+        else:
+            reason = check_output(output)
+    else:
+        scratch = make_scratch(project, work_root, job['name'])
+        env = dict(os.environ, COMMON_DIR=COMMON_DIR)
+        returncode, output, timed_out = run_command(
+            [sys.executable, job['generator']], scratch, timeout, env)
+        if returncode != 0 or timed_out:
+            reason = f"{job['generator']} failed"
+        if reason is None:
+            returncode, verify_out, timed_out = run_command(
+                [sys.executable, job['verify']], scratch, timeout, env)
+            output += verify_out
+            if timed_out:
+                reason = f"timed out after {timeout}s"
+            elif returncode != 0:
+                m = re.search(r'Results: .*', verify_out)
+                reason = m.group(0) if m else f"{job['verify']} exited with {returncode}"
+
+    elapsed = time.perf_counter() - start
+    passed = reason is None
+    if passed and not keep:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    return {
+        'name': job['name'],
+        'kind': job['kind'],
+        'project': project.name,
+        'passed': passed,
+        'reason': reason,
+        'elapsed': round(elapsed, 3),
+        'scratch': scratch if (keep or not passed) else None,
+        'log': output,
+    }
+
+
+def build_jobs(project_keys=None, suites=True, hexfiles=(), cycles=None):
+    """Expand command-line selections into a list of job descriptions"""
+    jobs = []
+    projects = discover_projects()
+    if project_keys:
+        wanted = {find_project(k).name for k in project_keys}
+        projects = [p for p in projects if p.name in wanted]
+    for project in projects:
+        jobs.append({'name': project.name, 'kind': 'project', 'project': project.number})
+
+    if suites:
+        for name, generator, verify in CPU_SUITES:
+            jobs.append({'name': name, 'kind': 'suite', 'project': CPU_PROJECT,
+                         'generator': generator, 'verify': verify})
+
+    if hexfiles:
+        cpu_dir()
+        from assembler import hex_for_source
+    for path in hexfiles:
+        name = os.path.splitext(os.path.basename(path))[0]
+        hexfile = hex_for_source(path) if path.endswith('.s') else os.path.abspath(path)
+        jobs.append({'name': name, 'kind': 'program', 'project': CPU_PROJECT,
+                     'hexfile': hexfile, 'source': os.path.abspath(path), 'cycles': cycles})
+    return jobs
+
+
+# ----------------------------------------------------------------------------
+# Incremental runs
+# ----------------------------------------------------------------------------
+
+def job_input_files(job):
+    """Absolute paths of every file that can change a job's verdict"""
+    project = find_project(job['project'])
+    paths = [os.path.join(project.path, p) for p in dependency_files(project)]
+    paths.append(os.path.join(project.path, 'Makefile'))
+    if job['kind'] == 'project':
+        program = os.path.join(project.path, 'program.hex')
+        if os.path.isfile(program):
+            paths.append(program)
+    elif job['kind'] == 'program':
+        # The ISS predicts the registers, verify_iss parses the dump, and
+        # the assembler produced the image unless it was given as .hex
+        paths.append(job['hexfile'])
+        if job['source'] != job['hexfile']:
+            paths.append(job['source'])
+        paths.extend(os.path.join(cpu_dir(), name)
+                     for name in ('riscv_iss.py', 'verify_iss.py', 'assembler.py'))
+    else:
+        # The generator writes program.hex, so the checked-in image is not an input
+        paths.append(os.path.join(project.path, job['generator']))
+        paths.append(os.path.join(project.path, job['verify']))
+    # The harness: this runner plus the compile rules and plusargs it uses
+    paths.extend(os.path.join(TOOLS_DIR, name)
+                 for name in ('regress.py', 'sim_cache.py', 'sim_projects.py'))
+    return paths
+
+
+def job_inputs(job):
+    """{repo-relative path: sha256} of a job's inputs"""
+    return {os.path.relpath(path, REPO_ROOT): file_digest(path)
+            for path in job_input_files(job) if os.path.isfile(path)}
+
+
+def job_fingerprint(job, inputs):
+    """Hash of everything a job's verdict depends on"""
+    h = hashlib.sha256()
+    h.update(iverilog_version().encode())
+    if job['kind'] != 'suite':
+        h.update(b'\0'.join(a.encode() for a in compile_flags(find_project(job['project']))))
+    h.update(json.dumps({'cycles': job.get('cycles')}).encode())
+    for path in sorted(inputs):
+        h.update(b'\0' + path.encode() + b'\0' + inputs[path].encode())
+    return h.hexdigest()
+
+
+def job_id(job):
+    """Stable identity of a job across runs (independent of its inputs)"""
+    key = [job['kind'], job['project'], job['name'], job.get('source', ''),
+           job.get('generator', '')]
+    return hashlib.sha256('\0'.join(key).encode()).hexdigest()[:32]
+
+
+class ResultCache:
+    """Verdicts and logs of finished jobs with the input hashes behind them
+
+    One JSON file per job identity, replaced atomically, so concurrent or
+    interrupted runs never leave a half-written entry behind.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or RESULT_CACHE_DIR
+        self._inputs = {}
+
+    def _path(self, job):
+        return os.path.join(self.cache_dir, job_id(job) + '.json')
+
+    def inputs(self, job):
+        key = job_id(job)
+        if key not in self._inputs:
+            self._inputs[key] = job_inputs(job)
+        return self._inputs[key]
+
+    def entry(self, job):
+        try:
+            with open(self._path(job)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def lookup(self, job):
+        """The cached result if the job's inputs are unchanged, else None"""
+        entry = self.entry(job)
+        if entry is None or entry.get('fingerprint') != job_fingerprint(job, self.inputs(job)):
+            return None
+        result = dict(entry['result'])
+        result['cached'] = True
+        return result
+
+    def store(self, job, result):
+        if not result['passed'] and (result['reason'] or '').startswith(TRANSIENT_REASONS):
+            return
+        inputs = self.inputs(job)
+        entry = {'fingerprint': job_fingerprint(job, inputs), 'inputs': inputs,
+                 'result': dict(result, scratch=None, cached=False)}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(job)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    def explain(self, job):
+        """Why a job has to run, or None if its cached verdict still holds"""
+        entry = self.entry(job)
+        if entry is None:
+            return "no cached result"
+        if self.lookup(job) is not None:
+            return None
+        old, new = entry.get('inputs', {}), self.inputs(job)
+        changed = sorted(p for p in set(old) | set(new) if old.get(p) != new.get(p))
+        if not changed:
+            return "toolchain or flags changed"
+        return "changed: " + ', '.join(changed[:4]) + (" ..." if len(changed) > 4 else "")
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def compile_one(key):
+    return compile_project(find_project(key))
+
+
+def failed_result(job, reason, log=''):
+    return {'name': job['name'], 'kind': job['kind'], 'project': job['project'],
+            'passed': False, 'reason': reason, 'elapsed': 0.0, 'scratch': None, 'log': log}
+
+
+def run_jobs(jobs, workers=None, timeout=60, keep=False, work_root=None, on_result=None,
+             cache=None, force=False):
+    """Run jobs across a process pool; returns results in job order
+
+    With a ResultCache, jobs whose inputs are unchanged are replayed from
+    it instead of run (unless force), and every new verdict is stored.
+    Every project needed by a remaining project/program job is compiled
+    once (in parallel, through the content-addressed cache) before the
+    runs start.
+    """
+    work_root = work_root or tempfile.mkdtemp(prefix='regress-')
+    os.makedirs(work_root, exist_ok=True)
+    results = [None] * len(jobs)
+
+    pending = []
+    for i, job in enumerate(jobs):
+        results[i] = cache.lookup(job) if cache is not None and not force else None
+        if results[i] is None:
+            pending.append(i)
+        elif on_result:
+            on_result(results[i])
+    if not pending:
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        needed = sorted({jobs[i]['project'] for i in pending if jobs[i]['kind'] != 'suite'})
+        compiled = {key: pool.submit(compile_one, key) for key in needed}
+        binaries, compile_errors = {}, {}
+        for key, future in compiled.items():
+            try:
+                binaries[key] = future.result()
+            except Exception as e:
+                compile_errors[key] = str(e)
+
+        futures = {}
+        for i in pending:
+            job = jobs[i]
+            if job['project'] in compile_errors:
+                results[i] = failed_result(job, "compile failed", compile_errors[job['project']])
+                if on_result:
+                    on_result(results[i])
+                continue
+            future = pool.submit(run_job, job, work_root, timeout, keep,
+                                 binaries.get(job['project']))
+            futures[future] = i
+
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                results[i] = failed_result(jobs[i], f"harness error: {e}")
+            if cache is not None:
+                cache.store(jobs[i], results[i])
+            if on_result:
+                on_result(results[i])
+    return results
+
+
+def print_result(result):
+    mark = '✓' if result['passed'] else '✗'
+    line = f"{mark} {result['name']:32s} {result['elapsed']:7.2f}s"
+    if result.get('cached'):
+        line += "  (cached)"
+    if not result['passed']:
+        line += f"  {result['reason']}"
+        if result['scratch']:
+            line += f"  [{result['scratch']}]"
+    print(line, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel regression for all projects")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help="worker processes (default: all cores)")
+    parser.add_argument('-p', '--project', action='append', dest='projects',
+                        help="only run these projects (number or name, repeatable)")
+    parser.add_argument('--no-suites', action='store_true',
+                        help="skip the RISC-V CPU generate/verify suites")
+    parser.add_argument('--hex', nargs='*', default=[],
+                        help="extra program.hex (or .s assembly) files to check against the ISS")
+    parser.add_argument('--cycles', type=int,
+                        help="cycle budget for --hex programs (default: derived from the ISS)")
+    parser.add_argument('--timeout', type=int, default=60, help="per-job timeout in seconds")
+    parser.add_argument('--work-dir', help="root for scratch directories")
+    parser.add_argument('--keep', action='store_true', help="keep scratch dirs of passing jobs")
+    parser.add_argument('--json', help="write structured results to this file")
+    parser.add_argument('--force', action='store_true',
+                        help="re-run every job even if its inputs are unchanged")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="neither replay nor record verdicts")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="only list which jobs would run and which inputs changed")
+    parser.add_argument('--clear-cache', action='store_true', help="drop all cached verdicts")
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else ResultCache()
+    if args.clear_cache:
+        ResultCache().clear()
+        print(f"Cleared {RESULT_CACHE_DIR}")
+    jobs = build_jobs(args.projects, not args.no_suites, args.hex, args.cycles)
+
+    if args.dry_run:
+        stale = 0
+        for job in jobs:
+            why = "forced" if args.force else (cache.explain(job) if cache else "cache disabled")
+            stale += why is not None
+            print(f"{'run ' if why else 'skip'} {job['name']:32s} {why or 'up to date'}")
+        print(f"\n{stale} of {len(jobs)} jobs would run")
+        sys.exit(0)
+
+    print("=" * 80)
+    print(f"REGRESSION - {len(jobs)} jobs on {args.jobs} workers")
+    print("=" * 80)
+
+    start = time.perf_counter()
+    results = run_jobs(jobs, args.jobs, args.timeout, args.keep, args.work_dir,
+                       on_result=print_result, cache=cache, force=args.force)
+    wall = time.perf_counter() - start
+
+    passed = sum(r['passed'] for r in results)
+    replayed = sum(bool(r.get('cached')) for r in results)
+    serial = sum(r['elapsed'] for r in results if not r.get('cached'))
+    print()
+    print("=" * 80)
+    print(f"Results: {passed} passed, {len(results) - passed} failed out of {len(results)} jobs"
+          f" ({replayed} replayed from cache)")
+    print(f"Wall time {wall:.2f}s (serial sum {serial:.2f}s)")
+    print("=" * 80)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'wall_time': round(wall, 3), 'results': results}, f, indent=2)
+
+    sys.exit(0 if passed == len(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Simulation Throughput Benchmark
+Measures, for every project, the iverilog compile time, vvp wall time,
+simulated clock cycles per second and VCD bytes written, once with the
+waveform dump on and once with +novcd. Results are appended to a JSON
+history keyed by git commit and compared with an earlier commit, so an
+RTL or testbench change that slows the regression down gets flagged.
+
+Simulated cycles come from the "$finish called at <time>" line vvp prints
+and the clock period of the testbench's `forever #N clk = ~clk` loop.
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from sim_cache import compile_project, iverilog_version
+from sim_projects import REPO_ROOT, discover_projects, find_project, git_revision
+
+HISTORY_FILE = os.environ.get('SIM_BENCH_HISTORY', os.path.join(REPO_ROOT, '.sim_bench.json'))
+
+# Relative change that counts as a regression
+DEFAULT_THRESHOLD = 0.10
+
+# metric -> (label, True if larger is better)
+METRICS = {
+    'compile_s': ("compile", False),
+    'wall_novcd_s': ("vvp +novcd", False),
+    'wall_vcd_s': ("vvp +vcd", False),
+    'cycles_per_sec': ("cycles/s +novcd", True),
+    'cycles_per_sec_vcd': ("cycles/s +vcd", True),
+    'vcd_bytes': ("VCD bytes", False),
+}
+
+# Timings below this are timer noise and never flagged
+TIMINGS = ('compile_s', 'wall_novcd_s', 'wall_vcd_s')
+MIN_SECONDS = 0.05
+
+UNITS = {'s': 1.0, 'ms': 1e-3, 'us': 1e-6, 'ns': 1e-9, 'ps': 1e-12, 'fs': 1e-15}
+TIMESCALE_RE = re.compile(r'`timescale\s+(\d+)\s*(s|ms|us|ns|ps|fs)\s*/')
+CLOCK_RE = re.compile(r'(?:forever|always)\s+#\s*([\d.]+)\s+(\w+)\s*=\s*~\s*\2\b')
+FINISH_RE = re.compile(r'\$finish called at (\d+) \((\d+)(s|ms|us|ns|ps|fs)\)')
+
+
+def clock_period(project):
+    """Testbench clock period in seconds, or None if it cannot be found"""
+    for path in project.tb_files:
+        with open(os.path.join(project.path, path), errors='replace') as f:
+            text = f.read()
+        clock = CLOCK_RE.search(text)
+        if not clock:
+            continue
+        scale = TIMESCALE_RE.search(text)
+        unit = int(scale.group(1)) * UNITS[scale.group(2)] if scale else 1e-9
+        return 2 * float(clock.group(1)) * unit
+    return None
+
+
+def finish_time(output):
+    """Simulated time at $finish in seconds, or None"""
+    m = FINISH_RE.search(output)
+    if not m:
+        return None
+    return int(m.group(1)) * int(m.group(2)) * UNITS[m.group(3)]
+
+
+# ----------------------------------------------------------------------------
+# Measurement
+# ----------------------------------------------------------------------------
+
+def time_compile(project, repeat):
+    """Best-of-repeat cold compile time; returns (seconds, binary)"""
+    best = None
+    for _ in range(repeat):
+        cache_dir = tempfile.mkdtemp(prefix='sim-bench-build-')
+        try:
+            start = time.perf_counter()
+            compile_project(project, cache_dir=cache_dir)
+            elapsed = time.perf_counter() - start
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        best = elapsed if best is None else min(best, elapsed)
+    # The timed builds were thrown away; runs use the shared cache
+    binary = compile_project(project)
+    return best, binary
+
+
+def time_run(project, binary, vcd, repeat, timeout):
+    """Best-of-repeat vvp wall time; returns (seconds, output, vcd_bytes)"""
+    plusargs = ['+vcd=bench.vcd'] if vcd else ['+novcd']
+    program = os.path.join(project.path, 'program.hex')
+    if os.path.isfile(program):
+        plusargs.append(f"+program={program}")
+
+    best, output, vcd_bytes = None, '', 0
+    for _ in range(repeat):
+        scratch = tempfile.mkdtemp(prefix='sim-bench-run-')
+        try:
+            start = time.perf_counter()
+            result = subprocess.run(['vvp', '-n', binary] + plusargs, cwd=scratch,
+                                    capture_output=True, text=True, timeout=timeout)
+            elapsed = time.perf_counter() - start
+            if result.returncode != 0:
+                raise RuntimeError(f"vvp exited with {result.returncode}")
+            output = result.stdout + result.stderr
+            vcd_bytes = sum(os.path.getsize(os.path.join(scratch, name))
+                            for name in os.listdir(scratch) if name.endswith('.vcd'))
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output, vcd_bytes
+
+
+def bench_project(project, repeat=3, timeout=300):
+    """All metrics of one project"""
+    compile_s, binary = time_compile(project, repeat)
+    wall_novcd, output, _ = time_run(project, binary, False, repeat, timeout)
+    wall_vcd, _, vcd_bytes = time_run(project, binary, True, repeat, timeout)
+
+    period = clock_period(project)
+    sim_time = finish_time(output)
+    cycles = round(sim_time / period) if period and sim_time is not None else None
+    return {
+        'compile_s': round(compile_s, 4),
+        'wall_novcd_s': round(wall_novcd, 4),
+        'wall_vcd_s': round(wall_vcd, 4),
+        'sim_cycles': cycles,
+        'cycles_per_sec': round(cycles / wall_novcd, 1) if cycles else None,
+        'cycles_per_sec_vcd': round(cycles / wall_vcd, 1) if cycles else None,
+        'vcd_bytes': vcd_bytes,
+    }
+
+
+# ----------------------------------------------------------------------------
+# History
+# ----------------------------------------------------------------------------
+
+def load_history(path):
+    """{commit: entry}, oldest first"""
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_history(path, history):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp, path)
+
+
+def record(history, commit, dirty, results):
+    """Merge this run's per-project results into the entry of its commit"""
+    entry = history.pop(commit, None) or {'projects': {}}
+    entry.update({
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'dirty': dirty,
+        'host': socket.gethostname(),
+        'iverilog': iverilog_version(),
+    })
+    entry['projects'].update(results)
+    history[commit] = entry  # re-inserted last: dict order is run order
+    return entry
+
+
+def baseline_commit(history, commit, requested=None):
+    """The commit to compare against: the requested one or the previous run"""
+    if requested:
+        matches = [c for c in history if c.startswith(requested)]
+        if not matches:
+            raise KeyError(f"no benchmark history for commit '{requested}'")
+        return matches[-1]
+    earlier = [c for c in history if c != commit]
+    return earlier[-1] if earlier else None
+
+
+def compare(base, current, threshold):
+    """[(project, metric, old, new, change)] for every metric worse than threshold"""
+    regressions = []
+    for name, metrics in current.items():
+        old_metrics = base.get(name)
+        if not old_metrics:
+            continue
+        for key, (_, higher_better) in METRICS.items():
+            old, new = old_metrics.get(key), metrics.get(key)
+            if not old or new is None:
+                continue
+            if key in TIMINGS and max(old, new) < MIN_SECONDS:
+                continue
+            change = (new - old) / old
+            if (-change if higher_better else change) > threshold:
+                regressions.append((name, key, old, new, change))
+    return regressions
+
+
+# ----------------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------------
+
+def format_value(key, value):
+    if value is None:
+        return "n/a"
+    if key in TIMINGS:
+        return f"{value:.3f}s"
+    if key == 'vcd_bytes':
+        return f"{value / 1e6:.2f}MB" if value >= 1e5 else f"{value}B"
+    return f"{value:,.0f}"
+
+
+def format_table(results):
+    lines = [f"{'Project':30s}{'Compile':>10s}{'+novcd':>10s}{'+vcd':>10s}"
+             f"{'Cycles':>10s}{'Cyc/s':>12s}{'Cyc/s vcd':>12s}{'VCD':>10s}"]
+    for name, r in results.items():
+        if 'error' in r:
+            lines.append(f"{name:30s}  {r['error']}")
+            continue
+        lines.append(f"{name:30s}{format_value('compile_s', r['compile_s']):>10s}"
+                     f"{format_value('wall_novcd_s', r['wall_novcd_s']):>10s}"
+                     f"{format_value('wall_vcd_s', r['wall_vcd_s']):>10s}"
+                     f"{format_value('sim_cycles', r['sim_cycles']):>10s}"
+                     f"{format_value('cycles_per_sec', r['cycles_per_sec']):>12s}"
+                     f"{format_value('cycles_per_sec_vcd', r['cycles_per_sec_vcd']):>12s}"
+                     f"{format_value('vcd_bytes', r['vcd_bytes']):>10s}")
+    return '\n'.join(lines)
+
+
+def print_regressions(regressions, base, threshold):
+    print()
+    if not regressions:
+        print(f"✓ No regressions beyond {threshold:.0%} against {base[:12]}")
+        return
+    print(f"✗ {len(regressions)} regressions beyond {threshold:.0%} against {base[:12]}:")
+    for name, key, old, new, change in regressions:
+        print(f"  {name:30s} {METRICS[key][0]:16s} {format_value(key, old):>10s} -> "
+              f"{format_value(key, new):>10s} ({change:+.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulation throughput benchmark with history")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p = sub.add_parser('run', help="benchmark projects, record and compare")
+    p.add_argument('-p', '--project', action='append', dest='projects',
+                   help="only these projects (number or name, repeatable)")
+    p.add_argument('-r', '--repeat', type=int, default=3, help="best-of-N timing")
+    p.add_argument('--timeout', type=int, default=300, help="per-run timeout in seconds")
+    p.add_argument('--no-record', action='store_true', help="do not write the history")
+
+    p = sub.add_parser('compare', help="compare two recorded commits")
+    p.add_argument('base', help="baseline commit (prefix)")
+    p.add_argument('commit', nargs='?', help="commit to check (default: the latest run)")
+
+    p = sub.add_parser('show', help="list recorded commits")
+
+    for p in sub.choices.values():
+        p.add_argument('--history', default=HISTORY_FILE, help="JSON history file")
+    for name in ('run', 'compare'):
+        sub.choices[name].add_argument('-t', '--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                       help="relative change flagged as a regression")
+    sub.choices['run'].add_argument('--baseline', help="commit to compare against "
+                                    "(default: the previous recorded run)")
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+
+    if args.cmd == 'show':
+        for commit, entry in history.items():
+            flag = ' (dirty)' if entry.get('dirty') else ''
+            print(f"{commit[:12]}{flag:8s} {entry['timestamp']}  {entry.get('host', '')}  "
+                  f"{len(entry['projects'])} projects")
+        return 0
+
+    if args.cmd == 'compare':
+        if not history:
+            parser.error(f"no benchmark history in {args.history}")
+        base = baseline_commit(history, None, args.base)
+        commit = baseline_commit(history, None, args.commit) if args.commit else list(history)[-1]
+        print("=" * 80)
+        print(f"BENCHMARK {commit[:12]} vs {base[:12]}")
+        print("=" * 80)
+        print(format_table(history[commit]['projects']))
+        regressions = compare(history[base]['projects'], history[commit]['projects'],
+                              args.threshold)
+        print_regressions(regressions, base, args.threshold)
+        return 1 if regressions else 0
+
+    projects = [find_project(k) for k in args.projects] if args.projects else discover_projects()
+    commit, dirty = git_revision()
+    commit = commit or 'unknown'
+
+    print("=" * 80)
+    print(f"SIMULATION BENCHMARK - {len(projects)} projects at {commit[:12]}"
+          f"{' (dirty)' if dirty else ''}, best of {args.repeat}")
+    print("=" * 80)
+    results = {}
+    for project in projects:
+        try:
+            results[project.name] = bench_project(project, args.repeat, args.timeout)
+            print(f"✓ {project.name}", flush=True)
+        except (RuntimeError, OSError, subprocess.TimeoutExpired) as e:
+            results[project.name] = {'error': str(e).split('\n')[0]}
+            print(f"✗ {project.name}: {results[project.name]['error']}", flush=True)
+    print()
+    print(format_table(results))
+
+    measured = {k: v for k, v in results.items() if 'error' not in v}
+    base = baseline_commit(history, commit, args.baseline)
+    regressions = []
+    if base:
+        regressions = compare(history[base]['projects'], measured, args.threshold)
+        print_regressions(regressions, base, args.threshold)
+
+    if not args.no_record and measured:
+        record(history, commit, dirty, measured)
+        save_history(args.history, history)
+        print(f"\nRecorded {len(measured)} projects under {commit[:12]} in {args.history}")
+    return 1 if regressions or len(measured) < len(results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
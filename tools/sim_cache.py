@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Compile-once / Run-many Simulation Cache
+Keeps compiled vvp images in a content-addressed directory keyed by a hash
+of the RTL, testbench, `include`d files, iverilog flags and iverilog
+version. Anything that changes per run (program image, cycle budget) is
+passed to vvp as plusargs instead of being baked in by a rebuild.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from sim_projects import REPO_ROOT, discover_projects, find_project
+
+CACHE_DIR = os.environ.get('SIM_CACHE_DIR', os.path.join(REPO_ROOT, '.sim_cache'))
+INCLUDE_RE = re.compile(r'^\s*`include\s+"([^"]+)"', re.M)
+
+_iverilog_version = None
+
+
+def iverilog_version():
+    """First line of `iverilog -V`, so a toolchain upgrade invalidates the cache"""
+    global _iverilog_version
+    if _iverilog_version is None:
+        try:
+            result = subprocess.run(['iverilog', '-V'], capture_output=True, text=True)
+            _iverilog_version = (result.stdout or result.stderr).split('\n')[0]
+        except OSError:
+            _iverilog_version = ''
+    return _iverilog_version
+
+
+def compile_flags(project, extra_flags=()):
+    """iverilog options of the project's compile rule, without -o and sources"""
+    cmd = project.compile_cmd[1:]
+    flags = []
+    skip = False
+    for arg in cmd:
+        if skip:
+            skip = False
+            continue
+        if arg == '-o':
+            skip = True
+            continue
+        if arg in project.sources:
+            continue
+        flags.append(arg)
+    return flags + list(extra_flags)
+
+
+def dependency_files(project):
+    """Sources plus every file they `include, relative to the project"""
+    include_dirs = ['.']
+    args = project.compile_cmd
+    for i, arg in enumerate(args):
+        if arg == '-I' and i + 1 < len(args):
+            include_dirs.append(args[i + 1])
+        elif arg.startswith('-I') and len(arg) > 2:
+            include_dirs.append(arg[2:])
+
+    files = list(project.sources)
+    seen = set(files)
+    queue = list(files)
+    while queue:
+        path = queue.pop()
+        full = os.path.join(project.path, path)
+        if not os.path.isfile(full):
+            continue
+        with open(full, errors='replace') as f:
+            includes = INCLUDE_RE.findall(f.read())
+        search = [os.path.dirname(path)] + include_dirs
+        for name in includes:
+            for d in search:
+                candidate = os.path.normpath(os.path.join(d, name))
+                if os.path.isfile(os.path.join(project.path, candidate)):
+                    if candidate not in seen:
+                        seen.add(candidate)
+                        files.append(candidate)
+                        queue.append(candidate)
+                    break
+    return files
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(project, extra_flags=()):
+    """Content hash identifying one compiled simulator"""
+    h = hashlib.sha256()
+    h.update(iverilog_version().encode())
+    h.update(b'\0'.join(a.encode() for a in compile_flags(project, extra_flags)))
+    for path in dependency_files(project):
+        h.update(b'\0' + path.encode() + b'\0')
+        h.update(file_digest(os.path.join(project.path, path)).encode())
+    return h.hexdigest()[:32]
+
+
+def compile_project(project, extra_flags=(), cache_dir=None, timeout=300):
+    """Return the path of a compiled simulator, building it only on a miss
+
+    Safe to call from many processes at once: each builds into a private
+    temp file and the first finished one is atomically moved into place.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    key = cache_key(project, extra_flags)
+    binary = os.path.join(cache_dir, key, project.sim_out)
+    if os.path.isfile(binary):
+        return binary
+
+    os.makedirs(os.path.dirname(binary), exist_ok=True)
+    fd, tmp_out = tempfile.mkstemp(prefix=project.sim_out + '.', dir=os.path.dirname(binary))
+    os.close(fd)
+    cmd = [project.compile_cmd[0]] + compile_flags(project, extra_flags) + \
+        ['-o', tmp_out] + project.sources
+    try:
+        result = subprocess.run(cmd, cwd=project.path, capture_output=True,
+                                text=True, timeout=timeout)
+        if result.returncode != 0:
+            raise RuntimeError(f"{project.name}: compile failed\n{result.stdout}{result.stderr}")
+        os.replace(tmp_out, binary)
+    finally:
+        if os.path.exists(tmp_out):
+            os.unlink(tmp_out)
+    return binary
+
+
+def plusarg_list(plusargs):
+    """Accept {'program': 'x.hex', 'cycles': 500} or ['+program=x.hex', ...]"""
+    if not plusargs:
+        return []
+    if isinstance(plusargs, dict):
+        return [f"+{k}" if v is True else f"+{k}={v}" for k, v in plusargs.items()]
+    return list(plusargs)
+
+
+def run_binary(binary, cwd, plusargs=None, timeout=60):
+    """Run a cached simulator in cwd; returns (returncode, output, timed_out)"""
+    cmd = ['vvp', '-n', binary] + plusarg_list(plusargs)
+    try:
+        result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, timeout=timeout)
+        return result.returncode, result.stdout + result.stderr, False
+    except subprocess.TimeoutExpired as e:
+        out = (e.stdout or b'') + (e.stderr or b'')
+        if isinstance(out, bytes):
+            out = out.decode(errors='replace')
+        return None, out, True
+
+
+def clear_cache(cache_dir=None):
+    shutil.rmtree(cache_dir or CACHE_DIR, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed simulator cache")
+    parser.add_argument('-p', '--project', action='append', dest='projects',
+                        help="project number or name (default: all)")
+    parser.add_argument('--key', action='store_true', help="only print cache keys")
+    parser.add_argument('--clear', action='store_true', help="delete the cache")
+    args = parser.parse_args()
+
+    if args.clear:
+        clear_cache()
+        print(f"Cleared {CACHE_DIR}")
+        return 0
+
+    projects = [find_project(k) for k in args.projects] if args.projects else discover_projects()
+    status = 0
+    for project in projects:
+        if args.key:
+            print(f"{project.name:30s} {cache_key(project)}")
+            continue
+        try:
+            print(f"✓ {project.name:30s} {compile_project(project)}")
+        except (RuntimeError, OSError) as e:
+            print(f"✗ {project.name:30s} {e}")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
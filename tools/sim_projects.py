@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Project discovery for the simulation tools
+Reads each XX_Project/Makefile so the Python harness uses exactly the same
+sources, flags and targets as `make sim` / `make simulate`.
+"""
+
+import os
+import re
+import shlex
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_RE = re.compile(r'^\d\d_\w+$')
+VAR_RE = re.compile(r'\$\((\w+)\)')
+
+
+def parse_makefile(path):
+    """Return (variables, recipes) from a simple Makefile
+
+    variables: {name: fully expanded value}
+    recipes:   {target: [expanded command lines]}
+    """
+    raw_vars = {}
+    raw_recipes = {}
+    target = None
+
+    with open(path) as f:
+        lines = f.read().replace('\\\n', ' ').split('\n')
+
+    for line in lines:
+        if line.startswith('\t'):
+            if target is not None:
+                raw_recipes[target].append(line.strip())
+            continue
+        stripped = line.split('#')[0].strip()
+        if not stripped:
+            continue
+        m = re.match(r'^(\w+)\s*[:?]?=\s*(.*)$', stripped)
+        if m:
+            raw_vars[m.group(1)] = ' '.join(m.group(2).split())
+            target = None
+            continue
+        m = re.match(r'^([\w.]+)\s*:(?!=)', stripped)
+        if m:
+            target = m.group(1)
+            raw_recipes.setdefault(target, [])
+        else:
+            target = None
+
+    def expand(text, depth=0):
+        if depth > 10:
+            return text
+        return VAR_RE.sub(lambda m: expand(raw_vars.get(m.group(1), ''), depth + 1), text)
+
+    variables = {name: expand(value) for name, value in raw_vars.items()}
+    recipes = {t: [expand(cmd) for cmd in cmds] for t, cmds in raw_recipes.items()}
+    return variables, recipes
+
+
+class Project:
+    """One XX_Project directory and how to build/run its testbench"""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.name = os.path.basename(self.path)
+        variables, recipes = parse_makefile(os.path.join(self.path, 'Makefile'))
+        self.variables = variables
+        self.recipes = recipes
+
+        self.rtl_files = (variables.get('RTL_FILES') or variables.get('RTL_SRCS', '')).split()
+        self.tb_files = (variables.get('TB_FILE') or variables.get('TB_SRCS', '')).split()
+        self.sim_out = variables.get('SIM_OUT') or variables.get('TB_OUT')
+        self.vcd_file = variables.get('VCD_FILE')
+        # 01-06 and 12 use `make sim`, 07-11 use `make simulate`
+        self.sim_target = 'sim' if 'sim' in recipes else 'simulate'
+        self.compile_cmd = shlex.split(recipes['compile'][0]) if recipes.get('compile') else []
+        self.run_cmd = shlex.split(recipes[self.sim_target][0]) if recipes.get(self.sim_target) else []
+
+    @property
+    def number(self):
+        return self.name[:2]
+
+    @property
+    def sources(self):
+        """All Verilog inputs of the compile step, relative to the project"""
+        return self.rtl_files + self.tb_files
+
+    def __repr__(self):
+        return f"Project({self.name})"
+
+
+def git_revision(root=REPO_ROOT):
+    """(commit hash, dirty flag) of the working tree, or (None, False)"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                cwd=root, capture_output=True, text=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+
+
+def discover_projects(root=REPO_ROOT):
+    """All project directories with a Makefile, in numeric order"""
+    projects = []
+    for entry in sorted(os.listdir(root)):
+        path = os.path.join(root, entry)
+        if PROJECT_RE.match(entry) and os.path.isfile(os.path.join(path, 'Makefile')):
+            projects.append(Project(path))
+    return projects
+
+
+def find_project(key, root=REPO_ROOT):
+    """Look up a project by number ('01', '1') or by (partial) name"""
+    projects = discover_projects(root)
+    for project in projects:
+        if key.isdigit() and int(project.number) == int(key):
+            return project
+        if key == project.name or key.lower() in project.name.lower():
+            return project
+    raise KeyError(f"no project matches '{key}'")
+
+
+if __name__ == "__main__":
+    for p in discover_projects():
+        print(f"{p.name:30s} {p.sim_target:9s} {p.sim_out:24s} {len(p.sources)} sources")
+    sys.exit(0)
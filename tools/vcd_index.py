@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Indexed, Memory-mapped VCD Reader
+Builds a one-time on-disk index next to a VCD file (<file>.vcd.idx) that
+maps every signal to the times and byte offsets of its value changes, plus
+a global timestamp -> offset table. Queries then bisect the memory-mapped
+index and read single lines out of the memory-mapped VCD, so they take
+microseconds no matter how large the dump is.
+
+    vcd = VCDIndex('riscv_cpu.vcd')
+    vcd.value_at('dut.u_ex.alu_result', vcd.cycle_time(40))
+    vcd.changes('dut.wb_enable', t0, t1)
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+
+MAGIC = b'VCDIDX1\0'
+SCALAR_CHARS = b'01xzXZ'
+VECTOR_CHARS = b'bBrRsS'
+
+
+def parse_header(mm):
+    """Parse declarations; returns (signals, timescale, body offset)
+
+    signals: {id_code: {'names': [hierarchical names], 'width': n}}
+    """
+    end = mm.find(b'$enddefinitions')
+    if end < 0:
+        raise ValueError("not a VCD file: no $enddefinitions")
+    body = mm.find(b'$end', end + len(b'$enddefinitions')) + len(b'$end')
+    header = mm[:body].decode(errors='replace')
+
+    signals = {}
+    scope = []
+    timescale = None
+    for m in re.finditer(r'\$(\w+)(.*?)\$end', header, re.S):
+        kind, args = m.group(1), m.group(2).split()
+        if kind == 'scope' and len(args) >= 2:
+            scope.append(args[1])
+        elif kind == 'upscope' and scope:
+            scope.pop()
+        elif kind == 'timescale':
+            timescale = ''.join(args)
+        elif kind == 'var' and len(args) >= 4:
+            width, code, ref = int(args[1]), args[2], args[3]
+            name = '.'.join(scope + [ref])
+            entry = signals.setdefault(code, {'names': [], 'width': width})
+            entry['names'].append(name)
+    return signals, timescale, body
+
+
+def build_index(vcd_path, idx_path=None):
+    """Scan the VCD once and write the index file"""
+    idx_path = idx_path or vcd_path + '.idx'
+    st = os.stat(vcd_path)
+    with open(vcd_path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            signals, timescale, body = parse_header(mm)
+            change_times = {code: array('Q') for code in signals}
+            change_offsets = {code: array('Q') for code in signals}
+            times = array('Q')
+            time_offsets = array('Q')
+
+            t = 0
+            offset = body
+            mm.seek(body)
+            for line in iter(mm.readline, b''):
+                c = line[0] if line else 0
+                if c == 0x23:  # '#'
+                    t = int(line[1:])
+                    times.append(t)
+                    time_offsets.append(offset)
+                elif c in SCALAR_CHARS:
+                    code = line[1:].strip().decode()
+                    if code in change_times:
+                        change_times[code].append(t)
+                        change_offsets[code].append(offset)
+                elif c in VECTOR_CHARS:
+                    parts = line.split()
+                    if len(parts) == 2:
+                        code = parts[1].decode()
+                        if code in change_times:
+                            change_times[code].append(t)
+                            change_offsets[code].append(offset)
+                offset += len(line)
+        finally:
+            mm.close()
+
+    meta = {
+        'vcd_size': st.st_size,
+        'vcd_mtime': st.st_mtime,
+        'timescale': timescale,
+        'n_times': len(times),
+        'signals': {},
+    }
+    start = 0
+    for code, info in signals.items():
+        count = len(change_times[code])
+        meta['signals'][code] = dict(info, start=start, count=count)
+        start += count
+    meta['n_changes'] = start
+
+    header = json.dumps(meta).encode()
+    pad = (-(len(MAGIC) + 8 + len(header))) % 8
+    tmp = idx_path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header) + pad))
+        f.write(header + b' ' * pad)
+        times.tofile(f)
+        time_offsets.tofile(f)
+        for code in signals:
+            change_times[code].tofile(f)
+        for code in signals:
+            change_offsets[code].tofile(f)
+    os.replace(tmp, idx_path)
+    return idx_path
+
+
+class VCDIndex:
+    """Query interface over a VCD file and its index (built on first use)"""
+
+    def __init__(self, vcd_path, idx_path=None, rebuild=False):
+        self.vcd_path = vcd_path
+        self.idx_path = idx_path or vcd_path + '.idx'
+        if rebuild or not self._index_fresh():
+            build_index(vcd_path, self.idx_path)
+
+        self._vcd_file = open(vcd_path, 'rb')
+        self.vcd = mmap.mmap(self._vcd_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._idx_file = open(self.idx_path, 'rb')
+        self.idx = mmap.mmap(self._idx_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header_len = struct.unpack_from('<Q', self.idx, len(MAGIC))[0]
+        base = len(MAGIC) + 8
+        meta = json.loads(bytes(self.idx[base:base + header_len]))
+        self.timescale = meta['timescale']
+        self.signals = meta['signals']
+
+        words = memoryview(self.idx)[base + header_len:].cast('Q')
+        n_times, n_changes = meta['n_times'], meta['n_changes']
+        self.times = words[:n_times]
+        self.time_offsets = words[n_times:2 * n_times]
+        self._change_times = words[2 * n_times:2 * n_times + n_changes]
+        self._change_offsets = words[2 * n_times + n_changes:2 * n_times + 2 * n_changes]
+
+        self._by_name = {}
+        for code, info in self.signals.items():
+            for name in info['names']:
+                self._by_name[name] = code
+        self._clock_edges = {}
+
+    def _index_fresh(self):
+        if not os.path.isfile(self.idx_path):
+            return False
+        st = os.stat(self.vcd_path)
+        try:
+            with open(self.idx_path, 'rb') as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    return False
+                header_len = struct.unpack('<Q', f.read(8))[0]
+                meta = json.loads(f.read(header_len))
+        except (OSError, ValueError):
+            return False
+        return meta['vcd_size'] == st.st_size and meta['vcd_mtime'] == st.st_mtime
+
+    def close(self):
+        for view in (self.times, self.time_offsets, self._change_times, self._change_offsets):
+            view.release()
+        self.vcd.close()
+        self.idx.close()
+        self._vcd_file.close()
+        self._idx_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def end_time(self):
+        return self.times[-1] if len(self.times) else 0
+
+    def names(self, pattern=None):
+        """All hierarchical signal names, optionally filtered by a regex"""
+        names = sorted(self._by_name)
+        if pattern:
+            rx = re.compile(pattern)
+            names = [n for n in names if rx.search(n)]
+        return names
+
+    def lookup(self, name):
+        """Resolve a full name or a unique dotted suffix to an id code"""
+        if name in self._by_name:
+            return self._by_name[name]
+        matches = {code for full, code in self._by_name.items()
+                   if full.endswith('.' + name)}
+        if len(matches) == 1:
+            return matches.pop()
+        if not matches:
+            raise KeyError(f"no signal named '{name}'")
+        raise KeyError(f"'{name}' is ambiguous")
+
+    def width(self, name):
+        return self.signals[self.lookup(name)]['width']
+
+    def _span(self, code):
+        info = self.signals[code]
+        return info['start'], info['start'] + info['count']
+
+    def _read_value(self, offset):
+        end = self.vcd.find(b'\n', offset)
+        line = self.vcd[offset:end if end >= 0 else len(self.vcd)].strip()
+        if line[:1] in (b'b', b'B', b'r', b'R', b's', b'S'):
+            return line[1:].split()[0].decode()
+        return line[:1].decode()
+
+    def value_at(self, name, time):
+        """Value of a signal at a time, as the VCD string ('1', '0101', 'x')"""
+        lo, hi = self._span(self.lookup(name))
+        i = bisect_right(self._change_times, time, lo, hi) - 1
+        if i < lo:
+            return None
+        return self._read_value(self._change_offsets[i])
+
+    def int_at(self, name, time):
+        """Value as an int, or None if it contains X/Z"""
+        value = self.value_at(name, time)
+        try:
+            return int(value, 2) if value is not None else None
+        except ValueError:
+            return None
+
+    def changes(self, name, t0=0, t1=None):
+        """[(time, value)] for every change with t0 <= time <= t1"""
+        lo, hi = self._span(self.lookup(name))
+        start = bisect_left(self._change_times, t0, lo, hi)
+        stop = hi if t1 is None else bisect_right(self._change_times, t1, lo, hi)
+        return [(self._change_times[i], self._read_value(self._change_offsets[i]))
+                for i in range(start, stop)]
+
+    def toggles(self, name, t0=0, t1=None):
+        """Number of value changes in [t0, t1]"""
+        lo, hi = self._span(self.lookup(name))
+        start = bisect_left(self._change_times, t0, lo, hi)
+        stop = hi if t1 is None else bisect_right(self._change_times, t1, lo, hi)
+        return stop - start
+
+    def offset_of_time(self, time):
+        """Byte offset of the first timestamp >= time in the VCD body"""
+        i = bisect_left(self.times, time)
+        return self.time_offsets[i] if i < len(self.times) else len(self.vcd)
+
+    def clock_edges(self, clock='clk'):
+        """Times of the rising edges of a clock signal (cached)"""
+        code = self.lookup(clock)
+        if code not in self._clock_edges:
+            self._clock_edges[code] = [t for t, v in self.changes(clock) if v == '1']
+        return self._clock_edges[code]
+
+    def cycle_time(self, cycle, clock='clk'):
+        """Time of the Nth rising clock edge (0-based)"""
+        return self.clock_edges(clock)[cycle]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexed VCD queries")
+    parser.add_argument('vcd')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    sub.add_parser('build', help="(re)build the index")
+    p = sub.add_parser('list', help="list signal names")
+    p.add_argument('pattern', nargs='?')
+    p = sub.add_parser('value', help="value of a signal at a time or cycle")
+    p.add_argument('signal')
+    p.add_argument('--time', type=int)
+    p.add_argument('--cycle', type=int)
+    p.add_argument('--clock', default='clk')
+    p = sub.add_parser('changes', help="value changes of a signal in [t0, t1]")
+    p.add_argument('signal')
+    p.add_argument('--from', dest='t0', type=int, default=0)
+    p.add_argument('--to', dest='t1', type=int)
+    args = parser.parse_args()
+
+    if args.cmd == 'build':
+        print(build_index(args.vcd))
+        return 0
+
+    with VCDIndex(args.vcd) as vcd:
+        if args.cmd == 'list':
+            for name in vcd.names(args.pattern):
+                print(f"{name} [{vcd.width(name)}]")
+        elif args.cmd == 'value':
+            t = vcd.cycle_time(args.cycle, args.clock) if args.cycle is not None else args.time
+            print(f"{args.signal} @ {t} = {vcd.value_at(args.signal, t)}")
+        elif args.cmd == 'changes':
+            for t, v in vcd.changes(args.signal, args.t0, args.t1):
+                print(f"{t:>12d} {v}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())